@@ -0,0 +1,260 @@
+"""
+Pub/sub backplane carrying WebSocket frames between the workers that serve the app.
+
+A worker queues every frame it broadcasts for its own clients and also publishes it
+here; the backplane hands it to every other worker, which queues it for theirs.
+Publishing never waits: envelopes are collected for ``flush_interval`` seconds (or
+until ``max_batch_bytes``) and sent as one batch. Delivery is at most once: a batch
+that a peer cannot take right away, or that fails to send, is dropped and counted.
+
+    backplane = UnixSocketBackplane(default_socket_directory())
+    await backplane.start(deliver)  # deliver(envelopes) runs for every batch from another worker
+    backplane.publish("emotions", "user_001", "emotional_update:user_001", frame)
+
+UnixSocketBackplane needs nothing but a directory shared by the workers on one box,
+private to the user they run as;
+RedisBackplane spans boxes through Redis pub/sub. Other transports subclass Backplane
+and implement ``_open``, ``_close`` and ``_send``, calling ``_received`` with every
+payload that arrives.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import stat
+import tempfile
+import time
+import uuid
+from typing import Callable, List, Optional, Tuple
+
+from app.wire import dumps, loads
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+Envelope = Tuple[str, Optional[str], Optional[str], str]  # (channel, topic or None for all, coalescing key, frame)
+
+
+def default_socket_directory() -> str:
+    """A per-user directory for UnixSocketBackplane: under $XDG_RUNTIME_DIR, else the temp dir."""
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return os.path.join(runtime, "genesis-backplane")
+    return os.path.join(tempfile.gettempdir(), f"genesis-backplane-{os.getuid()}")
+
+
+class Backplane:
+    def __init__(self, flush_interval: float = 0.002, max_batch_bytes: int = 65536):
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.flush_interval = flush_interval
+        self.max_batch_bytes = max_batch_bytes
+        # Envelopes, not batches
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self._deliver: Optional[Callable[[List[Envelope]], None]] = None
+        self._pending: List[Envelope] = []
+        self._pending_bytes = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    async def start(self, deliver: Callable[[List[Envelope]], None]) -> None:
+        self._deliver = deliver
+        await self._open()
+
+    async def stop(self) -> None:
+        self.flush()
+        await self._close()
+        self._deliver = None
+
+    def publish(self, channel: str, topic: Optional[str], key: Optional[str], text: str) -> None:
+        """Queue a frame for the other workers; it leaves with the next batch."""
+        if self._deliver is None:
+            return
+        self._pending.append((channel, topic, key, text))
+        self._pending_bytes += len(text)
+        if self._pending_bytes >= self.max_batch_bytes:
+            self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.flush_interval, self.flush)
+
+    def flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        batch, self._pending, self._pending_bytes = self._pending, [], 0
+        self.published += len(batch)
+        self._send(dumps([self.worker_id, batch]), len(batch))
+
+    def _received(self, payload: bytes) -> None:
+        try:
+            worker_id, batch = loads(payload)
+        except ValueError:
+            logger.warning("Discarding malformed backplane batch")
+            return
+        if worker_id == self.worker_id or self._deliver is None:
+            return
+        self.delivered += len(batch)
+        self._deliver(batch)
+
+    async def _open(self) -> None:
+        raise NotImplementedError
+
+    async def _close(self) -> None:
+        raise NotImplementedError
+
+    def _send(self, payload: bytes, count: int) -> None:
+        """Send one encoded batch of ``count`` envelopes to every other worker, without waiting."""
+        raise NotImplementedError
+
+
+class UnixSocketBackplane(Backplane):
+    """Each worker binds a datagram socket in ``path`` and sends every batch to all the others there.
+
+    ``path`` must be a directory owned by this user with mode 0700 (it is created so if
+    missing), since anything that can write there can inject frames.
+    """
+
+    def __init__(self, path: str, peer_refresh: float = 1.0, **options):
+        super().__init__(**options)
+        self.path = path
+        self.peer_refresh = peer_refresh
+        self._address = os.path.join(path, f"{self.worker_id}.sock")
+        self._sock: Optional[socket.socket] = None
+        self._receive_size = 0
+        self._peers: List[str] = []
+        self._peers_checked = float("-inf")
+
+    async def _open(self) -> None:
+        os.makedirs(self.path, mode=0o700, exist_ok=True)
+        info = os.lstat(self.path)
+        if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) != 0o700:
+            raise PermissionError(
+                f"Backplane directory {self.path} must be a directory owned by uid {os.getuid()} with mode 0700"
+            )
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(self._address)
+        sock.setblocking(False)
+        # No datagram can outgrow the sender's buffer, and every worker runs with the same defaults
+        self._receive_size = sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF)
+        self._sock = sock
+        asyncio.get_running_loop().add_reader(sock.fileno(), self._readable)
+        logger.info(f"Backplane worker {self.worker_id} listening on {self._address}")
+
+    async def _close(self) -> None:
+        if self._sock is None:
+            return
+        asyncio.get_running_loop().remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+        try:
+            os.unlink(self._address)
+        except FileNotFoundError:
+            pass
+
+    def _readable(self) -> None:
+        sock = self._sock
+        while sock is not None:
+            try:
+                payload = sock.recv(self._receive_size)
+            except BlockingIOError:
+                return
+            self._received(payload)
+
+    def _current_peers(self) -> List[str]:
+        now = time.monotonic()
+        if now - self._peers_checked >= self.peer_refresh:
+            with os.scandir(self.path) as entries:
+                self._peers = [
+                    entry.path for entry in entries
+                    if entry.name.endswith(".sock") and entry.path != self._address
+                ]
+            self._peers_checked = now
+        return self._peers
+
+    def _send(self, payload: bytes, count: int) -> None:
+        if self._sock is None:
+            self.dropped += count
+            return
+        for peer in list(self._current_peers()):
+            try:
+                self._sock.sendto(payload, peer)
+            except BlockingIOError:
+                self.dropped += count  # The peer is behind; it misses this batch
+            except (ConnectionRefusedError, FileNotFoundError):
+                # A worker that exited without cleaning up
+                self._peers.remove(peer)
+                try:
+                    os.unlink(peer)
+                except OSError:
+                    pass
+            except OSError as error:
+                self.dropped += count
+                logger.warning(f"Backplane batch of {len(payload)} bytes not sent to {peer}: {error}")
+
+
+class RedisBackplane(Backplane):
+    """Batches go out over one Redis pub/sub channel, shared by every worker on every box."""
+
+    def __init__(self, url: str, channel: str = "genesis:websocket", max_outbox: int = 1024, **options):
+        super().__init__(**options)
+        self.url = url
+        self.channel = channel
+        self._outbox: asyncio.Queue = asyncio.Queue(max_outbox)
+        self._redis = None
+        self._pubsub = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def _open(self) -> None:
+        if aioredis is None:
+            raise RuntimeError("RedisBackplane needs the redis package")
+        self._redis = aioredis.from_url(self.url)
+        self._pubsub = self._redis.pubsub()
+        await self._pubsub.subscribe(self.channel)
+        self._tasks = [asyncio.create_task(self._listen()), asyncio.create_task(self._publish_batches())]
+
+    async def _close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(self.channel)
+            await self._pubsub.close()
+            self._pubsub = None
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    def _send(self, payload: bytes, count: int) -> None:
+        try:
+            self._outbox.put_nowait((payload, count))
+        except asyncio.QueueFull:
+            self.dropped += count
+
+    async def _publish_batches(self) -> None:
+        # One publisher keeps batches in order
+        while True:
+            payload, count = await self._outbox.get()
+            try:
+                await self._redis.publish(self.channel, payload)
+            except Exception as error:
+                self.dropped += count
+                logger.warning(f"Backplane batch not published: {error}")
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    if message.get("type") == "message":
+                        self._received(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                logger.warning(f"Backplane subscription lost, resubscribing: {error}")
+                await asyncio.sleep(1.0)
@@ -1,11 +1,26 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import json
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import TypeAdapter, ValidationError
 import asyncio
+import os
+import time
+from collections import defaultdict, deque
 from datetime import datetime
-from typing import Dict, List
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple, Union
 import logging
+import sys
+
+from app.backplane import Backplane, Envelope, RedisBackplane, UnixSocketBackplane, default_socket_directory
+from app.schemas import DnaCommand, EmotionCreate, EmotionsMessage
+from app.wire import FastJSONResponse, Frame, negotiate_subprotocol, unpack
+
+# The Prometheus primitives are shared with the Emotional Memory Layer in the project's src/ directory;
+# a process hosting a layer exports its latency and residency here with instrument_layer(layer, metrics)
+EML_SRC_PATH = os.getenv("EML_SRC_PATH", os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+sys.path.insert(0, os.path.abspath(EML_SRC_PATH))
+
+from emotional_memory_metrics import MetricsRegistry  # noqa: E402
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -16,7 +31,8 @@ app = FastAPI(
     description="Digital Nervous System for Emotional Intelligence",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=FastJSONResponse,
 )
 
 # CORS middleware
@@ -33,45 +49,363 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Prometheus metrics, served at /metrics. Set METRICS_ENABLED=false to skip all timing.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() not in ("0", "false", "no", "off")
+
+# Seconds, from fast local sends up to stalled clients
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+metrics = MetricsRegistry()
+http_request_seconds = metrics.histogram(
+    "genesis_http_request_seconds", "HTTP request latency by route.", ("method", "route"), LATENCY_BUCKETS
+)
+websocket_send_seconds = metrics.histogram(
+    "genesis_websocket_send_seconds", "Time to send one WebSocket frame.", ("channel",), LATENCY_BUCKETS
+)
+websocket_broadcast_seconds = metrics.histogram(
+    "genesis_websocket_broadcast_seconds", "Time to queue one frame for every client of a channel.", ("channel",),
+    LATENCY_BUCKETS,
+)
+event_loop_lag_seconds = metrics.histogram(
+    "genesis_event_loop_lag_seconds", "Delay of a scheduled event-loop wakeup beyond its deadline.", (), LATENCY_BUCKETS
+)
+
+
+class RequestTimingMiddleware:
+    """Times HTTP requests by route template, so path parameters do not explode the label set."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route = scope.get("route")
+            http_request_seconds.observe(
+                time.perf_counter() - start, scope["method"], route.path if route is not None else "unmatched"
+            )
+
+
+if METRICS_ENABLED:
+    app.add_middleware(RequestTimingMiddleware)
+
+
+async def sample_event_loop_lag(interval: float = 0.5):
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        event_loop_lag_seconds.observe(max(0.0, loop.time() - start - interval))
+
+
+_lag_sampler: Optional[asyncio.Task] = None
+
+
+@app.on_event("startup")
+async def start_metrics():
+    global _lag_sampler
+    if METRICS_ENABLED:
+        _lag_sampler = asyncio.create_task(sample_event_loop_lag())
+
+
+@app.on_event("shutdown")
+async def stop_metrics():
+    if _lag_sampler is not None:
+        _lag_sampler.cancel()
+
+
+# Outbound WebSocket frames wait in a bounded queue per client. When a client falls that far behind:
+# drop_oldest discards its oldest queued frame, coalesce replaces its queued frame of the same type
+# (or else the oldest), and disconnect closes it.
+SLOW_CONSUMER_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+WS_SLOW_CONSUMER_POLICY = os.getenv("WS_SLOW_CONSUMER_POLICY", "coalesce")
+if WS_SLOW_CONSUMER_POLICY not in SLOW_CONSUMER_POLICIES:
+    raise ValueError(f"WS_SLOW_CONSUMER_POLICY must be one of {', '.join(SLOW_CONSUMER_POLICIES)}")
+
+# With several workers (uvicorn --workers N) broadcasts cross between them over a backplane:
+# "local" uses Unix sockets in WS_BACKPLANE_PATH (one box; a private per-user directory by
+# default), "redis" uses REDIS_URL.
+# Periodic channels stay per worker, since every worker runs its own producers.
+WS_BACKPLANES = ("none", "local", "redis")
+WS_BACKPLANE = os.getenv("WS_BACKPLANE", "none")
+WS_BACKPLANE_PATH = os.getenv("WS_BACKPLANE_PATH") or default_socket_directory()
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+if WS_BACKPLANE not in WS_BACKPLANES:
+    raise ValueError(f"WS_BACKPLANE must be one of {', '.join(WS_BACKPLANES)}")
+
+
+class ClientConnection:
+    """A WebSocket plus its outbound queue, drained by a sender task of its own."""
+
+    def __init__(self, websocket: WebSocket, channel: str, manager: "ConnectionManager", binary: bool = False):
+        self.websocket = websocket
+        self.channel = channel
+        self.manager = manager
+        self.binary = binary  # msgpack frames instead of JSON text
+        self.queue: Deque[Tuple[Optional[str], Union[str, bytes]]] = deque()  # (coalescing key, encoded frame)
+        self.topics: Set[str] = set()
+        self.closed = False
+        self._wakeup = asyncio.Event()
+        self._sender = asyncio.create_task(self._drain())
+
+    def offer(self, frame: Frame) -> None:
+        """Queue a frame without waiting, applying the slow-consumer policy when the queue is full."""
+        if self.closed:
+            return
+        key = frame.key
+        queue = self.queue
+        if len(queue) >= self.manager.max_queue:
+            self.manager.dropped_frames[self.channel] += 1
+            policy = self.manager.policy
+            if policy == "disconnect":
+                logger.info(f"Disconnecting slow client on {self.channel} channel")
+                self.close(code=1013)  # Try again later
+                return
+            if policy == "coalesce" and key is not None:
+                for index, (queued_key, _) in enumerate(queue):
+                    if queued_key == key:
+                        del queue[index]
+                        break
+                else:
+                    queue.popleft()
+            else:
+                queue.popleft()
+        queue.append((key, frame.encoded(self.binary)))
+        self._wakeup.set()
+
+    async def _drain(self):
+        queue = self.queue
+        send = self.websocket.send_bytes if self.binary else self.websocket.send_text
+        try:
+            while True:
+                while not queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                _, data = queue.popleft()
+                if not METRICS_ENABLED:
+                    await send(data)
+                    continue
+                start = time.perf_counter()
+                await send(data)
+                websocket_send_seconds.observe(time.perf_counter() - start, self.channel)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.close()  # The connection is gone
+
+    def close(self, code: Optional[int] = None) -> None:
+        """Stop sending and unregister; with a ``code`` the socket is closed as well."""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.clear()
+        if asyncio.current_task() is not self._sender:
+            self._sender.cancel()
+        self.manager._forget(self)
+        if code is not None:
+            asyncio.ensure_future(self._close_socket(code))
+
+    async def _close_socket(self, code: int) -> None:
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass  # Already closed by the peer
+
+
 # WebSocket connection manager
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {
-            "emotions": [],
-            "dna_engine": [],
-            "neural": [],
-            "sync": []
+    def __init__(self, max_queue: int = WS_SEND_QUEUE_SIZE, policy: str = WS_SLOW_CONSUMER_POLICY):
+        self.max_queue = max_queue
+        self.policy = policy
+        self.active_connections: Dict[str, Dict[WebSocket, ClientConnection]] = {
+            "emotions": {},
+            "dna_engine": {},
+            "neural": {},
+            "sync": {}
         }
+        # (channel, topic) -> subscribed clients; dicts as insertion-ordered sets
+        self.subscriptions: Dict[Tuple[str, str], Dict[WebSocket, ClientConnection]] = {}
+        self.dropped_frames: Dict[str, int] = defaultdict(int)
+        self.producers: Dict[str, ChannelProducer] = {}
+        self.backplane: Optional[Backplane] = None
+
+    def add_producer(self, channel: str, interval: float, build: Callable[[], dict]) -> None:
+        """Publish ``build()`` on ``channel`` every ``interval`` seconds while it has subscribers."""
+        self.producers[channel] = ChannelProducer(self, channel, interval, build)
 
     async def connect(self, websocket: WebSocket, channel: str):
-        await websocket.accept()
+        subprotocol = negotiate_subprotocol(websocket.scope.get("subprotocols", ()))
+        await websocket.accept(subprotocol=subprotocol)
         if channel in self.active_connections:
-            self.active_connections[channel].append(websocket)
+            client = ClientConnection(websocket, channel, self, binary=subprotocol == "msgpack")
+            self.active_connections[channel][websocket] = client
             logger.info(f"Client connected to {channel} channel")
+            producer = self.producers.get(channel)
+            if producer is not None:
+                producer.subscribed(client)
 
     def disconnect(self, websocket: WebSocket, channel: str):
-        if channel in self.active_connections:
-            if websocket in self.active_connections[channel]:
-                self.active_connections[channel].remove(websocket)
-                logger.info(f"Client disconnected from {channel} channel")
+        client = self.active_connections.get(channel, {}).get(websocket)
+        if client is not None:
+            client.close()
+
+    def _forget(self, client: ClientConnection):
+        clients = self.active_connections[client.channel]
+        for topic in list(client.topics):
+            self.unsubscribe(client.websocket, client.channel, topic)
+        if clients.pop(client.websocket, None) is not None:
+            logger.info(f"Client disconnected from {client.channel} channel")
+            producer = self.producers.get(client.channel)
+            if producer is not None and not clients:
+                producer.stop()
+
+    def subscribe(self, websocket: WebSocket, channel: str, topic: str) -> None:
+        client = self.active_connections.get(channel, {}).get(websocket)
+        if client is None or client.closed:
+            return
+        self.subscriptions.setdefault((channel, topic), {})[websocket] = client
+        client.topics.add(topic)
+
+    def unsubscribe(self, websocket: WebSocket, channel: str, topic: str) -> None:
+        subscribers = self.subscriptions.get((channel, topic))
+        if subscribers is None:
+            return
+        client = subscribers.pop(websocket, None)
+        if client is not None:
+            client.topics.discard(topic)
+        if not subscribers:
+            del self.subscriptions[(channel, topic)]
 
     async def send_personal_message(self, message: str, websocket: WebSocket):
         await websocket.send_text(message)
 
     async def broadcast_to_channel(self, message: dict, channel: str):
-        if channel in self.active_connections:
-            disconnected = []
-            for connection in self.active_connections[channel]:
-                try:
-                    await connection.send_text(json.dumps(message))
-                except:
-                    disconnected.append(connection)
-            
-            # Remove disconnected clients
-            for connection in disconnected:
-                self.active_connections[channel].remove(connection)
+        """Serialize ``message`` once and queue it for every client, on every worker; never waits on a socket."""
+        frame = Frame(message, message.get("type"))
+        self.send_frame(frame, channel)
+        if self.backplane is not None:
+            self.backplane.publish(channel, None, frame.key, frame.text)
+
+    def send_frame(self, frame: Frame, channel: str) -> None:
+        clients = self.active_connections.get(channel)
+        if clients is None:
+            return
+        if not METRICS_ENABLED:
+            for client in list(clients.values()):
+                client.offer(frame)
+            return
+        start = time.perf_counter()
+        for client in list(clients.values()):
+            client.offer(frame)
+        websocket_broadcast_seconds.observe(time.perf_counter() - start, channel)
+
+    def publish(self, message: dict, channel: str, topic: str) -> None:
+        """Serialize ``message`` once and queue it only for the clients subscribed to ``topic`` on ``channel``."""
+        # Coalesce per topic, so a client following several topics keeps the latest frame of each
+        frame = Frame(message, f"{message.get('type')}:{topic}")
+        self.send_topic_frame(frame, channel, topic)
+        if self.backplane is not None:
+            self.backplane.publish(channel, topic, frame.key, frame.text)
+
+    def send_topic_frame(self, frame: Frame, channel: str, topic: str) -> None:
+        subscribers = self.subscriptions.get((channel, topic))
+        if not subscribers:
+            return
+        if not METRICS_ENABLED:
+            for client in list(subscribers.values()):
+                client.offer(frame)
+            return
+        start = time.perf_counter()
+        for client in list(subscribers.values()):
+            client.offer(frame)
+        websocket_broadcast_seconds.observe(time.perf_counter() - start, channel)
+
+    def deliver_remote(self, envelopes: List[Envelope]) -> None:
+        """Queue frames published by other workers for the clients of this one."""
+        for channel, topic, key, text in envelopes:
+            if topic is None:
+                self.send_frame(Frame(key=key, text=text), channel)
+            else:
+                self.send_topic_frame(Frame(key=key, text=text), channel, topic)
+
+    def send_to(self, message: dict, websocket: WebSocket, channel: str) -> None:
+        """Queue ``message`` for one client."""
+        client = self.active_connections.get(channel, {}).get(websocket)
+        if client is not None:
+            client.offer(Frame(message, message.get("type")))
+
+
+class ChannelProducer:
+    """The single task publishing a periodic channel, running only while the channel has subscribers."""
+
+    def __init__(self, manager: ConnectionManager, channel: str, interval: float, build: Callable[[], dict]):
+        self.manager = manager
+        self.channel = channel
+        self.interval = interval
+        self.build = build
+        self.latest: Optional[Frame] = None  # Last published
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribed(self, client: ClientConnection) -> None:
+        if self.latest is not None:
+            client.offer(self.latest)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                message = self.build()
+                self.latest = Frame(message, message.get("type"))
+                self.manager.send_frame(self.latest, self.channel)
+            except Exception:
+                logger.exception(f"Producer for {self.channel} channel failed")
+            await asyncio.sleep(self.interval)
+
 
 manager = ConnectionManager()
+metrics.gauge(
+    "genesis_websocket_connections", "Open WebSocket connections by channel.", ("channel",),
+    lambda: {(channel,): len(connections) for channel, connections in manager.active_connections.items()},
+)
+metrics.gauge(
+    "genesis_websocket_queued_frames", "Frames waiting in client send queues by channel.", ("channel",),
+    lambda: {
+        (channel,): sum(len(client.queue) for client in clients.values())
+        for channel, clients in manager.active_connections.items()
+    },
+)
+metrics.gauge(
+    "genesis_websocket_subscribed_topics", "Topics with at least one subscriber by channel.", ("channel",),
+    lambda: {(channel,): sum(1 for key in manager.subscriptions if key[0] == channel) for channel in manager.active_connections},
+)
+metrics.counter(
+    "genesis_backplane_frames_total", "Frames this worker published to, got from or dropped on the backplane.", ("outcome",),
+    lambda: {} if manager.backplane is None else {
+        ("published",): manager.backplane.published,
+        ("delivered",): manager.backplane.delivered,
+        ("dropped",): manager.backplane.dropped,
+    },
+)
+metrics.counter(
+    "genesis_websocket_dropped_frames_total", "Frames dropped, coalesced or refused for slow clients.", ("channel",),
+    lambda: {(channel,): dropped for channel, dropped in manager.dropped_frames.items()},
+)
 
 # Include API routes (placeholder for now)
 @app.get("/")
@@ -97,29 +431,64 @@ async def health_check():
     }
 
 # WebSocket endpoints
+async def receive_data(websocket: WebSocket) -> Union[str, bytes]:
+    """The next inbound frame: text, or bytes from msgpack clients."""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    text = message.get("text")
+    return text if text is not None else message["bytes"]
+
+async def receive_message(websocket: WebSocket, decoder: TypeAdapter) -> Any:
+    """The next inbound message, parsed and validated by ``decoder``."""
+    data = await receive_data(websocket)
+    if isinstance(data, bytes):
+        return decoder.validate_python(unpack(data))
+    return decoder.validate_json(data)
+
+def invalid_message(error: ValueError) -> dict:
+    if isinstance(error, ValidationError):
+        detail = "; ".join(f"{'.'.join(map(str, item['loc']))}: {item['msg']}" for item in error.errors())
+    else:
+        detail = str(error)
+    return {"type": "error", "detail": f"invalid message: {detail}", "timestamp": datetime.now().isoformat()}
+
+# Emotional updates are routed by user: a connection opened with ?user_id=<id> receives
+# that user's stream, and its updates are published for that user only.
+# Without a user_id, updates go back to the sender alone.
 @app.websocket("/ws/emotions")
 async def websocket_emotions(websocket: WebSocket):
+    user_id = websocket.query_params.get("user_id")
     await manager.connect(websocket, "emotions")
+    if user_id:
+        manager.subscribe(websocket, "emotions", user_id)
     try:
         while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
-            
+            try:
+                message = await receive_message(websocket, EmotionsMessage)
+            except ValueError as error:
+                manager.send_to(invalid_message(error), websocket, "emotions")
+                continue
+
             # Process emotional data
             response = {
                 "type": "emotional_update",
+                "user_id": user_id,
                 "data": {
-                    "emotion": message.get("emotion", "calm"),
-                    "intensity": message.get("intensity", 50),
+                    "emotion": message.emotion,
+                    "intensity": message.intensity,
                     "timestamp": datetime.now().isoformat(),
-                    "ai_insight": f"Detected {message.get('emotion', 'calm')} state with {message.get('intensity', 50)}% intensity"
+                    "ai_insight": f"Detected {message.emotion} state with {message.intensity}% intensity"
                 },
                 "timestamp": datetime.now().isoformat()
             }
-            
-            # Broadcast to all connected clients
-            await manager.broadcast_to_channel(response, "emotions")
-            
+
+            # Deliver to that user's subscribers; an anonymous update goes back to its sender only
+            if user_id:
+                manager.publish(response, "emotions", user_id)
+            else:
+                manager.send_to(response, websocket, "emotions")
+
     except WebSocketDisconnect:
         manager.disconnect(websocket, "emotions")
 
@@ -128,8 +497,11 @@ async def websocket_dna_engine(websocket: WebSocket):
     await manager.connect(websocket, "dna_engine")
     try:
         while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            try:
+                await receive_message(websocket, DnaCommand)
+            except ValueError as error:
+                manager.send_to(invalid_message(error), websocket, "dna_engine")
+                continue
             
             # Process DNA engine commands
             response = {
@@ -149,63 +521,87 @@ async def websocket_dna_engine(websocket: WebSocket):
     except WebSocketDisconnect:
         manager.disconnect(websocket, "dna_engine")
 
-@app.websocket("/ws/neural")
-async def websocket_neural(websocket: WebSocket):
-    await manager.connect(websocket, "neural")
+def neural_frame() -> dict:
+    return {
+        "type": "neural_data",
+        "data": {
+            "heart_rate": 72 + (hash(str(datetime.now())) % 20),
+            "brain_activity": 85 + (hash(str(datetime.now())) % 15),
+            "stress_level": 23 + (hash(str(datetime.now())) % 30),
+            "energy_level": 78 + (hash(str(datetime.now())) % 20),
+            "neural_coherence": 82 + (hash(str(datetime.now())) % 15),
+            "wave_patterns": {
+                "alpha": 8.5 + (hash(str(datetime.now())) % 3),
+                "beta": 15.2 + (hash(str(datetime.now())) % 5),
+                "gamma": 35.8 + (hash(str(datetime.now())) % 10),
+                "theta": 6.1 + (hash(str(datetime.now())) % 2)
+            }
+        },
+        "timestamp": datetime.now().isoformat()
+    }
+
+def sync_frame() -> dict:
+    return {
+        "type": "sync_update",
+        "data": {
+            "sync_percentage": 94 + (hash(str(datetime.now())) % 6),
+            "consciousness_alignment": 87 + (hash(str(datetime.now())) % 10),
+            "memory_bridge_active": True,
+            "cross_device_recognition": True,
+            "human_ai_connection": {
+                "human_status": "connected",
+                "ai_status": "connected",
+                "data_flow_rate": 85 + (hash(str(datetime.now())) % 15)
+            }
+        },
+        "timestamp": datetime.now().isoformat()
+    }
+
+# One producer per periodic channel, however many clients subscribe
+manager.add_producer("neural", 2.0, neural_frame)  # Send updates every 2 seconds
+manager.add_producer("sync", 5.0, sync_frame)  # Send updates every 5 seconds
+
+@app.on_event("shutdown")
+async def stop_producers():
+    for producer in manager.producers.values():
+        producer.stop()
+
+@app.on_event("startup")
+async def start_backplane():
+    if WS_BACKPLANE == "local":
+        manager.backplane = UnixSocketBackplane(WS_BACKPLANE_PATH)
+    elif WS_BACKPLANE == "redis":
+        manager.backplane = RedisBackplane(REDIS_URL)
+    if manager.backplane is not None:
+        await manager.backplane.start(manager.deliver_remote)
+
+@app.on_event("shutdown")
+async def stop_backplane():
+    if manager.backplane is not None:
+        await manager.backplane.stop()
+        manager.backplane = None
+
+async def subscribe_until_disconnect(websocket: WebSocket, channel: str):
+    await manager.connect(websocket, channel)
     try:
-        # Send periodic neural data updates
         while True:
-            response = {
-                "type": "neural_data",
-                "data": {
-                    "heart_rate": 72 + (hash(str(datetime.now())) % 20),
-                    "brain_activity": 85 + (hash(str(datetime.now())) % 15),
-                    "stress_level": 23 + (hash(str(datetime.now())) % 30),
-                    "energy_level": 78 + (hash(str(datetime.now())) % 20),
-                    "neural_coherence": 82 + (hash(str(datetime.now())) % 15),
-                    "wave_patterns": {
-                        "alpha": 8.5 + (hash(str(datetime.now())) % 3),
-                        "beta": 15.2 + (hash(str(datetime.now())) % 5),
-                        "gamma": 35.8 + (hash(str(datetime.now())) % 10),
-                        "theta": 6.1 + (hash(str(datetime.now())) % 2)
-                    }
-                },
-                "timestamp": datetime.now().isoformat()
-            }
-            
-            await manager.broadcast_to_channel(response, "neural")
-            await asyncio.sleep(2)  # Send updates every 2 seconds
-            
+            await receive_data(websocket)  # Frames come from the channel's producer; inbound ones are ignored
     except WebSocketDisconnect:
-        manager.disconnect(websocket, "neural")
+        manager.disconnect(websocket, channel)
+
+@app.websocket("/ws/neural")
+async def websocket_neural(websocket: WebSocket):
+    await subscribe_until_disconnect(websocket, "neural")
 
 @app.websocket("/ws/sync")
 async def websocket_sync(websocket: WebSocket):
-    await manager.connect(websocket, "sync")
-    try:
-        while True:
-            # Send sync status updates
-            response = {
-                "type": "sync_update",
-                "data": {
-                    "sync_percentage": 94 + (hash(str(datetime.now())) % 6),
-                    "consciousness_alignment": 87 + (hash(str(datetime.now())) % 10),
-                    "memory_bridge_active": True,
-                    "cross_device_recognition": True,
-                    "human_ai_connection": {
-                        "human_status": "connected",
-                        "ai_status": "connected",
-                        "data_flow_rate": 85 + (hash(str(datetime.now())) % 15)
-                    }
-                },
-                "timestamp": datetime.now().isoformat()
-            }
-            
-            await manager.broadcast_to_channel(response, "sync")
-            await asyncio.sleep(5)  # Send updates every 5 seconds
-            
-    except WebSocketDisconnect:
-        manager.disconnect(websocket, "sync")
+    await subscribe_until_disconnect(websocket, "sync")
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    if not METRICS_ENABLED:
+        return PlainTextResponse("metrics are disabled\n", status_code=404)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 # API Routes (placeholder implementations)
 @app.get("/api/v1/emotions")
@@ -230,13 +626,13 @@ async def get_emotions():
     }
 
 @app.post("/api/v1/emotions")
-async def create_emotion(emotion_data: dict):
+async def create_emotion(emotion_data: EmotionCreate):
     return {
         "id": str(hash(str(datetime.now()))),
-        "emotion": emotion_data.get("emotion"),
-        "intensity": emotion_data.get("intensity"),
+        "emotion": emotion_data.emotion,
+        "intensity": emotion_data.intensity,
         "timestamp": datetime.now().isoformat(),
-        "note": emotion_data.get("note")
+        "note": emotion_data.note
     }
 
 @app.get("/api/v1/dna-engine/status")
@@ -0,0 +1,28 @@
+"""
+Inbound message schemas.
+
+WebSocket messages are decoded through TypeAdapters, whose validators are compiled
+once at import: JSON text is parsed and validated in one pass by validate_json,
+msgpack frames are unpacked and then checked by validate_python.
+"""
+
+from typing import Any, Dict, Literal, Optional, Union
+
+from pydantic import BaseModel, TypeAdapter
+
+
+class EmotionUpdate(BaseModel):
+    action: Literal["update"] = "update"
+    emotion: str = "calm"
+    intensity: Union[int, float] = 50
+
+
+class EmotionCreate(BaseModel):
+    emotion: Optional[str] = None
+    intensity: Optional[Union[int, float]] = None
+    note: Optional[str] = None
+
+
+# Always about the connection's own user; a user_id field in the message is ignored
+EmotionsMessage = TypeAdapter(EmotionUpdate)
+DnaCommand = TypeAdapter(Dict[str, Any])
@@ -0,0 +1,98 @@
+"""
+Wire formats for HTTP responses and WebSocket frames.
+
+orjson and msgpack are optional: without orjson everything falls back to the json
+module, and without msgpack clients are only offered JSON. A WebSocket client asks
+for binary msgpack frames by offering the "msgpack" subprotocol:
+
+    new WebSocket("ws://localhost:8000/ws/emotions?user_id=u1", ["msgpack"])
+
+Outbound messages are wrapped in a Frame, which encodes each format at most once
+however many clients receive it.
+"""
+
+import json
+from typing import Any, Optional, Sequence, Union
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Preferred first; JSON text is also what clients get when they offer no subprotocol
+SUBPROTOCOLS = ("msgpack", "json") if msgpack is not None else ("json",)
+
+
+if orjson is not None:
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    def dumps_text(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+    loads = orjson.loads
+else:
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    def dumps_text(obj: Any) -> str:
+        return json.dumps(obj, separators=(",", ":"))
+
+    loads = json.loads
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def negotiate_subprotocol(offered: Sequence[str]) -> Optional[str]:
+    """The subprotocol to accept from those a client offered, or None to speak plain JSON text."""
+    for subprotocol in SUBPROTOCOLS:
+        if subprotocol in offered:
+            return subprotocol
+    return None
+
+
+def unpack(data: bytes) -> Any:
+    if msgpack is None:
+        raise ValueError("binary frames need the msgpack package")
+    return msgpack.unpackb(data)
+
+
+class Frame:
+    """One outbound message, serialized at most once per wire format."""
+
+    __slots__ = ("key", "_message", "_text", "_packed")
+
+    def __init__(self, message: Optional[dict] = None, key: Optional[str] = None, text: Optional[str] = None):
+        """Build from ``message``, or from ``text`` already serialized elsewhere (another worker)."""
+        self.key = key
+        self._message = message
+        self._text = text
+        self._packed: Optional[bytes] = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = dumps_text(self._message)
+        return self._text
+
+    @property
+    def packed(self) -> bytes:
+        if self._packed is None:
+            message = self._message if self._message is not None else loads(self._text)
+            self._packed = msgpack.packb(message)
+        return self._packed
+
+    def encoded(self, binary: bool) -> Union[str, bytes]:
+        return self.packed if binary else self.text
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The tests import the app package the way uvicorn does when run from backend/
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
@@ -0,0 +1,100 @@
+import asyncio
+import os
+import socket
+import tempfile
+
+import pytest
+
+from app.backplane import UnixSocketBackplane
+from app.main import ConnectionManager
+from test_connection_manager import FakeWebSocket, numbers, settle, update
+
+
+async def until(condition, timeout=2.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "timed out"
+        await asyncio.sleep(0.001)
+
+
+def test_batches_reach_every_other_worker_but_not_the_sender():
+    async def main():
+        with tempfile.TemporaryDirectory() as path:  # Created with mode 0700
+            received = {"first": [], "second": []}
+            first, second = UnixSocketBackplane(path), UnixSocketBackplane(path)
+            await first.start(received["first"].extend)
+            await second.start(received["second"].extend)
+            first.publish("dna_engine", None, "dna_update", '{"n":1}')
+            first.publish("emotions", "alice", "emotional_update:alice", '{"n":2}')
+            await until(lambda: len(received["second"]) == 2)
+            assert received["second"] == [
+                ["dna_engine", None, "dna_update", '{"n":1}'],
+                ["emotions", "alice", "emotional_update:alice", '{"n":2}'],
+            ]
+            assert received["first"] == []
+            assert (first.published, second.delivered, first.dropped) == (2, 2, 0)
+            await first.stop()
+            await second.stop()
+            assert os.listdir(path) == []
+
+    asyncio.run(main())
+
+
+def test_sockets_of_exited_workers_are_pruned():
+    async def main():
+        with tempfile.TemporaryDirectory() as path:
+            stale = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            stale.bind(os.path.join(path, "gone.sock"))
+            stale.close()  # Left behind, as by a worker that crashed
+            backplane = UnixSocketBackplane(path)
+            await backplane.start(lambda envelopes: None)
+            backplane.publish("dna_engine", None, None, "{}")
+            backplane.flush()
+            assert os.listdir(path) == [f"{backplane.worker_id}.sock"]
+            await backplane.stop()
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("layout", ["world_writable", "symlink"])
+def test_refuses_a_directory_others_could_write_to(layout):
+    async def main():
+        with tempfile.TemporaryDirectory() as parent:
+            path = os.path.join(parent, "backplane")
+            if layout == "world_writable":
+                os.mkdir(path)
+                os.chmod(path, 0o777)
+            else:
+                os.mkdir(os.path.join(parent, "target"), 0o700)
+                os.symlink(os.path.join(parent, "target"), path)
+            with pytest.raises(PermissionError):
+                await UnixSocketBackplane(path).start(lambda envelopes: None)
+
+    asyncio.run(main())
+
+
+def test_broadcasts_and_topics_cross_workers():
+    async def main():
+        with tempfile.TemporaryDirectory() as path:
+            workers = [ConnectionManager(), ConnectionManager()]
+            for manager in workers:
+                manager.backplane = UnixSocketBackplane(path)
+                await manager.backplane.start(manager.deliver_remote)
+            local, remote, alice, bob = FakeWebSocket(), FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+            await workers[0].connect(local, "dna_engine")
+            await workers[1].connect(remote, "dna_engine")
+            for websocket, user_id in ((alice, "alice"), (bob, "bob")):
+                await workers[1].connect(websocket, "emotions")
+                workers[1].subscribe(websocket, "emotions", user_id)
+            await workers[0].broadcast_to_channel(update(1), "dna_engine")
+            workers[0].publish(update(2, "emotional_update"), "emotions", "alice")
+            await until(lambda: remote.sent and alice.sent)
+            await settle()
+            assert numbers(local) == numbers(remote) == [1]
+            assert remote.sent == local.sent  # The text serialized on the first worker, as is
+            assert numbers(alice) == [2] and bob.sent == []
+            for manager in workers:
+                await manager.backplane.stop()
+
+    asyncio.run(main())
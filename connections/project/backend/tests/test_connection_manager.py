@@ -0,0 +1,209 @@
+import asyncio
+
+import pytest
+
+from app import wire
+from app.main import ConnectionManager
+
+
+class FakeWebSocket:
+    """Records the frames sent to it; while stalled, a send waits until ``resume()``."""
+
+    def __init__(self, subprotocols=()):
+        self.scope = {"subprotocols": list(subprotocols)}
+        self.accepted = None
+        self.sent = []
+        self.closed_with = None
+        self.broken = False
+        self._open = asyncio.Event()
+        self._open.set()
+
+    async def accept(self, subprotocol=None):
+        self.accepted = subprotocol
+
+    async def send_text(self, data):
+        await self._open.wait()
+        if self.broken:
+            raise RuntimeError("connection lost")
+        self.sent.append(data)
+
+    send_bytes = send_text
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+    def stall(self):
+        self._open.clear()
+
+    def resume(self):
+        self._open.set()
+
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def update(number, kind="dna_update"):
+    return {"type": kind, "number": number}
+
+
+def numbers(websocket):
+    return [wire.loads(data)["number"] for data in websocket.sent]
+
+
+def test_broadcast_serializes_once_for_every_client(monkeypatch):
+    calls = []
+    dumps_text = wire.dumps_text
+
+    def counting_dumps_text(message):
+        calls.append(message)
+        return dumps_text(message)
+
+    async def main():
+        manager = ConnectionManager()
+        websockets = [FakeWebSocket() for _ in range(5)]
+        for websocket in websockets:
+            await manager.connect(websocket, "dna_engine")
+        monkeypatch.setattr(wire, "dumps_text", counting_dumps_text)
+        await manager.broadcast_to_channel(update(1), "dna_engine")
+        await settle()
+        assert len(calls) == 1
+        assert all(websocket.sent == websockets[0].sent for websocket in websockets)
+        assert numbers(websockets[0]) == [1]
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("policy, kinds, expected", [
+    ("drop_oldest", ["a", "b", "b"], [1, 3, 4]),
+    ("coalesce", ["a", "b", "b"], [1, 2, 4]),  # Replaces the queued frame of its type
+    ("coalesce", ["a", "b", "c"], [1, 3, 4]),  # No frame of its type queued: drops the oldest
+    ("coalesce", [None, None, None], [1, 3, 4]),
+])
+def test_a_full_queue_applies_the_slow_consumer_policy(policy, kinds, expected):
+    async def main():
+        manager = ConnectionManager(max_queue=2, policy=policy)
+        slow, fast = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(slow, "dna_engine")
+        await manager.connect(fast, "dna_engine")
+        slow.stall()
+        for number, kind in enumerate(["x"] + kinds, 1):
+            await manager.broadcast_to_channel(update(number, kind), "dna_engine")
+            await settle()  # The slow client's sender holds frame 1 from here on
+        assert len(manager.active_connections["dna_engine"][slow].queue) == 2
+        slow.resume()
+        await settle()
+        assert numbers(slow) == expected
+        assert numbers(fast) == [1, 2, 3, 4]  # Never held back by its slow neighbour
+        assert manager.dropped_frames["dna_engine"] == 1
+
+    asyncio.run(main())
+
+
+def test_disconnect_policy_closes_only_the_slow_client():
+    async def main():
+        manager = ConnectionManager(max_queue=1, policy="disconnect")
+        slow, fast = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(slow, "dna_engine")
+        await manager.connect(fast, "dna_engine")
+        slow.stall()
+        for number in range(1, 4):
+            await manager.broadcast_to_channel(update(number), "dna_engine")
+            await settle()
+        assert slow.closed_with == 1013
+        assert list(manager.active_connections["dna_engine"]) == [fast]
+        assert numbers(fast) == [1, 2, 3]
+
+    asyncio.run(main())
+
+
+def test_a_failed_send_unregisters_the_client():
+    async def main():
+        manager = ConnectionManager()
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, "dna_engine")
+        websocket.broken = True
+        await manager.broadcast_to_channel(update(1), "dna_engine")
+        await settle()
+        assert not manager.active_connections["dna_engine"]
+        await manager.broadcast_to_channel(update(2), "dna_engine")  # Nothing left to queue for
+
+    asyncio.run(main())
+
+
+def test_one_producer_runs_while_the_channel_has_subscribers():
+    builds = []
+
+    def build():
+        builds.append(None)
+        return update(len(builds), "neural_data")
+
+    async def main():
+        manager = ConnectionManager()
+        manager.add_producer("neural", 3600, build)
+        producer = manager.producers["neural"]
+        first, second = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(first, "neural")
+        await settle()
+        task = producer._task
+        await manager.connect(second, "neural")  # Gets the latest frame at once, without a second build
+        await settle()
+        assert producer._task is task and len(builds) == 1
+        assert numbers(first) == numbers(second) == [1]
+        manager.disconnect(first, "neural")
+        assert producer._task is task
+        manager.disconnect(second, "neural")
+        assert producer._task is None
+        await settle()
+        assert task.cancelled()
+        late = FakeWebSocket()
+        await manager.connect(late, "neural")
+        await settle()
+        assert numbers(late) == [1, 2] and len(builds) == 2  # The last frame, then a fresh one
+        manager.disconnect(late, "neural")
+
+    asyncio.run(main())
+
+
+def test_a_failing_build_keeps_the_producer_running():
+    builds = []
+
+    def build():
+        builds.append(None)
+        if len(builds) == 1:
+            raise RuntimeError("sensor offline")
+        return update(len(builds), "sync_update")
+
+    async def main():
+        manager = ConnectionManager()
+        manager.add_producer("sync", 0.001, build)
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, "sync")
+        while len(websocket.sent) < 2:
+            await asyncio.sleep(0.001)
+        manager.disconnect(websocket, "sync")
+        assert numbers(websocket)[:2] == [2, 3]
+
+    asyncio.run(main())
+
+
+def test_publish_reaches_only_the_topics_subscribers():
+    async def main():
+        manager = ConnectionManager()
+        alice, alice_phone, bob = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        for websocket, user_id in ((alice, "alice"), (alice_phone, "alice"), (bob, "bob")):
+            await manager.connect(websocket, "emotions")
+            manager.subscribe(websocket, "emotions", user_id)
+        manager.publish(update(1, "emotional_update"), "emotions", "alice")
+        manager.publish(update(2, "emotional_update"), "emotions", "carol")  # No subscribers
+        await settle()
+        assert numbers(alice) == numbers(alice_phone) == [1]
+        assert bob.sent == []
+        manager.disconnect(alice, "emotions")
+        manager.disconnect(alice_phone, "emotions")
+        assert list(manager.subscriptions) == [("emotions", "bob")]
+        manager.subscribe(alice, "emotions", "bob")  # Closed connections cannot come back
+        assert list(manager.subscriptions[("emotions", "bob")]) == [bob]
+
+    asyncio.run(main())
@@ -0,0 +1,49 @@
+import msgpack
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_emotional_updates_go_to_the_connections_own_user_only():
+    with client.websocket_connect("/ws/emotions?user_id=alice") as alice, \
+            client.websocket_connect("/ws/emotions?user_id=alice") as alice_phone, \
+            client.websocket_connect("/ws/emotions?user_id=bob") as bob, \
+            client.websocket_connect("/ws/emotions") as anonymous:
+        # A user_id in the message cannot redirect it to another user's topic
+        alice.send_json({"action": "update", "emotion": "joy", "intensity": 80, "user_id": "bob"})
+        for websocket in (alice, alice_phone):
+            message = websocket.receive_json()
+            assert (message["user_id"], message["data"]["emotion"]) == ("alice", "joy")
+        anonymous.send_json({"emotion": "calm"})
+        assert anonymous.receive_json()["user_id"] is None
+        # Anything queued for bob from alice or the anonymous client would arrive before his own update
+        bob.send_json({"emotion": "grief", "intensity": 40})
+        message = bob.receive_json()
+        assert (message["user_id"], message["data"]["emotion"]) == ("bob", "grief")
+
+
+def test_invalid_emotional_update_is_answered_with_an_error():
+    with client.websocket_connect("/ws/emotions?user_id=alice") as websocket:
+        websocket.send_json({"action": "delete"})
+        message = websocket.receive_json()
+        assert message["type"] == "error" and message["detail"].startswith("invalid message: action")
+        websocket.send_text("{not json")
+        assert websocket.receive_json()["type"] == "error"
+
+
+def test_msgpack_clients_send_and_receive_binary_frames():
+    with client.websocket_connect("/ws/emotions?user_id=alice", subprotocols=["msgpack"]) as websocket:
+        assert websocket.accepted_subprotocol == "msgpack"
+        websocket.send_bytes(msgpack.packb({"emotion": "joy", "intensity": 70}))
+        message = msgpack.unpackb(websocket.receive_bytes())
+        assert (message["type"], message["data"]["intensity"]) == ("emotional_update", 70)
+        websocket.send_bytes(msgpack.packb({"intensity": "very"}))
+        assert msgpack.unpackb(websocket.receive_bytes())["type"] == "error"
+
+
+def test_http_responses_are_json():
+    response = client.get("/api/v1/dna-engine/status")
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["evolution_metrics"]["consciousness_alignment"] == 94
@@ -0,0 +1,43 @@
+import asyncio
+
+import msgpack
+
+from app import wire
+from app.main import ConnectionManager
+from app.wire import FastJSONResponse, Frame, negotiate_subprotocol
+from test_connection_manager import FakeWebSocket, settle, update
+
+
+def test_frame_encodes_each_format_once():
+    message = {"type": "dna_update", "data": {1: "one"}}
+    frame = Frame(message, "dna_update")
+    assert frame.encoded(False) is frame.text == '{"type":"dna_update","data":{"1":"one"}}'
+    assert frame.encoded(True) is frame.packed
+    assert msgpack.unpackb(frame.packed, strict_map_key=False) == message
+    relayed = Frame(key="dna_update", text=frame.text)  # As delivered from another worker
+    assert msgpack.unpackb(relayed.packed) == wire.loads(frame.text)
+
+
+def test_subprotocol_negotiation_prefers_msgpack():
+    assert negotiate_subprotocol(["json", "msgpack"]) == "msgpack"
+    assert negotiate_subprotocol(["json"]) == "json"
+    assert negotiate_subprotocol(["graphql-ws"]) is None
+    assert negotiate_subprotocol([]) is None
+
+
+def test_clients_get_the_format_they_negotiated():
+    async def main():
+        manager = ConnectionManager()
+        binary, text = FakeWebSocket(["msgpack"]), FakeWebSocket()
+        await manager.connect(binary, "dna_engine")
+        await manager.connect(text, "dna_engine")
+        await manager.broadcast_to_channel(update(1), "dna_engine")
+        await settle()
+        assert (binary.accepted, text.accepted) == ("msgpack", None)
+        assert msgpack.unpackb(binary.sent[0]) == wire.loads(text.sent[0]) == update(1)
+
+    asyncio.run(main())
+
+
+def test_json_responses_render_non_string_keys():
+    assert FastJSONResponse({"counts": {3: 1}}).body == b'{"counts":{"3":1}}'
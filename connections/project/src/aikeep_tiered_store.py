@@ -0,0 +1,340 @@
+"""
+Tiered AiKeep™ store: bounded RAM for long-term deep memory.
+
+A drop-in replacement for ``EmotionalMemoryLayer.aikeep_store`` (a
+``defaultdict(list)`` that never forgets). Each user keeps a small hot tail of
+recent events in RAM; older events spill to append-only segment files on disk.
+
+* The active segment is appended to and indexed in RAM (bounded by its size).
+* Once it reaches ``segment_bytes`` it is sealed: a sidecar ``.idx`` file with
+  (user hash, offset) pairs sorted by hash is written, and both files are
+  memory-mapped from then on.
+* Reads are lazy: a user's history is streamed segment by segment through a
+  binary search of each index, then the active segment, then the hot tail.
+* Compaction merges every sealed segment into one, grouping each user's
+  records together, either on demand or from a background thread.
+
+    store = TieredAiKeepStore("/var/lib/genesis/aikeep")
+    eml = EmotionalMemoryLayer(aikeep_store=store)
+
+User ids must be JSON-serializable scalars (str or int).
+"""
+
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+
+_LENGTH = struct.Struct("<I")
+_INDEX_ENTRY = struct.Struct("=QQ")  # (user hash, record offset), read back through memoryview.cast("Q")
+
+
+def _user_key(user_id):
+    digest = hashlib.blake2b(json.dumps(user_id).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _encode(user_id, event):
+    payload = json.dumps(
+        [user_id, event['timestamp'], event['emotion'], event['context'], event['intensity']],
+        separators=(",", ":"),
+    ).encode("utf-8")
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def _decode(payload):
+    user_id, timestamp, emotion, context, intensity = json.loads(payload)
+    return user_id, {'timestamp': timestamp, 'emotion': emotion, 'context': context, 'intensity': intensity}
+
+
+class _Segment:
+    """A sealed segment: immutable record file plus its sorted index, both memory-mapped."""
+
+    def __init__(self, directory, first, last):
+        self.first, self.last = first, last
+        self.name = f"{first:010d}-{last:010d}"
+        with open(os.path.join(directory, self.name + ".seg"), "rb") as records:
+            self._records = mmap.mmap(records.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(os.path.join(directory, self.name + ".idx"), "rb") as index:
+            self._index = mmap.mmap(index.fileno(), 0, access=mmap.ACCESS_READ)
+        entries = memoryview(self._index).cast("Q")
+        self._keys, self._offsets = entries[0::2], entries[1::2]
+
+    def _range(self, key):
+        return bisect_left(self._keys, key), bisect_right(self._keys, key)
+
+    def count(self, key):
+        low, high = self._range(key)
+        return high - low
+
+    def read(self, key):
+        low, high = self._range(key)
+        for position in range(low, high):
+            yield self.raw(self._offsets[position])[_LENGTH.size:]
+
+    def raw(self, offset):
+        (length,) = _LENGTH.unpack_from(self._records, offset)
+        return self._records[offset:offset + _LENGTH.size + length]
+
+    def entries(self, rank):
+        """(key, rank, offset, segment) for every record, in index order; input for a k-way merge."""
+        for key, offset in zip(self._keys, self._offsets):
+            yield key, rank, offset, self
+
+
+class _ActiveSegment:
+    """The segment currently appended to; its index lives in RAM until it is sealed."""
+
+    def __init__(self, directory, segment_id):
+        self.first = self.last = segment_id
+        self.name = f"{segment_id:010d}-{segment_id:010d}"
+        self.path = os.path.join(directory, self.name + ".seg")
+        self.index = {}  # user hash -> array of record offsets
+        self.size = self._recover() if os.path.exists(self.path) else 0
+        self._writer = open(self.path, "ab")
+        self._reader = open(self.path, "rb")
+
+    def _recover(self):
+        """Rebuild the in-RAM index after a restart, dropping a torn trailing record."""
+        offset = 0
+        with open(self.path, "r+b") as records:
+            data = records.read()
+            while offset + _LENGTH.size <= len(data):
+                (length,) = _LENGTH.unpack_from(data, offset)
+                end = offset + _LENGTH.size + length
+                if end > len(data):
+                    break
+                user_id, _ = _decode(data[offset + _LENGTH.size:end])
+                self.index.setdefault(_user_key(user_id), array("Q")).append(offset)
+                offset = end
+            records.truncate(offset)
+        return offset
+
+    def append(self, key, record):
+        self._writer.write(record)
+        self.index.setdefault(key, array("Q")).append(self.size)
+        self.size += len(record)
+
+    def count(self, key):
+        offsets = self.index.get(key)
+        return len(offsets) if offsets else 0
+
+    def offsets(self, key):
+        """Offsets of ``key``'s records, written through to the file; call under the store lock, before any seal."""
+        offsets = self.index.get(key)
+        if not offsets:
+            return ()
+        self._writer.flush()
+        return offsets[:]
+
+    def read(self, offsets):
+        """Records at ``offsets`` (from ``offsets()``); still readable once the segment is sealed."""
+        for offset in offsets:
+            (length,) = _LENGTH.unpack(os.pread(self._reader.fileno(), _LENGTH.size, offset))
+            yield os.pread(self._reader.fileno(), length, offset + _LENGTH.size)
+
+    def seal(self, directory):
+        """Write the sorted sidecar index whose presence marks the segment as sealed."""
+        self._writer.flush()
+        os.fsync(self._writer.fileno())
+        index_path = os.path.join(directory, self.name + ".idx")
+        with open(index_path + ".tmp", "wb") as index:
+            for key in sorted(self.index):
+                for offset in self.index[key]:
+                    index.write(_INDEX_ENTRY.pack(key, offset))
+            index.flush()
+            os.fsync(index.fileno())
+        os.replace(index_path + ".tmp", index_path)
+        # The reader stays open for iterators still walking this segment
+        self._writer.close()
+
+    def close(self):
+        self._writer.close()
+        self._reader.close()
+
+
+class AiKeepHistory:
+    """Lazy view of one user's AiKeep events, oldest first; appendable like the list it replaces."""
+
+    __slots__ = ("_store", "_user_id")
+
+    def __init__(self, store, user_id):
+        self._store = store
+        self._user_id = user_id
+
+    def append(self, event):
+        self._store.append(self._user_id, event)
+
+    def __iter__(self):
+        return self._store.iter_events(self._user_id)
+
+    def __len__(self):
+        return self._store.count(self._user_id)
+
+
+class TieredAiKeepStore:
+    def __init__(self, directory, hot_events_per_user=16, segment_bytes=64 << 20):
+        self.directory = directory
+        self.hot_events_per_user = hot_events_per_user
+        self.segment_bytes = segment_bytes
+        self._hot = {}  # user_id -> newest events, oldest first
+        self._lock = threading.Lock()  # guards the segment list and active segment against compaction and sealing
+        self._compaction_lock = threading.Lock()
+        self._compactor = None
+        self._stop_compaction = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+        self._segments, self._active = self._load()
+
+    def _load(self):
+        names = os.listdir(self.directory)
+        for name in names:
+            if name.endswith(".tmp"):
+                os.remove(os.path.join(self.directory, name))
+        ranges = sorted(
+            (tuple(int(part) for part in name[:-4].split("-")) for name in names if name.endswith(".seg")),
+            key=lambda bounds: (bounds[0], -bounds[1]),
+        )
+        sealed, unsealed, covered = [], [], -1
+        for first, last in ranges:
+            name = f"{first:010d}-{last:010d}"
+            if last <= covered:
+                # Left behind by a compaction that stopped before deleting its inputs
+                os.remove(os.path.join(self.directory, name + ".seg"))
+                if f"{name}.idx" in names:
+                    os.remove(os.path.join(self.directory, name + ".idx"))
+                continue
+            covered = last
+            if f"{name}.idx" in names:
+                sealed.append(_Segment(self.directory, first, last))
+            else:
+                unsealed.append(first)
+        next_id = max((last for _, last in ranges), default=0) + 1
+        return sealed, _ActiveSegment(self.directory, unsealed[-1] if unsealed else next_id)
+
+    def __getitem__(self, user_id):
+        return AiKeepHistory(self, user_id)
+
+    def append(self, user_id, event):
+        hot = self._hot.get(user_id)
+        if hot is None:
+            hot = self._hot[user_id] = []
+        hot.append(event)
+        if len(hot) > self.hot_events_per_user:
+            self._spill(user_id, hot.pop(0))
+
+    def _spill(self, user_id, event):
+        self._active.append(_user_key(user_id), _encode(user_id, event))
+        if self._active.size >= self.segment_bytes:
+            self._seal()
+
+    def _seal(self):
+        # Under the lock, so a reader never flushes the writer that seal() closes
+        with self._lock:
+            active = self._active
+            active.seal(self.directory)
+            self._segments.append(_Segment(self.directory, active.first, active.last))
+            self._active = _ActiveSegment(self.directory, active.last + 1)
+
+    def count(self, user_id):
+        key = _user_key(user_id)
+        with self._lock:
+            segments, active = list(self._segments), self._active
+        return (
+            sum(segment.count(key) for segment in segments)
+            + active.count(key)
+            + len(self._hot.get(user_id, ()))
+        )
+
+    def iter_events(self, user_id):
+        """Stream one user's events, oldest first, without loading their history into RAM.
+
+        The segments to read are fixed when this is called; events spilled afterwards are not included.
+        """
+        key = _user_key(user_id)
+        with self._lock:
+            segments, active = list(self._segments), self._active
+            active_offsets = active.offsets(key)
+            hot = list(self._hot.get(user_id, ()))
+        return self._iter_events(user_id, key, segments, active, active_offsets, hot)
+
+    def _iter_events(self, user_id, key, segments, active, active_offsets, hot):
+        for payloads in [segment.read(key) for segment in segments] + [active.read(active_offsets)]:
+            for payload in payloads:
+                stored_user_id, event = _decode(payload)
+                if stored_user_id == user_id:  # Skip the rare 64-bit hash collision
+                    yield event
+        yield from hot
+
+    def flush(self):
+        """Hand buffered segment writes to the OS."""
+        self._active._writer.flush()
+
+    def close(self):
+        """Spill every hot tail to disk and close; the store can be reopened from its directory."""
+        self.stop_background_compaction()
+        for user_id, hot in self._hot.items():
+            for event in hot:
+                self._spill(user_id, event)
+        self._hot.clear()
+        self._active._writer.flush()
+        os.fsync(self._active._writer.fileno())
+        self._active.close()
+
+    def compact(self):
+        """Merge all sealed segments into one, grouping each user's records; returns False if there was nothing to do."""
+        with self._compaction_lock:
+            with self._lock:
+                merged = list(self._segments)
+            if len(merged) < 2:
+                return False
+            name = f"{merged[0].first:010d}-{merged[-1].last:010d}"
+            records_path = os.path.join(self.directory, name + ".seg")
+            index_path = os.path.join(self.directory, name + ".idx")
+            with open(records_path + ".tmp", "wb") as records, open(index_path + ".tmp", "wb") as index:
+                offset = 0
+                # Index order is (hash, segment rank, offset), so each user's records stay chronological
+                for key, _, position, segment in heapq.merge(*(s.entries(rank) for rank, s in enumerate(merged))):
+                    record = segment.raw(position)
+                    records.write(record)
+                    index.write(_INDEX_ENTRY.pack(key, offset))
+                    offset += len(record)
+                for output in (records, index):
+                    output.flush()
+                    os.fsync(output.fileno())
+            # The index goes first: a .seg without its .idx would be mistaken for an active segment
+            os.replace(index_path + ".tmp", index_path)
+            os.replace(records_path + ".tmp", records_path)
+            compacted = _Segment(self.directory, merged[0].first, merged[-1].last)
+            with self._lock:
+                self._segments[:len(merged)] = [compacted]
+            # Readers holding the old segments keep their mappings; unlinking is safe on POSIX
+            for segment in merged:
+                os.remove(os.path.join(self.directory, segment.name + ".seg"))
+                os.remove(os.path.join(self.directory, segment.name + ".idx"))
+            return True
+
+    def start_background_compaction(self, interval=60.0, min_segments=4):
+        """Compact from a daemon thread whenever at least ``min_segments`` sealed segments exist."""
+        if self._compactor is not None:
+            return
+
+        def run():
+            while not self._stop_compaction.wait(interval):
+                if len(self._segments) >= min_segments:
+                    self.compact()
+
+        self._stop_compaction.clear()
+        self._compactor = threading.Thread(target=run, name="aikeep-compaction", daemon=True)
+        self._compactor.start()
+
+    def stop_background_compaction(self):
+        if self._compactor is None:
+            return
+        self._stop_compaction.set()
+        self._compactor.join()
+        self._compactor = None
@@ -0,0 +1,271 @@
+"""
+Continuum Sync™: delta reconciliation of emotional memory across devices.
+
+Each device wraps its EmotionalMemoryLayer in a ContinuumSyncReplica and records
+through it. Every event is appended to the device's own log under an id
+(device, sequence number) and stamped with a hybrid logical clock (HLC): wall
+clock microseconds, bumped past every timestamp the replica has already seen,
+so an event always sorts after the events its device knew of, however the
+clocks drift.
+
+Replicas find their differences by comparing Merkle trees over the hashes of
+their event ids: a ``fanout``-ary trie of XOR digests ``depth`` levels deep.
+Equal roots end the exchange after one round trip; otherwise only the children
+that differ are expanded, one level per round trip, so d differences among n
+events cost O(log n) round trips and O(d log n) digests. The id lists of the
+differing leaves are then compared and the missing events pulled and pushed.
+
+Merging is a set union keyed by event id, hence commutative, associative and
+idempotent: replicas that have seen the same events hold the same logs, in
+whatever order they synced. A user's memory is the newest
+``max_memory_per_user`` events in (HLC, device, sequence) order. Events that
+land after everything already held are recorded as a bulk batch records them;
+events that land in the middle rebuild the user's memory from the log. AiKeep
+events are kept in the order they arrive.
+
+    phone = ContinuumSyncReplica(EmotionalMemoryLayer(), "phone")
+    laptop = ContinuumSyncReplica(EmotionalMemoryLayer(), "laptop")
+    phone.record_emotional_event("user_001", "grief", "loss of pet", 8)
+    laptop.sync(LocalTransport(phone))  # Both replicas now hold the event
+"""
+
+import datetime
+import hashlib
+import pickle
+import threading
+from collections import defaultdict
+
+from emotional_memory_layer_Version4 import _compact_intensity, _from_epoch_micros, _make_event, _to_epoch_micros
+
+# A record is (hlc micros, device, sequence, user_id, emotion, context, intensity, aikeep);
+# its first three fields are its sort key and the first two after the clock its id.
+
+
+def _event_hash(device, sequence):
+    digest = hashlib.blake2b(f"{device}\x1f{sequence}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class MerkleTrie:
+    """XOR digests of 64-bit event hashes, in a trie keyed by their leading bits."""
+
+    def __init__(self, depth=4, fanout=16):
+        if fanout & (fanout - 1) or fanout < 2:
+            raise ValueError("fanout must be a power of two")
+        self.depth = depth
+        self.fanout = fanout
+        self._bits = fanout.bit_length() - 1
+        self._levels = [{} for _ in range(depth + 1)]  # level -> {prefix: digest}, zero digests left out
+        self._leaves = defaultdict(list)  # leaf prefix -> event ids
+
+    def _prefix(self, event_hash, level):
+        return event_hash >> (64 - self._bits * level)
+
+    def add(self, event_id, event_hash):
+        for level, digests in enumerate(self._levels):
+            prefix = self._prefix(event_hash, level)
+            digest = digests.get(prefix, 0) ^ event_hash
+            if digest:
+                digests[prefix] = digest
+            else:
+                del digests[prefix]
+        self._leaves[self._prefix(event_hash, self.depth)].append(event_id)
+
+    def digests(self, level, parents=None):
+        """{prefix: digest} of the non-empty nodes at ``level``, limited to children of ``parents`` (at level - 1)."""
+        digests = self._levels[level]
+        if parents is None:
+            return dict(digests)
+        fanout = self.fanout
+        children = {}
+        for parent in parents:
+            for child in range(parent * fanout, (parent + 1) * fanout):
+                digest = digests.get(child)
+                if digest is not None:
+                    children[child] = digest
+        return children
+
+    def leaf_ids(self, prefixes):
+        leaves = self._leaves
+        return {prefix: list(leaves.get(prefix, ())) for prefix in prefixes}
+
+
+class ContinuumSyncReplica:
+    # Methods a remote replica may call through a transport
+    RPC_METHODS = frozenset({"describe", "digests", "leaf_ids", "fetch", "merge"})
+
+    def __init__(self, layer, device_id, depth=4, fanout=16):
+        """``layer`` is this device's EmotionalMemoryLayer; record synced users only through the replica."""
+        self.layer = layer
+        self.device_id = device_id
+        self.logs = defaultdict(dict)  # device -> {sequence: record}
+        self.clock = 0  # Highest HLC seen
+        self.last_sync = None
+        self._merkle = MerkleTrie(depth, fanout)
+        self._user_keys = defaultdict(list)  # user_id -> sort keys of the user's records, in order
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return sum(len(log) for log in self.logs.values())
+
+    def _tick(self):
+        self.clock = max(_to_epoch_micros(datetime.datetime.now()), self.clock + 1)
+        return self.clock
+
+    def record_emotional_event(self, user_id, emotion, context, intensity, aikeep=False):
+        """Record a local event in this device's log and in the layer; returns its record."""
+        with self._lock:
+            sequence = len(self.logs[self.device_id]) + 1
+            record = (self._tick(), self.device_id, sequence, user_id, emotion, context, intensity, aikeep)
+            self.merge([record])
+        return record
+
+    def describe(self):
+        """Depth and fanout; replicas can only compare tries of the same shape."""
+        return self._merkle.depth, self._merkle.fanout
+
+    def digests(self, level, parents=None):
+        with self._lock:
+            return self._merkle.digests(level, parents)
+
+    def leaf_ids(self, prefixes):
+        with self._lock:
+            return self._merkle.leaf_ids(prefixes)
+
+    def fetch(self, event_ids):
+        with self._lock:
+            return [self.logs[device][sequence] for device, sequence in event_ids]
+
+    def merge(self, records):
+        """Add records from any replica, ignoring ones already held; returns how many were new."""
+        if self.layer.compact:
+            # Reject the whole batch before any log is touched if an intensity does not fit
+            records = [record[:6] + (_compact_intensity(record[6]),) + record[7:] for record in records]
+        with self._lock:
+            fresh = defaultdict(list)
+            for record in records:
+                hlc, device, sequence, user_id = record[:4]
+                log = self.logs[device]
+                if sequence in log:
+                    continue
+                log[sequence] = record
+                self._merkle.add((device, sequence), _event_hash(device, sequence))
+                self.clock = max(self.clock, hlc)
+                fresh[user_id].append(record)
+            for user_id, user_records in fresh.items():
+                user_records.sort()
+                self._apply(user_id, user_records)
+            return sum(map(len, fresh.values()))
+
+    def _apply(self, user_id, records):
+        """Bring the layer's memory for ``user_id`` in line with its log after ``records`` (sorted) joined it."""
+        layer, keys = self.layer, self._user_keys[user_id]
+        new_keys = [record[:3] for record in records]
+        if not keys or new_keys[0] > keys[-1]:
+            keys.extend(new_keys)
+            rows = [
+                (user_id, emotion, context, intensity, aikeep, _from_epoch_micros(hlc))
+                for hlc, _, _, _, emotion, context, intensity, aikeep in records
+            ]
+            layer._record_user_rows(user_id, rows, None, None)
+            return
+
+        maxlen = layer.max_memory_per_user
+        held = set(keys if maxlen is None else keys[max(0, len(keys) - maxlen):])
+        keys.extend(new_keys)
+        keys.sort()  # Two sorted runs: merged in linear time
+        tail = keys if maxlen is None else keys[max(0, len(keys) - maxlen):]
+        tail_records = [self.logs[device][sequence] for _, device, sequence in tail]
+        layer._replace_memory(
+            user_id,
+            [record[0] for record in tail_records],
+            [(record[4], record[5], record[6]) for record in tail_records],
+        )
+        for record in records:
+            micros, emotion, context, intensity, aikeep = record[0], record[4], record[5], record[6], record[7]
+            for observer in layer._observers:
+                observer.observe(user_id, emotion, context, intensity, micros)
+            if aikeep:
+                layer._keep_event(user_id, _make_event(_from_epoch_micros(micros), emotion, context, intensity))
+        if layer._summaries is not None:
+            # Whatever no longer fits in memory falls out, as it would have in time order
+            kept = set(tail)
+            for key in sorted(held.union(new_keys) - kept):
+                record = self.logs[key[1]][key[2]]
+                layer._absorb(user_id, record[0], record[4], record[5], record[6])
+
+    def handle(self, method, *args):
+        """Serve one call from a remote replica."""
+        if method not in self.RPC_METHODS:
+            raise ValueError(f"unknown sync method {method!r}")
+        return getattr(self, method)(*args)
+
+    def sync(self, remote):
+        """Reconcile with the replica behind ``remote`` (a transport with ``call(method, *args)``) in both directions.
+
+        Returns {"round_trips", "differing_leaves", "pulled", "pushed"}.
+        """
+        stats = {"round_trips": 1, "differing_leaves": 0, "pulled": 0, "pushed": 0}
+        if tuple(remote.call("describe")) != self.describe():
+            raise ValueError("replicas use Merkle tries of different shapes")
+        parents = None
+        for level in range(self._merkle.depth + 1):
+            theirs = remote.call("digests", level, parents)
+            ours = self.digests(level, parents)
+            stats["round_trips"] += 1
+            parents = sorted(prefix for prefix in theirs.keys() | ours.keys() if theirs.get(prefix) != ours.get(prefix))
+            if not parents:
+                self.last_sync = datetime.datetime.now()
+                return stats
+        stats["differing_leaves"] = len(parents)
+        theirs = remote.call("leaf_ids", parents)
+        ours = self.leaf_ids(parents)
+        stats["round_trips"] += 1
+        missing, extra = [], []
+        for prefix in parents:
+            remote_ids, local_ids = set(map(tuple, theirs[prefix])), set(ours[prefix])
+            missing.extend(remote_ids - local_ids)
+            extra.extend(local_ids - remote_ids)
+        if missing:
+            stats["pulled"] = self.merge(remote.call("fetch", missing))
+            stats["round_trips"] += 1
+        if extra:
+            remote.call("merge", self.fetch(extra))
+            stats["pushed"] = len(extra)
+            stats["round_trips"] += 1
+        self.last_sync = datetime.datetime.now()
+        return stats
+
+    def status(self):
+        with self._lock:
+            return {
+                "device_id": self.device_id,
+                "devices": {device: len(log) for device, log in self.logs.items()},
+                "events": len(self),
+                "clock": self.clock,
+                "root_digest": self._merkle.digests(0).get(0, 0),
+                "last_sync": self.last_sync.isoformat() if self.last_sync else None,
+            }
+
+
+class LocalTransport:
+    """In-process stand-in for the link to a remote replica.
+
+    Each call is one round trip; arguments and results are pickled both ways, as a
+    network transport would serialize them, and the bytes are counted.
+    """
+
+    def __init__(self, replica):
+        self.replica = replica
+        self.round_trips = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def call(self, method, *args):
+        request = pickle.dumps((method, args), pickle.HIGHEST_PROTOCOL)
+        self.round_trips += 1
+        self.bytes_sent += len(request)
+        method, args = pickle.loads(request)
+        response = pickle.dumps(self.replica.handle(method, *args), pickle.HIGHEST_PROTOCOL)
+        self.bytes_received += len(response)
+        return pickle.loads(response)
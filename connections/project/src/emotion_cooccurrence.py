@@ -0,0 +1,153 @@
+"""
+Population-wide emotion co-occurrence analytics, maintained as events arrive.
+
+EmotionCooccurrence keeps three sparse tallies over every user's events:
+
+* transitions: emotion -> the same user's next emotion
+* co-occurrence: emotions within ``window`` consecutive events of one user (symmetric)
+* emotion x context bucket: event weight and intensity-weighted sum, for spotting
+  contexts that go with high intensity (contexts are free text, so they are
+  hashed into ``context_buckets`` columns)
+
+Each event costs O(window). With ``half_life`` set, older events fade
+exponentially relative to the newest one. Weights are stored pre-scaled by
+exp(rate * (t - reference)) so nothing is rewritten per event, and rescaled in
+one pass only when the exponent grows large. Matrices are exported as dense
+NumPy arrays or SciPy sparse arrays at any moment.
+
+    analytics = eml.enable_population_analytics(half_life=datetime.timedelta(days=30))
+    emotions, transitions = analytics.transition_matrix(sparse=True)
+"""
+
+import datetime
+import math
+import threading
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed to export the matrices
+    np = None
+
+try:
+    from scipy import sparse as scipy_sparse
+except ImportError:  # SciPy is only needed for sparse=True
+    scipy_sparse = None
+
+_MICROSECOND = datetime.timedelta(microseconds=1)
+_RESCALE_EXPONENT = 60.0  # exp(60) ~ 1e26, well inside float range
+
+
+class EmotionCooccurrence:
+    def __init__(self, window=4, context_buckets=1024, half_life=None):
+        """``half_life`` is a timedelta, or None to weigh every event equally forever."""
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        self.window = window
+        self.context_buckets = context_buckets
+        self.half_life = half_life
+        self._rate = None if half_life is None else math.log(2) / (half_life / _MICROSECOND)
+        self._reference = None  # epoch micros the stored weights are scaled to
+        self._newest = None
+        self.emotions = []  # emotion id -> label
+        self._emotion_ids = {}
+        self._context_examples = {}  # bucket -> first context seen in it
+        self._recent = {}  # user_id -> that user's latest emotion ids, newest last
+        self._transitions = {}  # (from id, to id) -> weight
+        self._cooccurrence = {}  # (lower id, higher id) -> weight
+        self._context_weight = {}  # (emotion id, bucket) -> weight
+        self._context_intensity = {}  # (emotion id, bucket) -> weighted intensity sum
+        self.events = 0
+        self._lock = threading.Lock()
+
+    def context_bucket(self, context):
+        return zlib.crc32(str(context).encode("utf-8")) % self.context_buckets
+
+    def context_examples(self):
+        """{bucket: a context label that hashed to it}, to label emotion x context columns."""
+        with self._lock:
+            return dict(self._context_examples)
+
+    def observe(self, user_id, emotion, context, intensity, micros):
+        """Count one event; ``micros`` is its timestamp in epoch microseconds."""
+        bucket = self.context_bucket(context)
+        with self._lock:
+            weight = self._weight(micros)
+            emotion_id = self._emotion_ids.get(emotion)
+            if emotion_id is None:
+                emotion_id = self._emotion_ids[emotion] = len(self.emotions)
+                self.emotions.append(emotion)
+            recent = self._recent.get(user_id, ())
+            if recent:
+                _add(self._transitions, (recent[-1], emotion_id), weight)
+                for other in recent if self.window > 1 else ():
+                    pair = (other, emotion_id) if other <= emotion_id else (emotion_id, other)
+                    _add(self._cooccurrence, pair, weight)
+            self._recent[user_id] = (recent + (emotion_id,))[-max(1, self.window - 1):]
+            self._context_examples.setdefault(bucket, context)
+            _add(self._context_weight, (emotion_id, bucket), weight)
+            _add(self._context_intensity, (emotion_id, bucket), weight * intensity)
+            self.events += 1
+
+    def _weight(self, micros):
+        if self._newest is None or micros > self._newest:
+            self._newest = micros
+        if self._rate is None:
+            return 1.0
+        if self._reference is None:
+            self._reference = micros
+        exponent = self._rate * (micros - self._reference)
+        if exponent > _RESCALE_EXPONENT:
+            self._rescale(math.exp(-exponent))
+            self._reference, exponent = micros, 0.0
+        return math.exp(exponent)
+
+    def _rescale(self, factor):
+        for tally in (self._transitions, self._cooccurrence, self._context_weight, self._context_intensity):
+            for key in tally:
+                tally[key] *= factor
+
+    def transition_matrix(self, sparse=False):
+        """``(emotions, matrix)`` where ``matrix[i, j]`` weighs emotion i followed by emotion j for the same user."""
+        return self._export(self._transitions, None, sparse)
+
+    def cooccurrence_matrix(self, sparse=False):
+        """``(emotions, matrix)``, symmetric: how often two emotions fall within ``window`` events of one user."""
+        return self._export(self._cooccurrence, None, sparse, symmetric=True)
+
+    def emotion_context_matrix(self, sparse=False, intensity=False):
+        """``(emotions, matrix)`` with one column per context bucket.
+
+        Holds event weights, or intensity-weighted sums with ``intensity=True``; dividing the
+        second by the first gives the mean intensity of each emotion in each bucket.
+        """
+        return self._export(self._context_intensity if intensity else self._context_weight, self.context_buckets, sparse)
+
+    def _export(self, tally, columns, sparse, symmetric=False):
+        if np is None:
+            raise ImportError("EmotionCooccurrence matrices require NumPy")
+        if sparse and scipy_sparse is None:
+            raise ImportError("sparse=True requires SciPy")
+        with self._lock:
+            emotions = list(self.emotions)
+            if self._rate is None or self._reference is None:  # Nothing absorbed yet, nothing to fade
+                scale = 1.0
+            else:
+                scale = math.exp(-self._rate * (self._newest - self._reference))
+            keys = np.array(list(tally), dtype=np.int64).reshape(-1, 2)
+            values = np.fromiter(tally.values(), dtype=np.float64, count=len(tally)) * scale
+        rows, cols = keys[:, 0], keys[:, 1]
+        if symmetric:
+            mirrored = rows != cols
+            rows, cols = np.concatenate([rows, cols[mirrored]]), np.concatenate([cols, rows[mirrored]])
+            values = np.concatenate([values, values[mirrored]])
+        shape = (len(emotions), len(emotions) if columns is None else columns)
+        if sparse:
+            return emotions, scipy_sparse.coo_array((values, (rows, cols)), shape=shape).tocsr()
+        matrix = np.zeros(shape)
+        matrix[rows, cols] = values  # Keys are unique
+        return emotions, matrix
+
+
+def _add(tally, key, weight):
+    tally[key] = tally.get(key, 0.0) + weight
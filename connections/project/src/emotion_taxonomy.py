@@ -0,0 +1,166 @@
+"""
+Emotion taxonomy for the Core Emotion Disambiguator.
+
+Holds a multi-level (and optionally multilingual) tree of emotion labels with a
+precomputed reverse index from every label to its chain of bases, so lookups do
+not walk the tree. Labels that miss the index, such as misspellings ("frustated")
+or free text ("kinda anxious"), go through two fuzzy indexes: a symmetric-delete
+index that finds labels one edit away with a handful of dict lookups, then a
+character-trigram index for looser matches ("lonely" -> "loneliness"). Candidates
+are ranked by edit similarity.
+
+    taxonomy = EmotionTaxonomy({"anger": {"frustration": ["impatience"], "rage": []}},
+                               aliases={"frustración": "frustration"})
+    taxonomy.resolve("frustated")   # ("frustration", ("anger", "frustration"), 0.7)
+"""
+
+import re
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+_WORD = re.compile(r"\w+")
+# Qualifiers that carry no emotion and would otherwise fuzzy-match short labels
+_FILLER_WORDS = frozenset(
+    "a am bit feel feeling feels i im just kind kinda little of pretty quite really so somewhat sort sorta super very".split()
+)
+
+
+def _normalize(label):
+    return " ".join(_WORD.findall(label.casefold()))
+
+
+def _deletes(text):
+    return {text[:index] + text[index + 1:] for index in range(len(text))}
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+class EmotionTaxonomy:
+    def __init__(self, tree, aliases=None, cutoff=0.55, candidates=12, trigram_budget=2000, cache_size=65536):
+        """``tree`` maps each base to its sub-emotions, either a list of labels or a nested mapping.
+
+        ``aliases`` maps extra labels (translations, synonyms) to a label in the tree. Fuzzy
+        matches need an edit similarity of at least ``cutoff``. The trigram search scores at most
+        ``candidates`` labels per word and reads postings of its rarest trigrams only, up to
+        ``trigram_budget`` entries.
+        """
+        self.cutoff = cutoff
+        self.candidates = candidates
+        self.trigram_budget = trigram_budget
+        self.chains = {}  # label -> (base, ..., label); the first occurrence wins, as in the tree walk
+        self.children = {}  # label -> its sub-emotions, for every base and any label that has some
+        self._walk(tree, ())
+        self._normalized = {}  # normalized label or alias -> label
+        for label in self.chains:
+            self._normalized.setdefault(_normalize(label), label)
+        for alias, label in (aliases or {}).items():
+            if label not in self.chains:
+                raise KeyError(f"alias {alias!r} points to unknown emotion {label!r}")
+            self._normalized.setdefault(_normalize(alias), label)
+        self._one_deletion = defaultdict(list)  # label with one character deleted -> normalized labels
+        self._postings = defaultdict(list)  # trigram -> normalized labels containing it
+        for normalized in self._normalized:
+            for deletion in _deletes(normalized):
+                self._one_deletion[deletion].append(normalized)
+            for trigram in _trigrams(normalized):
+                self._postings[trigram].append(normalized)
+        self.describe = lru_cache(maxsize=cache_size)(self._describe)
+
+    def _walk(self, tree, chain):
+        for label, subtree in tree.items():
+            self._add(label, chain)
+            children = list(subtree)
+            if isinstance(subtree, dict):
+                self._walk(subtree, chain + (label,))
+            else:
+                for child in children:
+                    self._add(child, chain + (label,))
+            if children or not chain:
+                self.children.setdefault(label, children)
+
+    def _add(self, label, chain):
+        self.chains.setdefault(label, chain + (label,))
+
+    def __len__(self):
+        return len(self.chains)
+
+    def resolve(self, text):
+        """Best matching label for a label, misspelling or free text: ``(label, chain, score)`` or None.
+
+        Exact labels score 1.0 and never touch the fuzzy index.
+        """
+        if text in self.chains:
+            return text, self.chains[text], 1.0
+        normalized = _normalize(text)
+        label = self._normalized.get(normalized)
+        if label is not None:
+            return label, self.chains[label], 1.0
+        words = [word for word in normalized.split() if word not in _FILLER_WORDS] or normalized.split()
+        # Multi-word labels first ("righteous anger"), longest phrase wins
+        for size in range(len(words), 0, -1):
+            for start in range(len(words) - size + 1):
+                label = self._normalized.get(" ".join(words[start:start + size]))
+                if label is not None:
+                    return label, self.chains[label], 1.0
+        queries = list(dict.fromkeys([" ".join(words)] + words))
+        for search in (self._one_edit_candidates, self._trigram_candidates):
+            best = None
+            for query in queries:
+                match = self._best(query, search(query))
+                if match is not None and (best is None or match[1] > best[1]):
+                    best = match
+            if best is not None:
+                label = self._normalized[best[0]]
+                return label, self.chains[label], best[1]
+        return None
+
+    def _one_edit_candidates(self, query):
+        """Labels one insertion, deletion or substitution away from the query."""
+        candidates = set(self._one_deletion.get(query, ()))
+        for deletion in _deletes(query):
+            if deletion in self._normalized:
+                candidates.add(deletion)
+            candidates.update(self._one_deletion.get(deletion, ()))
+        return candidates
+
+    def _trigram_candidates(self, query):
+        postings = sorted(
+            (self._postings[trigram] for trigram in _trigrams(query) if trigram in self._postings), key=len
+        )
+        hits, budget = Counter(), self.trigram_budget
+        for labels in postings:
+            if len(labels) > budget and hits:
+                break
+            hits.update(labels)
+            budget -= len(labels)
+        return [candidate for candidate, _ in hits.most_common(self.candidates)]
+
+    def _best(self, query, candidates):
+        best, best_score = None, self.cutoff
+        matcher = SequenceMatcher(autojunk=False)
+        matcher.set_seq2(query)
+        for candidate in candidates:
+            matcher.set_seq1(candidate)
+            if matcher.real_quick_ratio() < best_score or matcher.quick_ratio() < best_score:
+                continue
+            score = matcher.ratio()
+            if score >= best_score:
+                best, best_score = candidate, score
+        return None if best is None else (best, best_score)
+
+    def _describe(self, emotion):
+        match = self.resolve(emotion)
+        if match is None:
+            return f"'{emotion}' is either well-defined or not in the disambiguation map."
+        label, chain, _ = match
+        if len(chain) == 1:
+            message = f"'{label}' may be too general. Could it actually be one of: {', '.join(self.children[label])}?"
+        else:
+            message = f"'{label}' is a more nuanced form of '{chain[0]}'. Great emotional clarity."
+        if label != emotion:
+            return f"Did you mean '{label}'? {message}"
+        return message
@@ -0,0 +1,222 @@
+"""
+Emotional DNA fingerprints: one vector per user, and nearest-neighbour search over them.
+
+A fingerprint has two blocks, both built by feature hashing so the vector length
+stays fixed as new emotion labels appear:
+
+* an emotion histogram weighted by intensity (``emotion_dims`` slots)
+* counts of emotion -> next emotion transitions (``transition_dims`` slots)
+
+With ``half_life`` set, a user's vector decays toward their newest event, so
+recent patterns dominate. Each event updates one row in O(dimensions).
+
+Similarity is the cosine of the fingerprints after each block is normalized
+(the transition block scaled by ``transition_weight``). ``nearest`` scans every
+user with one matrix product up to ``brute_force_limit`` users. Past that it
+switches to a random-hyperplane LSH index (SimHash): ``lsh_tables`` tables of
+``lsh_bits``-bit signatures, probed at Hamming radius 1. The index is built on
+first use and kept current as events arrive. Candidates are re-ranked exactly.
+
+    fingerprints = eml.enable_fingerprints(half_life=datetime.timedelta(days=14))
+    eml.similar_users("user_001", k=5)   # [("user_042", 0.93), ...]
+"""
+
+import math
+import threading
+import zlib
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_MICROSECONDS_PER_SECOND = 1_000_000
+
+
+def _slot(text, size):
+    return zlib.crc32(text.encode("utf-8")) % size
+
+
+class _SimHashIndex:
+    """Random-hyperplane LSH over normalized fingerprints; buckets map a signature to a set of rows."""
+
+    def __init__(self, dimensions, tables, bits, seed):
+        rng = np.random.default_rng(seed)
+        self.tables = tables
+        self.bits = bits
+        self._planes = rng.standard_normal((dimensions, tables * bits)).astype(np.float32)
+        self._powers = (1 << np.arange(bits, dtype=np.int64))
+        self._buckets = [{} for _ in range(tables)]
+        self._keys = {}  # row -> its signature in every table
+
+    def signatures(self, vectors):
+        """(rows, tables) integer signatures for a 2-D array of normalized vectors."""
+        above = (vectors @ self._planes > 0).reshape(len(vectors), self.tables, self.bits)
+        return above @ self._powers
+
+    def update(self, row, keys):
+        keys = tuple(keys.tolist())
+        old = self._keys.get(row)
+        if old == keys:
+            return
+        for table, (before, after) in enumerate(zip(old or (None,) * self.tables, keys)):
+            if before == after:
+                continue
+            buckets = self._buckets[table]
+            if before is not None:
+                members = buckets[before]
+                members.discard(row)
+                if not members:
+                    del buckets[before]
+            buckets.setdefault(after, set()).add(row)
+        self._keys[row] = keys
+
+    def candidates(self, keys):
+        rows = set()
+        for table, key in enumerate(keys.tolist()):
+            buckets = self._buckets[table]
+            rows.update(buckets.get(key, ()))
+            for bit in range(self.bits):
+                rows.update(buckets.get(key ^ (1 << bit), ()))
+        return rows
+
+
+class EmotionalFingerprints:
+    def __init__(self, emotion_dims=32, transition_dims=64, half_life=None, transition_weight=0.5,
+                 brute_force_limit=100000, lsh_tables=8, lsh_bits=12, seed=0):
+        """``half_life`` is a timedelta, or None to keep every event at full weight."""
+        if np is None:
+            raise ImportError("EmotionalFingerprints requires NumPy")
+        self.emotion_dims = emotion_dims
+        self.transition_dims = transition_dims
+        self.dimensions = emotion_dims + transition_dims
+        self.transition_weight = transition_weight
+        self.brute_force_limit = brute_force_limit
+        self.lsh_tables = lsh_tables
+        self.lsh_bits = lsh_bits
+        self.seed = seed
+        self._rate = None if half_life is None else math.log(2) / (half_life.total_seconds() * _MICROSECONDS_PER_SECOND)
+        self._vectors = np.zeros((1024, self.dimensions), dtype=np.float32)
+        self._rows = {}  # user_id -> row in _vectors
+        self.user_ids = []  # row -> user_id
+        self._latest = []  # row -> (latest emotion, its epoch micros)
+        self._emotion_slots = {}
+        self._transition_slots = {}
+        self._lsh = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def observe(self, user_id, emotion, context, intensity, micros):
+        with self._lock:
+            row = self._rows.get(user_id)
+            if row is None:
+                row = self._add_user(user_id)
+            vector = self._vectors[row]
+            previous, latest = self._latest[row]
+            weight = 1.0
+            if self._rate is not None and latest is not None:
+                if micros > latest:
+                    vector *= math.exp(-self._rate * (micros - latest))
+                else:
+                    weight = math.exp(-self._rate * (latest - micros))  # Arrived out of order
+            slot = self._emotion_slots.get(emotion)
+            if slot is None:
+                slot = self._emotion_slots[emotion] = _slot(emotion, self.emotion_dims)
+            vector[slot] += weight * intensity
+            if previous is not None:
+                pair = (previous, emotion)
+                slot = self._transition_slots.get(pair)
+                if slot is None:
+                    slot = self._transition_slots[pair] = self.emotion_dims + _slot(
+                        f"{previous}\x1f{emotion}", self.transition_dims
+                    )
+                vector[slot] += weight
+            if latest is None or micros >= latest:
+                self._latest[row] = (emotion, micros)
+            if self._lsh is not None:
+                normalized = self._normalize(vector[np.newaxis])
+                self._lsh.update(row, self._lsh.signatures(normalized)[0])
+
+    def _add_user(self, user_id):
+        row = len(self.user_ids)
+        if row == len(self._vectors):
+            grown = np.zeros((2 * row, self.dimensions), dtype=np.float32)
+            grown[:row] = self._vectors
+            self._vectors = grown
+        self._rows[user_id] = row
+        self.user_ids.append(user_id)
+        self._latest.append((None, None))
+        return row
+
+    def _normalize(self, vectors):
+        """Unit-length copies of ``vectors`` with each block normalized and weighted first."""
+        normalized = np.empty_like(vectors)
+        blocks = ((slice(0, self.emotion_dims), 1.0), (slice(self.emotion_dims, None), self.transition_weight))
+        for block, weight in blocks:
+            part = vectors[:, block]
+            norms = np.linalg.norm(part, axis=1, keepdims=True)
+            normalized[:, block] = part / np.where(norms == 0, 1, norms) * weight
+        norms = np.linalg.norm(normalized, axis=1, keepdims=True)
+        return normalized / np.where(norms == 0, 1, norms)
+
+    def fingerprint(self, user_id):
+        """The user's normalized fingerprint vector, or None for unknown users."""
+        with self._lock:
+            row = self._rows.get(user_id)
+            if row is None:
+                return None
+            return self._normalize(self._vectors[row:row + 1])[0]
+
+    def build_index(self):
+        """Build the LSH index over every user now; later events keep it current."""
+        with self._lock:
+            self._build_index()
+
+    def _build_index(self):
+        index = _SimHashIndex(self.dimensions, self.lsh_tables, self.lsh_bits, self.seed)
+        count = len(self.user_ids)
+        for start in range(0, count, 65536):
+            stop = min(count, start + 65536)
+            signatures = index.signatures(self._normalize(self._vectors[start:stop]))
+            for offset, keys in enumerate(signatures):
+                index.update(start + offset, keys)
+        self._lsh = index
+
+    def nearest(self, user_id=None, k=10, vector=None, exact=None):
+        """Top ``k`` (user_id, cosine similarity) pairs for a user, or for a raw fingerprint ``vector``.
+
+        ``exact`` forces the brute-force scan (True) or the LSH index (False); by default the
+        scan is used up to ``brute_force_limit`` users. The queried user is left out.
+        """
+        with self._lock:
+            if vector is None:
+                row = self._rows.get(user_id)
+                if row is None:
+                    return []
+                query = self._normalize(self._vectors[row:row + 1])[0]
+            else:
+                row = None
+                query = self._normalize(np.asarray(vector, dtype=np.float32)[np.newaxis])[0]
+            count = len(self.user_ids)
+            if exact is None:
+                exact = count <= self.brute_force_limit
+            if exact:
+                rows = np.arange(count)
+                scores = self._normalize(self._vectors[:count]) @ query
+            else:
+                if self._lsh is None:
+                    self._build_index()
+                rows = np.fromiter(self._lsh.candidates(self._lsh.signatures(query[np.newaxis])[0]), dtype=np.int64)
+                scores = self._normalize(self._vectors[rows]) @ query
+            if row is not None:
+                keep = rows != row
+                rows, scores = rows[keep], scores[keep]
+            user_ids = self.user_ids
+        if not len(rows) or k <= 0:
+            return []
+        top = min(k, len(rows))
+        best = np.argpartition(-scores, top - 1)[:top]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(user_ids[rows[index]], float(scores[index])) for index in best]
@@ -0,0 +1,561 @@
+"""
+Benchmarks for the Emotional Memory Layer.
+
+Memory benchmark: bytes per user held by an EmotionalMemoryLayer filled with a
+synthetic population, for the default ``defaultdict(deque)`` of event dicts and
+for the compact array-backed store.
+
+Sharded benchmark: ingestion throughput of ShardedEmotionalMemoryLayer for an
+increasing number of worker processes, against a single in-process layer.
+
+AiKeep benchmark: resident set size while every event is flagged AiKeep, for the
+tiered disk-backed store (and, with --in-memory, the default lists).
+
+Taxonomy benchmark: EmotionTaxonomy lookup latency on a synthetic multi-level
+map for exact labels, misspellings and free text.
+
+Suite: the regression benchmark. Generates a synthetic population (users,
+events per user, emotion vocabulary size, intensity distribution) and measures
+ingestion throughput, p50/p99 latency of every public method, memory per user
+and AiKeep growth, written as JSON for comparison between releases.
+
+Contention benchmark: throughput and p99 latency of a mixed read/write workload
+on ConcurrentEmotionalMemoryLayer from many threads, for one global lock (one
+stripe) against striped locks, and from many asyncio tasks through
+AsyncEmotionalMemoryLayer.
+
+Codec benchmark: size and encode/decode time of the binary user export against
+JSON of the same memory and AiKeep history, per user. Decoding every event to a
+dict is slower than json.loads; the zero-copy open is the row to compare for
+readers that only need the columns.
+
+    python emotional_memory_benchmark.py suite --users 5000 --events 50 --output bench.json
+    python emotional_memory_benchmark.py memory --users 20000 --events 50
+    python emotional_memory_benchmark.py sharded --users 20000 --shards 1 2 4 8
+    python emotional_memory_benchmark.py aikeep --users 10000 --events 20000000
+    python emotional_memory_benchmark.py taxonomy --labels 10000
+    python emotional_memory_benchmark.py contention --threads 1 8 64 --tasks 1000
+    python emotional_memory_benchmark.py codec --users 2000 --events 500 --aikeep-ratio 0.2
+"""
+
+import argparse
+import asyncio
+import datetime
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from aikeep_tiered_store import TieredAiKeepStore
+from emotion_taxonomy import EmotionTaxonomy
+from emotional_memory_codec import EmotionalMemoryImage, export_user
+from emotional_memory_concurrency import AsyncEmotionalMemoryLayer, ConcurrentEmotionalMemoryLayer
+from emotional_memory_layer_Version4 import EmotionalMemoryLayer
+from emotional_memory_shards import ShardedEmotionalMemoryLayer
+
+EMOTIONS = ["shame", "anger", "grief", "joy", "fear", "calm", "frustration", "anxiety", "loneliness", "peace"]
+
+
+def populate(eml, users, events_per_user, contexts=200, seed=0):
+    rng = random.Random(seed)
+    for user in range(users):
+        user_id = f"user_{user:07d}"
+        for _ in range(events_per_user):
+            # Built per event, as labels decoded from requests would be
+            context = f"context {rng.randrange(contexts)}"
+            eml.record_emotional_event(user_id, rng.choice(EMOTIONS), context, rng.randint(1, 10))
+
+
+def bytes_per_user(users, events_per_user, max_memory_per_user, compact):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    eml = EmotionalMemoryLayer(max_memory_per_user=max_memory_per_user, compact=compact)
+    populate(eml, users, events_per_user)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del eml
+    return (after - before) / users
+
+
+def memory_benchmark(users, events_per_user, max_memory_per_user):
+    results = {}
+    for label, compact in (("defaultdict(deque)", False), ("compact", True)):
+        results[label] = bytes_per_user(users, events_per_user, max_memory_per_user, compact)
+    return results
+
+
+def synthetic_events(users, events_per_user, contexts=200, seed=0):
+    rng = random.Random(seed)
+    return [
+        (f"user_{rng.randrange(users):07d}", rng.choice(EMOTIONS), f"context {rng.randrange(contexts)}", rng.randint(1, 10))
+        for _ in range(users * events_per_user)
+    ]
+
+
+def ingest(eml, events):
+    record = eml.record_emotional_event
+    start = time.perf_counter()
+    for event in events:
+        record(*event)
+    return time.perf_counter() - start
+
+
+def sharded_benchmark(users, events_per_user, shard_counts):
+    """Events per second: in-process layer, then each shard count (timed until every shard has drained)."""
+    events = synthetic_events(users, events_per_user)
+    results = {"in-process": len(events) / ingest(EmotionalMemoryLayer(), events)}
+    for shards in shard_counts:
+        with ShardedEmotionalMemoryLayer(shards=shards) as eml:
+            start = time.perf_counter()
+            ingest(eml, events)
+            # A round trip to every shard only returns once it has applied its backlog
+            eml.scatter_gather("detect_repetition")
+            results[f"{shards} shards"] = len(events) / (time.perf_counter() - start)
+    return results
+
+
+def resident_bytes():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource  # Peak rather than current RSS, but still shows growth
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def aikeep_benchmark(users, events, checkpoints, in_memory=False):
+    """RSS in bytes after each checkpoint's worth of AiKeep-flagged events, per layout."""
+    layouts = [("tiered", True)] + ([("in-memory", False)] if in_memory else [])
+    results = {}
+    for label, tiered in layouts:
+        with tempfile.TemporaryDirectory() as directory:
+            store = TieredAiKeepStore(directory) if tiered else None
+            eml = EmotionalMemoryLayer(aikeep_store=store)
+            if tiered:
+                store.start_background_compaction()
+            rng = random.Random(0)
+            samples, step = [], max(1, events // checkpoints)
+            for recorded in range(1, events + 1):
+                eml.record_emotional_event(
+                    f"user_{rng.randrange(users):07d}", rng.choice(EMOTIONS), f"context {rng.randrange(200)}",
+                    rng.randint(1, 10), aikeep=True,
+                )
+                if recorded % step == 0:
+                    samples.append((recorded, resident_bytes()))
+            if tiered:
+                store.close()
+            results[label] = samples
+            del eml, store
+            gc.collect()
+    return results
+
+
+SYLLABLES = ["ra", "mo", "vel", "sin", "ta", "ku", "len", "dor", "fi", "ash", "em", "qui", "zor", "bel", "ny", "tos"]
+
+
+def synthetic_taxonomy(labels, branching=20, seed=0):
+    """Three-level tree (bases -> families -> leaves) with about ``labels`` pseudo-word labels."""
+    rng = random.Random(seed)
+    seen = set()
+
+    def word():
+        while True:
+            candidate = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(3, 5)))
+            if candidate not in seen:
+                seen.add(candidate)
+                return candidate
+
+    leaves_per_family = max(1, labels // (branching * branching))
+    return {
+        word(): {word(): [word() for _ in range(leaves_per_family)] for _ in range(branching)}
+        for _ in range(branching)
+    }
+
+
+def misspell(label, rng):
+    index = rng.randrange(len(label))
+    edit = rng.choice(("delete", "swap", "replace"))
+    if edit == "delete":
+        return label[:index] + label[index + 1:]
+    if edit == "swap" and index < len(label) - 1:
+        return label[:index] + label[index + 1] + label[index] + label[index + 2:]
+    return label[:index] + rng.choice("aeiou") + label[index + 1:]
+
+
+def taxonomy_benchmark(labels, queries=2000, seed=0):
+    """Lookup latency in microseconds (mean, p50, p99) per query kind, bypassing the response cache."""
+    rng = random.Random(seed)
+    taxonomy = EmotionTaxonomy(synthetic_taxonomy(labels, seed=seed))
+    known = list(taxonomy.chains)
+    kinds = {
+        "exact": [rng.choice(known) for _ in range(queries)],
+        "misspelled": [misspell(rng.choice(known), rng) for _ in range(queries)],
+        "free text": [f"kinda {misspell(rng.choice(known), rng)} today" for _ in range(queries)],
+    }
+    results = {"labels": len(taxonomy)}
+    for kind, texts in kinds.items():
+        timings = []
+        for text in texts:
+            start = time.perf_counter()
+            taxonomy.resolve(text)
+            timings.append((time.perf_counter() - start) * 1e6)
+        timings.sort()
+        results[kind] = (sum(timings) / len(timings), timings[len(timings) // 2], timings[int(len(timings) * 0.99)])
+    return results
+
+
+def contention_operations(users, operations, write_ratio, seed):
+    """(method name, args) pairs: writes are record_emotional_event, reads rotate through the diagnostics."""
+    rng = random.Random(seed)
+    reads = ("suggest_reflection", "compassionate_load_check", "connection_gap_diagnostic", "detect_repetition")
+    workload = []
+    for _ in range(operations):
+        user_id = f"user_{rng.randrange(users):07d}"
+        if rng.random() < write_ratio:
+            workload.append(("record_emotional_event", (user_id, rng.choice(EMOTIONS), f"context {rng.randrange(200)}", rng.randint(1, 10))))
+        else:
+            workload.append((rng.choice(reads), (user_id,)))
+    return workload
+
+
+def _summary(operations, elapsed, timings):
+    timings.sort()
+    return {
+        "ops/s": operations / elapsed,
+        "p50 us": timings[len(timings) // 2] * 1e6,
+        "p99 us": timings[int(len(timings) * 0.99)] * 1e6,
+    }
+
+
+def threaded_contention(users, threads, operations, stripes, write_ratio):
+    eml = ConcurrentEmotionalMemoryLayer(stripes=stripes)
+    workloads = [contention_operations(users, operations, write_ratio, seed) for seed in range(threads)]
+    timings = [[] for _ in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(index):
+        out, workload = timings[index], workloads[index]
+        barrier.wait()
+        for method, args in workload:
+            start = time.perf_counter()
+            getattr(eml, method)(*args)
+            out.append(time.perf_counter() - start)
+
+    pool = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in pool:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in pool:
+        thread.join()
+    return _summary(threads * operations, time.perf_counter() - start, [t for out in timings for t in out])
+
+
+def asyncio_contention(users, tasks, operations, stripes, write_ratio):
+    async def run():
+        aeml = AsyncEmotionalMemoryLayer(stripes=stripes)
+        timings = []
+
+        async def task(seed):
+            for method, args in contention_operations(users, operations, write_ratio, seed):
+                start = time.perf_counter()
+                await getattr(aeml, method)(*args)
+                timings.append(time.perf_counter() - start)
+                await asyncio.sleep(0)  # Interleave with the other tasks, as request handlers would
+
+        start = time.perf_counter()
+        await asyncio.gather(*(task(seed) for seed in range(tasks)))
+        return _summary(tasks * operations, time.perf_counter() - start, timings)
+
+    return asyncio.run(run())
+
+
+def contention_benchmark(users, thread_counts, tasks, operations, stripes, write_ratio):
+    results = {}
+    for threads in thread_counts:
+        for stripe_count in (1, stripes):
+            results[f"{threads} threads, {stripe_count} stripes"] = threaded_contention(
+                users, threads, operations, stripe_count, write_ratio
+            )
+    results[f"{tasks} asyncio tasks"] = asyncio_contention(users, tasks, max(1, operations // 10), stripes, write_ratio)
+    return results
+
+
+INTENSITY_DISTRIBUTIONS = {
+    "uniform": lambda rng: rng.randint(1, 10),
+    "normal": lambda rng: min(10, max(1, round(rng.gauss(5.5, 2)))),
+    "low": lambda rng: min(10, 1 + int(rng.expovariate(0.5))),
+    "high": lambda rng: max(1, 10 - int(rng.expovariate(0.5))),
+}
+
+
+def emotion_vocabulary(size):
+    """The demo emotions, padded with synthetic labels up to ``size``."""
+    return EMOTIONS[:size] + [f"emotion {index}" for index in range(len(EMOTIONS), size)]
+
+
+def synthetic_population(users, events_per_user, vocabulary=10, contexts=200, intensity="uniform",
+                         aikeep_ratio=0.05, seed=0):
+    """Exactly ``events_per_user`` events for each user, interleaved across users, as record_emotional_event args."""
+    rng = random.Random(seed)
+    emotions, draw = emotion_vocabulary(vocabulary), INTENSITY_DISTRIBUTIONS[intensity]
+    order = [user for user in range(users) for _ in range(events_per_user)]
+    rng.shuffle(order)
+    return [
+        (f"user_{user:07d}", rng.choice(emotions), f"context {rng.randrange(contexts)}", draw(rng),
+         rng.random() < aikeep_ratio)
+        for user in order
+    ]
+
+
+def percentiles(timings):
+    timings = sorted(timings)
+    return {
+        "calls": len(timings),
+        "mean_us": sum(timings) / len(timings) * 1e6,
+        "p50_us": timings[len(timings) // 2] * 1e6,
+        "p99_us": timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1e6,
+    }
+
+
+def time_calls(call, arguments):
+    timings = []
+    for args in arguments:
+        start = time.perf_counter()
+        call(*args)
+        timings.append(time.perf_counter() - start)
+    return percentiles(timings)
+
+
+def method_latencies(eml, user_ids, vocabulary, calls, seed):
+    """p50/p99 per public method, each called on random users (some never seen) after ingestion."""
+    rng = random.Random(seed)
+    users = [(rng.choice(user_ids) if rng.random() < 0.9 else f"unknown_{index}",) for index in range(calls)]
+    window = datetime.timedelta(minutes=5)
+    emotions = emotion_vocabulary(vocabulary)
+    fresh = [(f"fresh_{index % 1000:04d}", rng.choice(emotions), "context 0", rng.randint(1, 10)) for index in range(calls)]
+    batches = [fresh[index:index + 100] for index in range(0, len(fresh), 100)]
+    results = {
+        "record_emotional_event": time_calls(eml.record_emotional_event, fresh),
+        "record_emotional_events_bulk[100]": time_calls(eml.record_emotional_events_bulk, [(batch,) for batch in batches]),
+    }
+    for method in ("detect_repetition", "suggest_reflection", "recurring_loops", "emotional_cycle_completion",
+                   "connection_gap_diagnostic", "compassionate_load_check", "write_version"):
+        results[method] = time_calls(getattr(eml, method), users)
+    for method in ("detect_repetition", "connection_gap_diagnostic", "compassionate_load_check"):
+        call = getattr(eml, method)
+        results[f"{method}[last=5min]"] = time_calls(lambda user_id: call(user_id, last=window), users)
+    results["disambiguate_emotion"] = time_calls(
+        eml.disambiguate_emotion, [(rng.choice(emotions + ["happiness", "frustated", "kinda anxious"]),) for _ in range(calls)]
+    )
+    try:
+        results["population_diagnostics"] = time_calls(eml.population_diagnostics, [()] * 5)
+    except ImportError:
+        pass  # NumPy is optional
+    return results
+
+
+def aikeep_growth(eml, events, checkpoints):
+    """Traced heap and AiKeep size while the population is ingested."""
+    step, samples, kept = max(1, len(events) // checkpoints), [], 0
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for recorded, event in enumerate(events, 1):
+        eml.record_emotional_event(*event)
+        kept += event[4]
+        if recorded % step == 0 or recorded == len(events):
+            samples.append({"events": recorded, "aikeep_events": kept,
+                            "traced_bytes": tracemalloc.get_traced_memory()[0] - before})
+    tracemalloc.stop()
+    return samples
+
+
+def suite_benchmark(users, events_per_user, vocabulary, contexts, intensity, aikeep_ratio, max_memory_per_user,
+                    compact, calls, checkpoints, seed):
+    events = synthetic_population(users, events_per_user, vocabulary, contexts, intensity, aikeep_ratio, seed)
+    layer_kwargs = {"max_memory_per_user": max_memory_per_user, "compact": compact}
+
+    eml = EmotionalMemoryLayer(**layer_kwargs)
+    elapsed = ingest(eml, events)
+    bulk = EmotionalMemoryLayer(**layer_kwargs)
+    start = time.perf_counter()
+    bulk.record_emotional_events_bulk(events)
+    bulk_elapsed = time.perf_counter() - start
+    del bulk
+
+    latencies = method_latencies(eml, sorted(eml.user_memory), vocabulary, calls, seed)
+    cache = eml.diagnostics_cache_info()
+    del eml
+    growth = aikeep_growth(EmotionalMemoryLayer(**layer_kwargs), events, checkpoints)
+    return {
+        "schema": 1,
+        "environment": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "parameters": {
+            "users": users, "events_per_user": events_per_user, "vocabulary": vocabulary, "contexts": contexts,
+            "intensity": intensity, "aikeep_ratio": aikeep_ratio, "max_memory_per_user": max_memory_per_user,
+            "compact": compact, "calls": calls, "seed": seed,
+        },
+        "ingestion": {
+            "events": len(events),
+            "events_per_second": len(events) / elapsed,
+            "bulk_events_per_second": len(events) / bulk_elapsed,
+        },
+        "latency": latencies,
+        "diagnostics_cache": cache,
+        "memory": {"bytes_per_user": growth[-1]["traced_bytes"] / users},
+        "aikeep_growth": growth,
+    }
+
+
+def _json_export(eml, user_id):
+    state = {"user_id": user_id, "user_memory": list(eml.user_memory[user_id]),
+             "aikeep": eml.aikeep_store.get(user_id, [])}
+    return json.dumps(state, separators=(",", ":")).encode("utf-8")
+
+
+def _image_events(data):
+    image = EmotionalMemoryImage(data)
+    events = list(image.memory_events()), list(image.aikeep_events())
+    image.release()
+    return events
+
+
+def _image_open(data):
+    EmotionalMemoryImage(data).release()
+
+
+def codec_benchmark(users, events_per_user, aikeep_ratio, max_memory_per_user, seed=0):
+    """Bytes and microseconds per user: JSON, binary, and the zero-copy open that skips building event dicts."""
+    eml = EmotionalMemoryLayer(max_memory_per_user=max_memory_per_user)
+    ingest(eml, synthetic_population(users, events_per_user, aikeep_ratio=aikeep_ratio, seed=seed))
+    user_ids = sorted(eml.user_memory)
+    results = {}
+    for label, export, decode in (
+        ("json", _json_export, json.loads),
+        ("binary", export_user, _image_events),
+        ("binary, zero-copy open", export_user, _image_open),
+    ):
+        start = time.perf_counter()
+        encoded = [export(eml, user_id) for user_id in user_ids]
+        encoded_at = time.perf_counter()
+        for data in encoded:
+            decode(data)
+        decoded_at = time.perf_counter()
+        results[label] = {
+            "bytes_per_user": sum(map(len, encoded)) / users,
+            "encode_us": (encoded_at - start) / users * 1e6,
+            "decode_us": (decoded_at - encoded_at) / users * 1e6,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    suite = subparsers.add_parser("suite", help="full regression suite, written as JSON")
+    suite.add_argument("--users", type=int, default=5000)
+    suite.add_argument("--events", type=int, default=50, help="events recorded per user")
+    suite.add_argument("--vocabulary", type=int, default=10, help="distinct emotions")
+    suite.add_argument("--contexts", type=int, default=200, help="distinct contexts")
+    suite.add_argument("--intensity", choices=sorted(INTENSITY_DISTRIBUTIONS), default="uniform")
+    suite.add_argument("--aikeep-ratio", type=float, default=0.05, help="share of events flagged AiKeep")
+    suite.add_argument("--max-memory", type=int, default=50, help="max_memory_per_user")
+    suite.add_argument("--compact", action="store_true", help="use the compact array-backed store")
+    suite.add_argument("--calls", type=int, default=2000, help="timed calls per method")
+    suite.add_argument("--checkpoints", type=int, default=10, help="AiKeep growth samples")
+    suite.add_argument("--seed", type=int, default=0)
+    suite.add_argument("--output", help="JSON file to write (default: stdout)")
+    memory = subparsers.add_parser("memory", help="bytes per user for each storage layout")
+    memory.add_argument("--users", type=int, default=20000)
+    memory.add_argument("--events", type=int, default=50, help="events recorded per user")
+    memory.add_argument("--max-memory", type=int, default=50, help="max_memory_per_user")
+    sharded = subparsers.add_parser("sharded", help="ingestion throughput by number of shards")
+    sharded.add_argument("--users", type=int, default=20000)
+    sharded.add_argument("--events", type=int, default=50, help="events recorded per user")
+    sharded.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    aikeep = subparsers.add_parser("aikeep", help="RSS as AiKeep grows, tiered store vs in-memory lists")
+    aikeep.add_argument("--users", type=int, default=10000)
+    aikeep.add_argument("--events", type=int, default=5000000, help="AiKeep events in total")
+    aikeep.add_argument("--checkpoints", type=int, default=10)
+    aikeep.add_argument("--in-memory", action="store_true", help="also run the default defaultdict(list)")
+    taxonomy = subparsers.add_parser("taxonomy", help="emotion lookup latency on a large taxonomy")
+    taxonomy.add_argument("--labels", type=int, default=10000)
+    taxonomy.add_argument("--queries", type=int, default=2000, help="queries per kind")
+    contention = subparsers.add_parser("contention", help="mixed workload from many threads and asyncio tasks")
+    contention.add_argument("--users", type=int, default=10000)
+    contention.add_argument("--threads", type=int, nargs="+", default=[1, 8, 64])
+    contention.add_argument("--tasks", type=int, default=1000, help="concurrent asyncio tasks")
+    contention.add_argument("--operations", type=int, default=5000, help="operations per thread")
+    contention.add_argument("--stripes", type=int, default=64)
+    contention.add_argument("--write-ratio", type=float, default=0.8)
+    codec = subparsers.add_parser("codec", help="binary user export against JSON: size and speed")
+    codec.add_argument("--users", type=int, default=2000)
+    codec.add_argument("--events", type=int, default=500, help="events recorded per user")
+    codec.add_argument("--aikeep-ratio", type=float, default=0.2, help="share of events flagged AiKeep")
+    codec.add_argument("--max-memory", type=int, default=50, help="max_memory_per_user")
+    args = parser.parse_args()
+
+    if args.benchmark == "suite":
+        results = suite_benchmark(
+            args.users, args.events, args.vocabulary, args.contexts, args.intensity, args.aikeep_ratio,
+            args.max_memory, args.compact, args.calls, args.checkpoints, args.seed,
+        )
+        if args.output:
+            with open(args.output, "w") as output:
+                json.dump(results, output, indent=2)
+        else:
+            json.dump(results, sys.stdout, indent=2)
+            print()
+    elif args.benchmark == "memory":
+        results = memory_benchmark(args.users, args.events, args.max_memory)
+        baseline = results["defaultdict(deque)"]
+        print(f"{args.users} users x {args.events} events (max_memory_per_user={args.max_memory})")
+        for label, size in results.items():
+            print(f"  {label:<20} {size:>10.0f} bytes/user  ({size / baseline:.0%})")
+    elif args.benchmark == "aikeep":
+        results = aikeep_benchmark(args.users, args.events, args.checkpoints, args.in_memory)
+        for label, samples in results.items():
+            print(label)
+            for recorded, rss in samples:
+                print(f"  {recorded:>12,} events  {rss / 2**20:>8.1f} MiB RSS")
+    elif args.benchmark == "taxonomy":
+        results = taxonomy_benchmark(args.labels, args.queries)
+        print(f"{results.pop('labels')} labels")
+        for kind, (mean, p50, p99) in results.items():
+            print(f"  {kind:<12} mean {mean:>8.1f} us  p50 {p50:>8.1f} us  p99 {p99:>8.1f} us")
+    elif args.benchmark == "contention":
+        results = contention_benchmark(
+            args.users, args.threads, args.tasks, args.operations, args.stripes, args.write_ratio
+        )
+        for label, stats in results.items():
+            print(f"  {label:<24} {stats['ops/s']:>10,.0f} ops/s  p50 {stats['p50 us']:>8.1f} us  p99 {stats['p99 us']:>8.1f} us")
+    elif args.benchmark == "codec":
+        results = codec_benchmark(args.users, args.events, args.aikeep_ratio, args.max_memory)
+        baseline = results["json"]["bytes_per_user"]
+        print(f"{args.users} users x {args.events} events (AiKeep ratio {args.aikeep_ratio})")
+        for label, stats in results.items():
+            print(f"  {label:<24} {stats['bytes_per_user']:>9.0f} bytes/user ({stats['bytes_per_user'] / baseline:>4.0%})"
+                  f"  encode {stats['encode_us']:>8.1f} us  decode {stats['decode_us']:>8.1f} us")
+    else:
+        results = sharded_benchmark(args.users, args.events, args.shards)
+        print(f"{args.users} users x {args.events} events")
+        for label, rate in results.items():
+            print(f"  {label:<12} {rate:>12,.0f} events/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Thread-safe and asyncio-safe front-ends for the Emotional Memory Layer.
+
+ConcurrentEmotionalMemoryLayer guards each user's state with one of a fixed pool
+of re-entrant locks, picked by a hash of ``user_id`` (lock striping). Writers and
+readers for users on different stripes never wait for each other; only the few
+structures shared by every user (the diagnostics LRU, the AiKeep store, the label
+vocabulary and, under a memory budget, the residency LRU) take short locks of their
+own. Population-wide calls hold every stripe while they copy the memory they scan.
+An over-budget writer only spills idle users whose stripe it can take without
+waiting; the rest are left for the next write.
+
+AsyncEmotionalMemoryLayer exposes the same methods as coroutines. A call whose
+stripe is free runs inline on the event loop, so an asyncio-only service pays no
+thread hop; a call that would wait on another thread, and every bulk or
+population-wide call, runs in an executor instead of blocking the loop.
+
+    eml = ConcurrentEmotionalMemoryLayer(stripes=64)
+    eml.record_emotional_event("user_001", "shame", "work presentation", 7)  # from any thread
+
+    aeml = AsyncEmotionalMemoryLayer(eml)
+    await aeml.record_emotional_event("user_001", "grief", "loss of pet", 8)
+    await aeml.suggest_reflection("user_001")
+"""
+
+import asyncio
+import functools
+import inspect
+import threading
+from contextlib import ExitStack
+
+from emotional_memory_layer_Version4 import EmotionalMemoryLayer
+
+
+def _per_user(method):
+    @functools.wraps(method)
+    def locked(self, user_id, *args, **kwargs):
+        with self.lock_for(user_id):
+            return method(self, user_id, *args, **kwargs)
+    return locked
+
+
+def _all_users(method):
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        with self.all_stripes():
+            return method(self, *args, **kwargs)
+    return locked
+
+
+class ConcurrentEmotionalMemoryLayer(EmotionalMemoryLayer):
+    def __init__(self, *args, stripes=64, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stripes = [threading.RLock() for _ in range(stripes)]
+        self._cache_lock = threading.Lock()
+        self._aikeep_lock = threading.Lock()
+        self._residency_lock = threading.Lock()
+
+    def lock_for(self, user_id):
+        """The stripe lock guarding ``user_id``; hold it to make several calls for that user atomic."""
+        return self._stripes[hash(user_id) % len(self._stripes)]
+
+    def all_stripes(self):
+        """Context manager holding every stripe, acquired in a fixed order so it cannot deadlock."""
+        stack = ExitStack()
+        for lock in self._stripes:
+            stack.enter_context(lock)
+        return stack
+
+    record_emotional_event = _per_user(EmotionalMemoryLayer.record_emotional_event)
+    _record_user_rows = _per_user(EmotionalMemoryLayer._record_user_rows)
+    _memory_snapshot = _per_user(EmotionalMemoryLayer._memory_snapshot)
+    _replace_memory = _per_user(EmotionalMemoryLayer._replace_memory)
+    detect_repetition = _per_user(EmotionalMemoryLayer.detect_repetition)
+    suggest_reflection = _per_user(EmotionalMemoryLayer.suggest_reflection)
+    recurring_loops = _per_user(EmotionalMemoryLayer.recurring_loops)
+    emotional_cycle_completion = _per_user(EmotionalMemoryLayer.emotional_cycle_completion)
+    connection_gap_diagnostic = _per_user(EmotionalMemoryLayer.connection_gap_diagnostic)
+    compassionate_load_check = _per_user(EmotionalMemoryLayer.compassionate_load_check)
+    long_term_summary = _per_user(EmotionalMemoryLayer.long_term_summary)
+    context_frequency = _per_user(EmotionalMemoryLayer.context_frequency)
+    memory_columns = _all_users(EmotionalMemoryLayer.memory_columns)
+    add_threshold_listener = _all_users(EmotionalMemoryLayer.add_threshold_listener)
+    # Observers are seeded from the resident memory, which must hold still meanwhile
+    enable_population_analytics = _all_users(EmotionalMemoryLayer.enable_population_analytics)
+    enable_fingerprints = _all_users(EmotionalMemoryLayer.enable_fingerprints)
+    enable_long_term_summaries = _all_users(EmotionalMemoryLayer.enable_long_term_summaries)
+
+    def _keep_event(self, user_id, event):
+        # The tiered store appends every user to one active segment
+        with self._aikeep_lock:
+            super()._keep_event(user_id, event)
+
+    def _touch(self, user_id):
+        with self._residency_lock:
+            super()._touch(user_id)
+
+    def _grew(self, user_id, events):
+        with self._residency_lock:
+            self._resident_events += events
+            excess = self._resident_events - self.max_resident_events
+            victims = []
+            for victim in self._lru:
+                if excess <= 0:
+                    break
+                if victim != user_id:
+                    victims.append(victim)
+                    excess -= len(self.user_memory.get(victim, ()))
+        for victim in victims:
+            lock = self.lock_for(victim)
+            if lock.acquire(blocking=False):
+                try:
+                    if victim in self.user_memory:
+                        self._spill_user(victim)
+                finally:
+                    lock.release()
+
+    def _spill_user(self, user_id):
+        with self._residency_lock:
+            super()._spill_user(user_id)
+
+    def _reload(self, user_id, payload):
+        with self._residency_lock:
+            return super()._reload(user_id, payload)
+
+    def _cached(self, user_id, name, compute):
+        # Callers hold the user's stripe, so the version cannot move while compute runs unlocked
+        if not self.diagnostics_cache_size or not self._known(user_id):
+            return compute(user_id)
+        version = self._versions.get(user_id, 0)
+        with self._cache_lock:
+            entry = self._diagnostics_cache.get(user_id)
+            if entry is not None and entry[0] == version and name in entry[1]:
+                self._diagnostics_cache.move_to_end(user_id)
+                self._cache_hits += 1
+                return entry[1][name]
+            self._cache_misses += 1
+        result = compute(user_id)
+        with self._cache_lock:
+            entry = self._diagnostics_cache.get(user_id)
+            results = entry[1] if entry is not None and entry[0] == version else {}
+            results[name] = result
+            self._diagnostics_cache[user_id] = (version, results)
+            self._diagnostics_cache.move_to_end(user_id)
+            if len(self._diagnostics_cache) > self.diagnostics_cache_size:
+                self._diagnostics_cache.popitem(last=False)
+        return result
+
+    def clear_diagnostics_cache(self):
+        with self._cache_lock:
+            self._diagnostics_cache.clear()
+
+
+class AsyncEmotionalMemoryLayer:
+    def __init__(self, layer=None, executor=None, **layer_kwargs):
+        """Wraps ``layer`` (a new ConcurrentEmotionalMemoryLayer built from ``layer_kwargs`` by default).
+
+        Offloaded calls run on ``executor``, the loop's default executor when None.
+        """
+        self.layer = ConcurrentEmotionalMemoryLayer(**layer_kwargs) if layer is None else layer
+        self.executor = executor
+        self._listeners = {}  # callback -> the thread-safe shim registered with the layer
+        self._listener_tasks = set()  # Coroutine listeners still running
+
+    async def _offload(self, call, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, functools.partial(call, *args, **kwargs)
+        )
+
+    async def _per_user(self, call, user_id, *args, **kwargs):
+        lock = self.layer.lock_for(user_id)
+        if lock.acquire(blocking=False):
+            try:
+                return call(user_id, *args, **kwargs)
+            finally:
+                lock.release()
+        return await self._offload(call, user_id, *args, **kwargs)
+
+    async def record_emotional_event(self, user_id, emotion, context, intensity, aikeep=False):
+        return await self._per_user(self.layer.record_emotional_event, user_id, emotion, context, intensity, aikeep)
+
+    async def record_emotional_events_bulk(self, events=None, **columns):
+        return await self._offload(self.layer.record_emotional_events_bulk, events, **columns)
+
+    async def detect_repetition(self, user_id, since=None, until=None, last=None, lifetime=False):
+        return await self._per_user(self.layer.detect_repetition, user_id, since, until, last, lifetime)
+
+    async def suggest_reflection(self, user_id, lifetime=False):
+        return await self._per_user(self.layer.suggest_reflection, user_id, lifetime)
+
+    async def recurring_loops(self, user_id, top=5):
+        return await self._per_user(self.layer.recurring_loops, user_id, top)
+
+    async def emotional_cycle_completion(self, user_id):
+        return await self._per_user(self.layer.emotional_cycle_completion, user_id)
+
+    async def connection_gap_diagnostic(self, user_id, since=None, until=None, last=None, lifetime=False):
+        return await self._per_user(self.layer.connection_gap_diagnostic, user_id, since, until, last, lifetime)
+
+    async def long_term_summary(self, user_id):
+        return await self._per_user(self.layer.long_term_summary, user_id)
+
+    async def context_frequency(self, user_id, context):
+        return await self._per_user(self.layer.context_frequency, user_id, context)
+
+    async def compassionate_load_check(self, user_id, since=None, until=None, last=None):
+        return await self._per_user(self.layer.compassionate_load_check, user_id, since, until, last)
+
+    async def population_diagnostics(self, user_ids=None):
+        return await self._offload(self.layer.population_diagnostics, user_ids)
+
+    def add_threshold_listener(self, callback):
+        """Like the layer's, but ``callback`` always runs on the calling event loop, even for offloaded writes."""
+        loop = asyncio.get_running_loop()
+
+        def dispatch(user_id, diagnostic, active):
+            result = callback(user_id, diagnostic, active)
+            if inspect.isawaitable(result):
+                task = asyncio.ensure_future(result)
+                self._listener_tasks.add(task)
+                task.add_done_callback(self._listener_tasks.discard)
+
+        def shim(user_id, diagnostic, active):
+            loop.call_soon_threadsafe(dispatch, user_id, diagnostic, active)
+
+        self._listeners[callback] = shim
+        self.layer.add_threshold_listener(shim)
+
+    def remove_threshold_listener(self, callback):
+        self.layer.remove_threshold_listener(self._listeners.pop(callback))
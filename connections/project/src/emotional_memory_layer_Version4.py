@@ -128,12 +128,352 @@ DEMO FLOW:
 * Tools working as living ecosystem
 """
 
+import asyncio
 import datetime
-from collections import defaultdict, deque
+import heapq
+import inspect
+import operator
+import pickle
+import threading
+import warnings
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict, deque
+from itertools import count, islice, repeat
+
+from emotion_cooccurrence import EmotionCooccurrence
+from emotion_taxonomy import EmotionTaxonomy
+from emotional_fingerprints import EmotionalFingerprints
+from emotional_summary import LongTermSummary
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for the population-wide scans
+    np = None
+
+# Compassionate Load Threshold: at least OVERLOAD_MIN_EVENTS events of intensity >= OVERLOAD_INTENSITY
+# spanning at least OVERLOAD_MIN_EMOTIONS distinct emotions.
+OVERLOAD_INTENSITY = 7
+OVERLOAD_MIN_EVENTS = 5
+OVERLOAD_MIN_EMOTIONS = 3
+# Connection Gap: at least GAP_MIN_EVENTS events of intensity >= GAP_INTENSITY in contexts seen only once.
+GAP_INTENSITY = 6
+GAP_MIN_EVENTS = 3
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def _to_epoch_micros(timestamp):
+    return (timestamp - _EPOCH) // _MICROSECOND
+
+
+def _from_epoch_micros(micros):
+    return _EPOCH + datetime.timedelta(microseconds=micros)
+
+
+def _compact_intensity(intensity):
+    """``intensity`` as a compact ring stores it; raises before anything is written if it does not fit."""
+    intensity = operator.index(intensity)  # TypeError for floats and other non-integers
+    if not -0x8000 <= intensity <= 0x7FFF:
+        raise ValueError(f"compact storage needs intensities in the signed 16-bit range, got {intensity}")
+    return intensity
+
+
+def _make_event(timestamp, emotion, context, intensity):
+    return {
+        'timestamp': timestamp.isoformat(),
+        'emotion': emotion,
+        'context': context,
+        'intensity': intensity
+    }
+
+
+class _Vocabulary:
+    """Interns emotion and context labels to small integer ids shared by every user."""
+
+    __slots__ = ("ids", "labels", "_lock")
+
+    def __init__(self):
+        self.ids = {}
+        self.labels = []
+        self._lock = threading.Lock()  # Only taken for new labels, which may come from several threads
+
+    def intern(self, label):
+        label_id = self.ids.get(label)
+        if label_id is None:
+            with self._lock:
+                label_id = self.ids.get(label)
+                if label_id is None:
+                    self.labels.append(label)
+                    label_id = self.ids[label] = len(self.labels) - 1
+        return label_id
+
+
+class CompactEventRing:
+    """Bounded per-user event buffer stored column-wise in typed arrays.
+
+    Stands in for the ``deque(maxlen=...)`` of event dicts: ``len``, iteration and
+    indexing behave the same and yield event dicts, oldest first. Emotions and
+    contexts are interned ids, timestamps are integer microseconds since the epoch
+    and intensities are small ints; ISO strings are only produced on read.
+    """
+
+    __slots__ = ("maxlen", "_vocabulary", "_timestamps", "_emotions", "_contexts", "_intensities", "_start")
+
+    def __init__(self, vocabulary, maxlen=None):
+        self.maxlen = maxlen
+        self._vocabulary = vocabulary
+        self._timestamps = array('q')
+        self._emotions = array('I')
+        self._contexts = array('I')
+        self._intensities = array('h')
+        self._start = 0  # Slot of the oldest event once the ring has wrapped
+
+    def __len__(self):
+        return len(self._timestamps)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __getitem__(self, index):
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("CompactEventRing index out of range")
+        slot = (self._start + index) % size
+        labels = self._vocabulary.labels
+        return _make_event(
+            _from_epoch_micros(self._timestamps[slot]),
+            labels[self._emotions[slot]],
+            labels[self._contexts[slot]],
+            self._intensities[slot],
+        )
+
+    def oldest_fields(self):
+        """(emotion, context, intensity) of the oldest event."""
+        labels, slot = self._vocabulary.labels, self._start
+        return labels[self._emotions[slot]], labels[self._contexts[slot]], self._intensities[slot]
+
+    def raw_columns(self):
+        """The (emotion ids, context ids, intensities, timestamps) arrays in storage order, not oldest first."""
+        return self._emotions, self._contexts, self._intensities, self._timestamps
+
+    def timestamps(self):
+        """Epoch-microsecond timestamps, oldest first, as an indexable view (for bisect)."""
+        return _RingTimestamps(self)
+
+    def iter_fields(self):
+        """Yield (emotion, context, intensity) for every event, oldest first, without building event dicts."""
+        labels, size = self._vocabulary.labels, len(self)
+        for index in range(size):
+            slot = (self._start + index) % size
+            yield labels[self._emotions[slot]], labels[self._contexts[slot]], self._intensities[slot]
+
+    def append_event(self, timestamp, emotion, context, intensity):
+        """Append an event, overwriting the oldest one when full. Returns the interned (emotion, context) labels."""
+        intensity = _compact_intensity(intensity)  # Before any column is written, so they stay the same length
+        intern, labels = self._vocabulary.intern, self._vocabulary.labels
+        micros, emotion_id, context_id = _to_epoch_micros(timestamp), intern(emotion), intern(context)
+        if self.maxlen is None or len(self) < self.maxlen:
+            self._timestamps.append(micros)
+            self._emotions.append(emotion_id)
+            self._contexts.append(context_id)
+            self._intensities.append(intensity)
+            return labels[emotion_id], labels[context_id]
+        slot = self._start
+        self._timestamps[slot] = micros
+        self._emotions[slot] = emotion_id
+        self._contexts[slot] = context_id
+        self._intensities[slot] = intensity
+        self._start = (slot + 1) % self.maxlen
+        return labels[emotion_id], labels[context_id]
+
+
+class _RingTimestamps:
+    __slots__ = ("_ring",)
+
+    def __init__(self, ring):
+        self._ring = ring
+
+    def __len__(self):
+        return len(self._ring)
+
+    def __getitem__(self, index):
+        ring = self._ring
+        size = len(ring)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("timestamp index out of range")
+        return ring._timestamps[(ring._start + index) % size]
+
+
+def _event_fields(event):
+    return event['emotion'], event['context'], event['intensity']
+
+
+def _repeating_emotions(events):
+    emotion_context_map = defaultdict(set)
+    for event in events:
+        emotion_context_map[event['emotion']].add(event['context'])
+    return [emotion for emotion, contexts in emotion_context_map.items() if len(contexts) > 1]
+
+
+class EmotionalLoopDetector:
+    """Streaming detector of recurring emotion sequences (loops such as shame → anger → grief).
+
+    Every emotion n-gram of length ``min_length``..``max_length`` is counted as AiKeep events
+    arrive, so each event costs O(max_length) and queries never rescan history. N-grams of a
+    single repeated emotion are left to ``detect_repetition``.
+    """
+
+    def __init__(self, min_length=2, max_length=4):
+        self.min_length = min_length
+        self.max_length = max_length
+        self._recent = {}  # user_id -> (last max_length - 1 emotions, their timestamps)
+        self._loops = defaultdict(dict)  # user_id -> {emotion n-gram: [occurrences, first_seen, last_seen]}
+
+    def observe(self, user_id, event):
+        emotions, timestamps = self._recent.get(user_id, ((), ()))
+        emotions += (event['emotion'],)
+        timestamps += (event['timestamp'],)
+        loops = self._loops[user_id]
+        for length in range(self.min_length, min(self.max_length, len(emotions)) + 1):
+            loop = emotions[-length:]
+            if loop.count(loop[0]) == length:
+                continue
+            stats = loops.get(loop)
+            if stats is None:
+                loops[loop] = [1, timestamps[-length], timestamps[-1]]
+            else:
+                stats[0] += 1
+                stats[2] = timestamps[-1]
+        keep = 1 - self.max_length
+        self._recent[user_id] = (emotions[keep:], timestamps[keep:]) if keep else ((), ())
+
+    def observe_history(self, user_id, events):
+        """Seed the counts from existing history, e.g. a reopened TieredAiKeepStore."""
+        for event in events:
+            self.observe(user_id, event)
+
+    def top_loops(self, user_id, top=5, min_occurrences=2):
+        loops = self._loops.get(user_id)
+        if not loops:
+            return []
+        recurring = ((loop, stats) for loop, stats in loops.items() if stats[0] >= min_occurrences)
+        ranked = heapq.nlargest(top, recurring, key=lambda item: (item[1][0], len(item[0])))
+        return [
+            {"loop": list(loop), "occurrences": occurrences, "first_seen": first_seen, "last_seen": last_seen}
+            for loop, (occurrences, first_seen, last_seen) in ranked
+        ]
+
+
+class OverloadDetector:
+    """Online Compassionate Load Threshold over each user's memory window.
+
+    Keeps the number of high-intensity events and the multiset of their emotions,
+    updated in O(1) as events enter and leave the window.
+    """
+
+    name = "compassionate_load"
+
+    def __init__(self):
+        self._high = {}  # user_id -> [high-intensity events, {emotion: count among them}]
+        self.flagged = set()
+
+    def add(self, user_id, emotion, context, intensity):
+        if intensity < OVERLOAD_INTENSITY:
+            return
+        state = self._high.get(user_id)
+        if state is None:
+            state = self._high[user_id] = [0, {}]
+        state[0] += 1
+        state[1][emotion] = state[1].get(emotion, 0) + 1
+
+    def remove(self, user_id, emotion, context, intensity):
+        if intensity < OVERLOAD_INTENSITY:
+            return
+        state = self._high[user_id]
+        state[0] -= 1
+        emotions = state[1]
+        if emotions[emotion] == 1:
+            del emotions[emotion]
+        else:
+            emotions[emotion] -= 1
+        if not state[0]:
+            del self._high[user_id]
+
+    def active(self, user_id):
+        state = self._high.get(user_id)
+        return state is not None and state[0] >= OVERLOAD_MIN_EVENTS and len(state[1]) >= OVERLOAD_MIN_EMOTIONS
+
+
+class ConnectionGapDetector:
+    """Online Connection Gap Diagnostic over each user's memory window.
+
+    Keeps per-context event counts and the number of high-intensity events whose
+    context occurs once, updated in O(1) as events enter and leave the window.
+    """
+
+    name = "connection_gap"
+
+    def __init__(self):
+        self._contexts = {}  # user_id -> {context: [events, high-intensity events]}
+        self._unmirrored = defaultdict(int)  # user_id -> high-intensity events in contexts seen once
+        self.flagged = set()
+
+    def add(self, user_id, emotion, context, intensity):
+        contexts = self._contexts.get(user_id)
+        if contexts is None:
+            contexts = self._contexts[user_id] = {}
+        counts = contexts.get(context)
+        if counts is None:
+            counts = contexts[context] = [0, 0]
+        elif counts[0] == 1:
+            self._unmirrored[user_id] -= counts[1]
+        counts[0] += 1
+        counts[1] += intensity >= GAP_INTENSITY
+        if counts[0] == 1:
+            self._unmirrored[user_id] += counts[1]
+
+    def remove(self, user_id, emotion, context, intensity):
+        contexts = self._contexts[user_id]
+        counts = contexts[context]
+        if counts[0] == 1:
+            self._unmirrored[user_id] -= counts[1]
+        counts[0] -= 1
+        counts[1] -= intensity >= GAP_INTENSITY
+        if counts[0] == 1:
+            self._unmirrored[user_id] += counts[1]
+        elif not counts[0]:
+            del contexts[context]
+            if not contexts:
+                del self._contexts[user_id]
+                self._unmirrored.pop(user_id, None)
+
+    def active(self, user_id):
+        return self._unmirrored.get(user_id, 0) >= GAP_MIN_EVENTS
+
 
 class EmotionalMemoryLayer:
-    def __init__(self, max_memory_per_user=50):
-        self.user_memory = defaultdict(lambda: deque(maxlen=max_memory_per_user))
+    def __init__(self, max_memory_per_user=50, compact=False, aikeep_store=None, diagnostics_cache_size=10000,
+                 max_resident_events=None, spill_store=None):
+        # compact=True keeps user_memory in CompactEventRing buffers instead of deques of dicts;
+        # intensities must then be ints in the signed 16-bit range.
+        # aikeep_store replaces the in-RAM AiKeep lists, e.g. with a TieredAiKeepStore.
+        # max_resident_events caps the events held in user_memory across all users: past it, the
+        # least recently used users are moved to spill_store (a mapping of user_id -> bytes, a dict
+        # by default) and reloaded on their next access.
+        self.max_memory_per_user = max_memory_per_user
+        self.compact = compact
+        if compact:
+            self._vocabulary = _Vocabulary()
+            self.user_memory = defaultdict(lambda: CompactEventRing(self._vocabulary, maxlen=max_memory_per_user))
+        else:
+            self.user_memory = defaultdict(lambda: deque(maxlen=max_memory_per_user))
         self.emotion_disambiguation_map = {
             "happiness": ["joy", "excitement", "contentment"],
             "sadness": ["grief", "disappointment", "loneliness"],
@@ -141,29 +481,654 @@ class EmotionalMemoryLayer:
             "fear": ["anxiety", "dread", "worry"],
             "calm": ["numbness", "peace", "dissociation"],
         }
-        self.aikeep_store = defaultdict(list)  # For AiKeep™ deep memory
+        # Reverse index + fuzzy matcher over the map; rebuild through load_emotion_taxonomy after changing it
+        self.emotion_taxonomy = EmotionTaxonomy(self.emotion_disambiguation_map)
+        self.aikeep_store = defaultdict(list) if aikeep_store is None else aikeep_store  # For AiKeep™ deep memory
+
+        # Repetition index, kept in step with user_memory as events are appended and evicted:
+        # user_id -> {emotion: {context: refcount}} and user_id -> {emotion: array of event sequence numbers}
+        self._emotion_contexts = defaultdict(dict)
+        self._emotion_sequences = defaultdict(dict)
+        self._sequence = count()
+        self.loop_detector = EmotionalLoopDetector()
+
+        # Time index for windowed queries: epoch-microsecond timestamps parallel to each deque
+        # (compact rings carry their own), plus the users whose events arrived out of time order.
+        self._event_times = defaultdict(lambda: array('q'))
+        self._unordered_users = set()
+
+        # Per-user write versions, and an LRU of user_id -> (version, {diagnostic: result});
+        # an entry whose version is behind the user's is stale and gets recomputed.
+        self._versions = defaultdict(int)
+        self._diagnostics_cache = OrderedDict()
+        self.diagnostics_cache_size = diagnostics_cache_size
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+        # Online threshold detectors, attached with the first threshold listener
+        self.detectors = []
+        self._threshold_listeners = []  # (callback, event loop running when it was added, or None)
+        self._listener_tasks = set()  # Keeps scheduled coroutine listeners alive until they finish
+        # Population-wide views fed every recorded event: EmotionCooccurrence, EmotionalFingerprints
+        self.population_analytics = None
+        self.fingerprints = None
+        self._observers = []
+
+        # Long-term summaries of evicted events (user_id -> LongTermSummary), once enabled
+        self._summaries = None
+        self._summary_options = {}
+
+        # Residency: users in least-recently-used order, only tracked under a memory budget
+        self.max_resident_events = max_resident_events
+        self.spill_store = {} if spill_store is None else spill_store
+        self._lru = OrderedDict() if max_resident_events is not None else None
+        self._resident_events = 0
+        self._evictions = 0
+        self._reloads = 0
 
     def record_emotional_event(self, user_id, emotion, context, intensity, aikeep=False):
-        event = {
-            'timestamp': datetime.datetime.now().isoformat(),
-            'emotion': emotion,
-            'context': context,
-            'intensity': intensity
-        }
-        self.user_memory[user_id].append(event)
+        timestamp = datetime.datetime.now()
+        event = self._append_event(user_id, timestamp, emotion, context, intensity)
+        if self._observers:
+            micros = _to_epoch_micros(timestamp)
+            for observer in self._observers:
+                observer.observe(user_id, emotion, context, intensity, micros)
         if aikeep:
-            self.aikeep_store[user_id].append(event)
+            self._keep_event(user_id, event or _make_event(timestamp, emotion, context, intensity))
 
-    def detect_repetition(self, user_id):
-        emotion_context_map = defaultdict(set)
-        memory = self.user_memory[user_id]
-        for event in memory:
-            emotion_context_map[event['emotion']].add(event['context'])
-        repeating = [emotion for emotion, contexts in emotion_context_map.items() if len(contexts) > 1]
+    def _keep_event(self, user_id, event):
+        self.aikeep_store[user_id].append(event)
+        self.loop_detector.observe(user_id, event)
+
+    def _append_event(self, user_id, timestamp, emotion, context, intensity):
+        """Append to user_memory and keep the derived indexes in step with eviction.
+
+        Returns the stored event dict, or None when nothing was materialized
+        (compact storage, or a zero-length memory).
+        """
+        if self.compact:
+            intensity = _compact_intensity(intensity)
+        memory = self._user_memory(user_id, create=True)
+        micros = _to_epoch_micros(timestamp)
+        if memory.maxlen == 0:
+            if self._summaries is not None:
+                self._absorb(user_id, micros, emotion, context, intensity)
+            return None
+        evicted = None
+        full = len(memory) == memory.maxlen
+        times = self._timestamps(user_id, memory)
+        if full:
+            evicted = memory.oldest_fields() if self.compact else _event_fields(memory[0])
+            if self._summaries is not None:
+                self._absorb(user_id, times[0], *evicted)
+        self._note_time_order(user_id, times, micros)
+        if self.compact:
+            event = None
+            emotion, context = memory.append_event(timestamp, emotion, context, intensity)
+        else:
+            event = _make_event(timestamp, emotion, context, intensity)
+            memory.append(event)
+            if full:
+                del times[0]
+            times.append(micros)
+        if evicted is not None:
+            self._unindex_event(user_id, *evicted)
+        self._index_event(user_id, emotion, context, intensity)
+        if self.detectors:
+            self._check_thresholds(user_id)
+        if self._lru is not None and not full:
+            self._grew(user_id, 1)
+        return event
+
+    def record_emotional_events_bulk(self, events=None, *, user_ids=None, emotions=None, contexts=None,
+                                     intensities=None, timestamps=None, aikeep=None):
+        """Record many events at once; same end state as calling record_emotional_event for each in order.
+
+        Pass either ``events``, an iterable of ``(user_id, emotion, context, intensity[, aikeep[, timestamp]])``
+        tuples, or columnar sequences (lists, arrays, NumPy arrays) of equal length:
+        ``user_ids``, ``emotions``, ``contexts``, ``intensities`` and optionally ``timestamps``
+        (datetimes) and ``aikeep`` flags. Events are grouped by user, and only the ones that
+        survive ``max_memory_per_user`` truncation are written to user_memory. Events without a
+        timestamp share a single ``now``. Returns the number of events recorded. With compact
+        storage every intensity is checked first, so a batch with one that does not fit records nothing.
+        """
+        now = datetime.datetime.now()
+        if events is not None:
+            if user_ids is not None:
+                raise TypeError("pass either events or columns, not both")
+            rows = (
+                (event[0], event[1], event[2], event[3], len(event) > 4 and event[4], event[5] if len(event) > 5 else now)
+                for event in events
+            )
+        else:
+            columns = [user_ids, emotions, contexts, intensities]
+            if any(column is None for column in columns):
+                raise TypeError("user_ids, emotions, contexts and intensities are required")
+            columns += [repeat(False) if aikeep is None else aikeep, repeat(now) if timestamps is None else timestamps]
+            columns = [column.tolist() if hasattr(column, "tolist") else column for column in columns]
+            if len({len(column) for column in columns if not isinstance(column, repeat)}) > 1:
+                raise ValueError("columns must all have the same length")
+            rows = zip(*columns)
+
+        by_user = defaultdict(list)
+        if self.compact:
+            for row in rows:
+                by_user[row[0]].append(row[:3] + (_compact_intensity(row[3]),) + row[4:])
+        else:
+            for row in rows:
+                by_user[row[0]].append(row)
+
+        now_iso = now.isoformat()
+        recorded = 0
+        for user_id, user_rows in by_user.items():
+            recorded += len(user_rows)
+            self._record_user_rows(user_id, user_rows, now, now_iso)
+        return recorded
+
+    def _record_user_rows(self, user_id, user_rows, now, now_iso):
+        """Apply one user's share of a bulk batch, in order."""
+        maxlen = self.max_memory_per_user
+        if maxlen is None:
+            survivors = user_rows
+        else:
+            survivors = user_rows[-maxlen:] if maxlen else []
+        first_survivor = len(user_rows) - len(survivors)
+        stored = []
+        observers = self._observers
+        memory = self._user_memory(user_id, create=True)
+        resident = len(memory)
+        overflow = len(memory) + len(survivors) - maxlen if maxlen is not None else 0
+        if overflow > 0 and self._summaries is not None:
+            # Sequential appends would evict these first, then the rows truncated below
+            times = self._timestamps(user_id, memory)
+            evicted = islice(memory.iter_fields(), overflow) if self.compact else (
+                _event_fields(event) for event in islice(memory, overflow))
+            for position, fields in enumerate(list(evicted)):
+                self._absorb(user_id, times[position], *fields)
+        for position, (_, emotion, context, intensity, keep, timestamp) in enumerate(user_rows):
+            if observers:
+                micros = _to_epoch_micros(timestamp)
+                for observer in observers:
+                    observer.observe(user_id, emotion, context, intensity, micros)
+            if position < first_survivor and self._summaries is not None:
+                self._absorb(user_id, _to_epoch_micros(timestamp), emotion, context, intensity)
+            if not keep and (self.compact or position < first_survivor):
+                continue
+            event = {
+                'timestamp': now_iso if timestamp is now else timestamp.isoformat(),
+                'emotion': emotion,
+                'context': context,
+                'intensity': intensity
+            }
+            if keep:
+                self._keep_event(user_id, event)
+            if not self.compact and position >= first_survivor:
+                stored.append(event)
+        if not survivors:
+            return
+
+        if overflow > 0:
+            evicted = islice(memory.iter_fields(), overflow) if self.compact else (
+                _event_fields(event) for event in islice(memory, overflow))
+            for fields in list(evicted):
+                self._unindex_event(user_id, *fields)
+        times = self._timestamps(user_id, memory)
+        if self.compact:
+            append = memory.append_event
+            for _, emotion, context, intensity, _, timestamp in survivors:
+                self._note_time_order(user_id, times, _to_epoch_micros(timestamp))
+                emotion, context = append(timestamp, emotion, context, intensity)
+                self._index_event(user_id, emotion, context, intensity)
+        else:
+            if overflow > 0:
+                del times[:overflow]
+            for row in survivors:
+                micros = _to_epoch_micros(row[5])
+                self._note_time_order(user_id, times, micros)
+                times.append(micros)
+            memory.extend(stored)
+            for event in stored:
+                self._index_event(user_id, *_event_fields(event))
+        # A batch fires each listener at most once per user, on the user's final state
+        if self.detectors:
+            self._check_thresholds(user_id)
+        if self._lru is not None:
+            self._grew(user_id, len(memory) - resident)
+
+    def users(self):
+        """Every user with stored memory, resident or spilled."""
+        users = list(self.user_memory)
+        if self._lru is not None:
+            users.extend(user_id for user_id in list(self.spill_store) if user_id not in self.user_memory)
+        return users
+
+    def residency_info(self):
+        return {
+            "resident_users": len(self.user_memory),
+            "resident_events": self._resident_events,
+            "spilled_users": len(self.spill_store),
+            "evictions": self._evictions,
+            "reloads": self._reloads,
+            "max_resident_events": self.max_resident_events,
+        }
+
+    def _user_memory(self, user_id, create=False):
+        """The user's memory, reloaded if it was spilled; None for unknown users unless ``create``."""
+        memory = self.user_memory.get(user_id)
+        if self._lru is None:
+            if memory is None and create:
+                memory = self.user_memory[user_id]
+            return memory
+        if memory is None:
+            payload = self.spill_store.pop(user_id, None)
+            if payload is not None:
+                memory = self._reload(user_id, payload)
+                self._touch(user_id)
+                self._grew(user_id, len(memory))
+                return memory
+            if not create:
+                return None
+            memory = self.user_memory[user_id]
+        self._touch(user_id)
+        return memory
+
+    def _touch(self, user_id):
+        self._lru[user_id] = None
+        self._lru.move_to_end(user_id)
+
+    def _grew(self, user_id, events):
+        """Account for ``events`` new resident events and spill idle users while over budget."""
+        self._resident_events += events
+        # user_id was just touched, so it is the last one standing
+        while self._resident_events > self.max_resident_events and len(self._lru) > 1:
+            self._spill_user(next(iter(self._lru)))
+
+    def _spill_user(self, user_id):
+        """Move a user's events to the spill store and drop their indexes; their write version stays."""
+        memory = self.user_memory.pop(user_id)
+        fields = list(memory.iter_fields()) if self.compact else [_event_fields(event) for event in memory]
+        payload = (list(self._timestamps(user_id, memory)), fields, user_id in self._unordered_users)
+        for event_fields in fields:
+            self._unindex_event(user_id, *event_fields)
+        self._emotion_contexts.pop(user_id, None)
+        self._emotion_sequences.pop(user_id, None)
+        self._event_times.pop(user_id, None)
+        self._unordered_users.discard(user_id)
+        self.spill_store[user_id] = pickle.dumps(payload, pickle.HIGHEST_PROTOCOL)
+        del self._lru[user_id]
+        self._resident_events -= len(fields)
+        self._evictions += 1
+
+    def _reload(self, user_id, payload):
+        """Rebuild a spilled user's memory and indexes; threshold listeners do not fire."""
+        memory, times, unordered = self._decode_spilled(payload)
+        self.user_memory[user_id] = memory
+        if times is not None:
+            self._event_times[user_id] = times
+        if unordered:
+            self._unordered_users.add(user_id)
+        version = self._versions[user_id]
+        for event_fields in (memory.iter_fields() if self.compact else map(_event_fields, memory)):
+            self._index_event(user_id, *event_fields)
+        self._versions[user_id] = version
+        self._reloads += 1
+        return memory
+
+    def _decode_spilled(self, payload):
+        """(memory, time index or None for compact rings, unordered flag) from a spill payload."""
+        times, fields, unordered = pickle.loads(payload)
+        memory, times = self._build_memory(times, fields)
+        return memory, times, unordered
+
+    def _build_memory(self, times, fields):
+        """(memory, time index or None for compact rings) holding the given events, oldest first."""
+        if self.compact:
+            memory = CompactEventRing(self._vocabulary, maxlen=self.max_memory_per_user)
+            for micros, (emotion, context, intensity) in zip(times, fields):
+                memory.append_event(_from_epoch_micros(micros), emotion, context, intensity)
+            return memory, None
+        memory = deque(
+            (_make_event(_from_epoch_micros(micros), *event_fields) for micros, event_fields in zip(times, fields)),
+            maxlen=self.max_memory_per_user,
+        )
+        return memory, array('q', times)
+
+    def _replace_memory(self, user_id, times, fields):
+        """Swap a user's memory for the given events, oldest first, keeping the indexes in step.
+
+        Observers and summaries are not fed; threshold listeners fire on the new state.
+        """
+        maxlen = self.max_memory_per_user
+        if maxlen is not None and len(times) > maxlen:
+            times, fields = times[len(times) - maxlen:], fields[len(fields) - maxlen:]
+        old = self._user_memory(user_id)
+        resident = 0
+        if old is not None:
+            resident = len(old)
+            for event_fields in (old.iter_fields() if self.compact else map(_event_fields, old)):
+                self._unindex_event(user_id, *event_fields)
+            self._emotion_contexts.pop(user_id, None)
+            self._emotion_sequences.pop(user_id, None)
+            self._unordered_users.discard(user_id)
+        memory, index = self._build_memory(times, fields)
+        self.user_memory[user_id] = memory
+        if index is not None:
+            self._event_times[user_id] = index
+        if any(later < earlier for earlier, later in zip(times, times[1:])):
+            self._unordered_users.add(user_id)
+        for event_fields in (memory.iter_fields() if self.compact else map(_event_fields, memory)):
+            self._index_event(user_id, *event_fields)
+        if self.detectors:
+            self._check_thresholds(user_id)
+        if self._lru is not None:
+            self._touch(user_id)
+            self._grew(user_id, len(memory) - resident)
+
+    def _scanned_memory(self, user_id):
+        """A user's memory for a read-only scan: resident, or decoded from the spill store without reloading."""
+        memory = self.user_memory.get(user_id)
+        if memory is None and self._lru is not None:
+            payload = self.spill_store.get(user_id)
+            if payload is not None:
+                memory = self._decode_spilled(payload)[0]
+        return memory
+
+    def _memory_snapshot(self, user_id):
+        """(epoch-microsecond timestamps, (emotion, context, intensity) fields) of a user's memory, oldest first.
+
+        A spilled user is read from the spill store without being reloaded.
+        """
+        memory = self.user_memory.get(user_id)
+        if memory is None:
+            payload = self.spill_store.get(user_id) if self._lru is not None else None
+            if payload is None:
+                return [], []
+            times, fields, _ = pickle.loads(payload)
+            return times, fields
+        fields = list(memory.iter_fields()) if self.compact else [_event_fields(event) for event in memory]
+        return list(self._timestamps(user_id, memory)), fields
+
+    def enable_population_analytics(self, window=4, context_buckets=1024, half_life=None):
+        """Start maintaining population-wide EmotionCooccurrence matrices, seeded from the resident memory.
+
+        Every event recorded from then on, including ones a bulk batch truncates, is counted.
+        Returns the EmotionCooccurrence; it is also kept as ``population_analytics``.
+        """
+        self.population_analytics = self._add_observer(EmotionCooccurrence(window, context_buckets, half_life))
+        return self.population_analytics
+
+    def enable_fingerprints(self, **options):
+        """Start maintaining an EmotionalFingerprints vector per user, seeded from the resident memory.
+
+        ``options`` go to EmotionalFingerprints. Returns it; it is also kept as ``fingerprints``.
+        """
+        self.fingerprints = self._add_observer(EmotionalFingerprints(**options))
+        return self.fingerprints
+
+    def similar_users(self, user_id, k=10):
+        """The ``k`` users whose emotional fingerprints are closest to this user's, as (user_id, similarity) pairs."""
+        if self.fingerprints is None:
+            raise RuntimeError("call enable_fingerprints() first")
+        return self.fingerprints.nearest(user_id, k)
+
+    def enable_long_term_summaries(self, **options):
+        """Summarize every event that falls out of a user's memory from now on, instead of dropping it.
+
+        ``options`` go to each user's LongTermSummary. Summaries are constant-size and stay resident
+        while their users are spilled. Diagnostics read them when called with ``lifetime=True``.
+        """
+        if self._summaries is None:
+            self._summaries = {}
+        self._summary_options = options
+
+    def long_term_summary(self, user_id):
+        """Aggregates over the events evicted from the user's memory (see LongTermSummary.as_dict), or None."""
+        summary = self._summaries.get(user_id) if self._summaries is not None else None
+        return summary.as_dict() if summary is not None else None
+
+    def context_frequency(self, user_id, context):
+        """How many of the user's events were logged in ``context``.
+
+        Resident events are counted exactly; with long-term summaries enabled, evicted ones are
+        added from the summary's CountMin sketch, which may overcount but never undercounts.
+        """
+        memory = self._user_memory(user_id)
+        count = 0
+        if memory:
+            fields = memory.iter_fields() if self.compact else map(_event_fields, memory)
+            count = sum(1 for _, event_context, _ in fields if event_context == context)
+        summary = self._summaries.get(user_id) if self._summaries is not None else None
+        return count + summary.context_count(context) if summary is not None else count
+
+    def _absorb(self, user_id, micros, emotion, context, intensity):
+        summary = self._summaries.get(user_id)
+        if summary is None:
+            summary = self._summaries[user_id] = LongTermSummary(**self._summary_options)
+        summary.absorb(emotion, context, intensity, micros)
+        self._versions[user_id] += 1  # Lifetime diagnostics depend on the summary too
+
+    def _add_observer(self, observer):
+        """Feed ``observer`` the resident memory, then every event recorded from now on."""
+        for user_id, memory in list(self.user_memory.items()):
+            times = self._timestamps(user_id, memory)
+            fields = memory.iter_fields() if self.compact else map(_event_fields, memory)
+            for micros, (emotion, context, intensity) in zip(times, fields):
+                observer.observe(user_id, emotion, context, intensity, micros)
+        self._observers.append(observer)
+        return observer
+
+    def add_threshold_listener(self, callback):
+        """Call ``callback(user_id, diagnostic, active)`` whenever a user crosses a threshold.
+
+        ``diagnostic`` is ``"compassionate_load"`` or ``"connection_gap"``; ``active`` is True when
+        the user enters that state and False when they leave it. Coroutine functions must be added
+        from a running event loop; they are scheduled on that loop, whichever thread records the
+        event. The first listener attaches the online detectors, seeded from the current memory
+        without firing.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            if inspect.iscoroutinefunction(callback):
+                raise RuntimeError("coroutine threshold listeners must be added from a running event loop") from None
+            loop = None
+        if not self.detectors:
+            self.detectors = [OverloadDetector(), ConnectionGapDetector()]
+            for user_id, memory in self.user_memory.items():
+                fields = memory.iter_fields() if self.compact else map(_event_fields, memory)
+                for emotion, context, intensity in fields:
+                    for detector in self.detectors:
+                        detector.add(user_id, emotion, context, intensity)
+                for detector in self.detectors:
+                    if detector.active(user_id):
+                        detector.flagged.add(user_id)
+        self._threshold_listeners.append((callback, loop))
+
+    def remove_threshold_listener(self, callback):
+        for index, (listener, _) in enumerate(self._threshold_listeners):
+            if listener == callback:
+                del self._threshold_listeners[index]
+                return
+        raise ValueError("threshold listener not found")
+
+    def _check_thresholds(self, user_id):
+        for detector in self.detectors:
+            active = detector.active(user_id)
+            if active == (user_id in detector.flagged):
+                continue
+            if active:
+                detector.flagged.add(user_id)
+            else:
+                detector.flagged.discard(user_id)
+            for listener, loop in list(self._threshold_listeners):
+                result = listener(user_id, detector.name, active)
+                if inspect.isawaitable(result):
+                    self._schedule_listener(loop, result)
+
+    def _schedule_listener(self, loop, awaitable):
+        """Run a listener's awaitable on ``loop`` from any thread; never raises into the write path."""
+        def spawn():
+            task = asyncio.ensure_future(awaitable, loop=loop)
+            self._listener_tasks.add(task)
+            task.add_done_callback(self._listener_tasks.discard)
+
+        try:
+            if loop is None:
+                raise RuntimeError("listener was added outside an event loop")
+            loop.call_soon_threadsafe(spawn)
+        except RuntimeError as exc:  # No loop, or it has been closed
+            if inspect.iscoroutine(awaitable):
+                awaitable.close()
+            warnings.warn(f"threshold listener result dropped: {exc}", RuntimeWarning, stacklevel=2)
+
+    def _timestamps(self, user_id, memory):
+        return memory.timestamps() if self.compact else self._event_times[user_id]
+
+    def _note_time_order(self, user_id, times, micros):
+        """Flag users whose next event is older than their newest one; their windows fall back to a scan."""
+        if times and micros < times[-1]:
+            self._unordered_users.add(user_id)
+
+    def _events_in_window(self, user_id, since=None, until=None, last=None):
+        """Events with ``since <= timestamp < until`` (``last`` is shorthand for ``since=now - last``), oldest first.
+
+        Bisects the time index, so a window costs O(log n + k) for users whose events arrived in
+        time order. Without bounds this is the whole memory. Unknown users are not allocated.
+        """
+        memory = self._user_memory(user_id)
+        if not memory:
+            return []
+        if last is not None:
+            if since is not None:
+                raise TypeError("pass either since or last, not both")
+            since = datetime.datetime.now() - last
+        if since is None and until is None:
+            return list(memory)
+        low = _to_epoch_micros(since) if since is not None else None
+        high = _to_epoch_micros(until) if until is not None else None
+        times = self._timestamps(user_id, memory)
+        if user_id in self._unordered_users:
+            return [
+                event for event, micros in zip(memory, times)
+                if (low is None or micros >= low) and (high is None or micros < high)
+            ]
+        start = bisect_left(times, low) if low is not None else 0
+        stop = bisect_left(times, high) if high is not None else len(times)
+        if start >= stop:
+            return []
+        if self.compact:
+            return [memory[index] for index in range(start, stop)]
+        # Walk the deque from whichever end is closer to the window
+        if start > len(memory) - stop:
+            window = list(islice(reversed(memory), len(memory) - stop, len(memory) - start))
+            window.reverse()
+            return window
+        return list(islice(memory, start, stop))
+
+    def _index_event(self, user_id, emotion, context, intensity):
+        self._versions[user_id] += 1
+        contexts = self._emotion_contexts[user_id].setdefault(emotion, {})
+        contexts[context] = contexts.get(context, 0) + 1
+        self._emotion_sequences[user_id].setdefault(emotion, array('q')).append(next(self._sequence))
+        for detector in self.detectors:
+            detector.add(user_id, emotion, context, intensity)
+
+    def _unindex_event(self, user_id, emotion, context, intensity):
+        for detector in self.detectors:
+            detector.remove(user_id, emotion, context, intensity)
+        # Evictions are FIFO, so the evicted event is always the oldest one of its emotion.
+        emotion_contexts = self._emotion_contexts[user_id]
+        contexts = emotion_contexts[emotion]
+        if contexts[context] == 1:
+            del contexts[context]
+        else:
+            contexts[context] -= 1
+        sequences = self._emotion_sequences[user_id]
+        del sequences[emotion][0]  # At most max_memory_per_user entries; cheaper to hold than a deque
+        if not contexts:
+            del emotion_contexts[emotion]
+            del sequences[emotion]
+
+    def detect_repetition(self, user_id, since=None, until=None, last=None, lifetime=False):
+        """Emotions felt in more than one context, in order of their oldest event.
+
+        With ``lifetime=True`` the user's long-term summary counts as well: emotions that repeat
+        across evicted and resident events follow the resident ones, heaviest first.
+        """
+        if since is not None or until is not None or last is not None:
+            return _repeating_emotions(self._events_in_window(user_id, since, until, last))
+        if self._lru is not None:
+            self._user_memory(user_id)
+        emotion_contexts = self._emotion_contexts.get(user_id)
+        repeating = []
+        if emotion_contexts:
+            sequences = self._emotion_sequences[user_id]
+            repeating = [emotion for emotion, contexts in emotion_contexts.items() if len(contexts) > 1]
+            # Same order as a scan of the deque: by each emotion's oldest surviving event
+            repeating.sort(key=lambda emotion: sequences[emotion][0])
+        summary = self._summaries.get(user_id) if lifetime and self._summaries is not None else None
+        if summary is not None:
+            seen = set(repeating)
+            repeating.extend(
+                emotion for emotion in summary.repeating_emotions(emotion_contexts) if emotion not in seen
+            )
         return repeating
 
-    def suggest_reflection(self, user_id):
-        repeating_emotions = self.detect_repetition(user_id)
+    def write_version(self, user_id):
+        """Counter bumped by every event stored in the user's memory; usable as a cache validator."""
+        return self._versions.get(user_id, 0)
+
+    def _cached(self, user_id, name, compute):
+        """Return compute(user_id), memoized until the user's next write. Cached results are shared; treat them as read-only."""
+        if not self.diagnostics_cache_size or not self._known(user_id):
+            return compute(user_id)
+        version = self._versions.get(user_id, 0)
+        entry = self._diagnostics_cache.get(user_id)
+        if entry is not None and entry[0] == version:
+            self._diagnostics_cache.move_to_end(user_id)
+            results = entry[1]
+            if name in results:
+                self._cache_hits += 1
+                return results[name]
+        else:
+            results = {}
+        self._cache_misses += 1
+        result = results[name] = compute(user_id)
+        self._diagnostics_cache[user_id] = (version, results)
+        self._diagnostics_cache.move_to_end(user_id)
+        if len(self._diagnostics_cache) > self.diagnostics_cache_size:
+            self._diagnostics_cache.popitem(last=False)
+        return result
+
+    def _known(self, user_id):
+        """Whether ``user_id`` has ever stored an event or holds memory; reads of anyone else allocate nothing."""
+        return (
+            user_id in self._versions
+            or user_id in self.user_memory
+            or (self._lru is not None and user_id in self.spill_store)
+        )
+
+    def diagnostics_cache_info(self):
+        return {
+            "hits": self._cache_hits,
+            "misses": self._cache_misses,
+            "users": len(self._diagnostics_cache),
+            "maxsize": self.diagnostics_cache_size,
+        }
+
+    def clear_diagnostics_cache(self):
+        self._diagnostics_cache.clear()
+
+    def suggest_reflection(self, user_id, lifetime=False):
+        if lifetime:
+            return self._cached(user_id, "suggest_reflection:lifetime", self._suggest_lifetime_reflection)
+        return self._cached(user_id, "suggest_reflection", self._suggest_reflection)
+
+    def _suggest_lifetime_reflection(self, user_id):
+        return self._suggest_reflection(user_id, lifetime=True)
+
+    def _suggest_reflection(self, user_id, lifetime=False):
+        repeating_emotions = self.detect_repetition(user_id, lifetime=lifetime)
         if not repeating_emotions:
             return None
         return [
@@ -171,8 +1136,16 @@ class EmotionalMemoryLayer:
             for emotion in repeating_emotions
         ]
 
+    def recurring_loops(self, user_id, top=5):
+        """Most frequent emotion sequences across the user's whole AiKeep history, with when they were first and last seen."""
+        return self.loop_detector.top_loops(user_id, top)
+
     def emotional_cycle_completion(self, user_id):
-        memory = list(self.user_memory[user_id])[-1] if self.user_memory[user_id] else None
+        return self._cached(user_id, "emotional_cycle_completion", self._emotional_cycle_completion)
+
+    def _emotional_cycle_completion(self, user_id):
+        events = self._user_memory(user_id)
+        memory = events[-1] if events else None
         if not memory:
             return "No recent emotional memory available."
 
@@ -187,18 +1160,35 @@ class EmotionalMemoryLayer:
             "Release": "What no longer needs to be carried? What small action could help free this emotional loop?"
         }
 
+    def load_emotion_taxonomy(self, tree, aliases=None):
+        """Replace the disambiguation map with a taxonomy: bases mapped to sub-emotion lists or nested mappings.
+
+        ``aliases`` maps extra labels, such as translations, to labels in the tree.
+        """
+        self.emotion_disambiguation_map = tree
+        self.emotion_taxonomy = EmotionTaxonomy(tree, aliases)
+        self.clear_diagnostics_cache()  # emotional_cycle_completion embeds disambiguations
+
     def disambiguate_emotion(self, emotion):
-        for base, sub_emotions in self.emotion_disambiguation_map.items():
-            if emotion == base:
-                return f"'{emotion}' may be too general. Could it actually be one of: {', '.join(sub_emotions)}?"
-            elif emotion in sub_emotions:
-                return f"'{emotion}' is a more nuanced form of '{base}'. Great emotional clarity."
-        return f"'{emotion}' is either well-defined or not in the disambiguation map."
-
-    def connection_gap_diagnostic(self, user_id):
-        memory = list(self.user_memory[user_id])
+        # Misspellings and free text ("kinda anxious") resolve to the closest label
+        return self.emotion_taxonomy.describe(emotion)
+
+    def connection_gap_diagnostic(self, user_id, since=None, until=None, last=None, lifetime=False):
+        """With ``lifetime=True`` a context only counts as unmirrored if the long-term summary has never seen it either."""
+        if since is None and until is None and last is None:
+            if lifetime:
+                return self._cached(user_id, "connection_gap_diagnostic:lifetime", self._lifetime_connection_gap)
+            return self._cached(user_id, "connection_gap_diagnostic", self._connection_gap_diagnostic)
+        return self._connection_gap_diagnostic(user_id, since, until, last, lifetime)
+
+    def _lifetime_connection_gap(self, user_id):
+        return self._connection_gap_diagnostic(user_id, lifetime=True)
+
+    def _connection_gap_diagnostic(self, user_id, since=None, until=None, last=None, lifetime=False):
+        memory = self._events_in_window(user_id, since, until, last)
         if not memory:
             return None
+        summary = self._summaries.get(user_id) if lifetime and self._summaries is not None else None
 
         # Correct context counting logic
         context_counts = {}
@@ -208,9 +1198,10 @@ class EmotionalMemoryLayer:
 
         high_intensity_unique_contexts = [
             event for event in memory
-            if event['intensity'] >= 6 and context_counts[event['context']] == 1
+            if event['intensity'] >= GAP_INTENSITY and context_counts[event['context']] == 1
+            and (summary is None or not summary.seen_context(event['context']))
         ]
-        if len(high_intensity_unique_contexts) >= 3:
+        if len(high_intensity_unique_contexts) >= GAP_MIN_EVENTS:
             return (
                 "You've logged multiple emotionally intense experiences that appear unmirrored in your environment.\n"
                 "This may suggest a Connection Gap — not because you're unseen, but because your emotional development may exceed those around you.\n"
@@ -218,15 +1209,21 @@ class EmotionalMemoryLayer:
             )
         return None
 
-    def compassionate_load_check(self, user_id):
-        memory = list(self.user_memory[user_id])
+    def compassionate_load_check(self, user_id, since=None, until=None, last=None):
+        # Overload is about what the user carries now, so it never reads the long-term summary
+        if since is None and until is None and last is None:
+            return self._cached(user_id, "compassionate_load_check", self._compassionate_load_check)
+        return self._compassionate_load_check(user_id, since, until, last)
+
+    def _compassionate_load_check(self, user_id, since=None, until=None, last=None):
+        memory = self._events_in_window(user_id, since, until, last)
         if not memory:
             return None
 
-        high_intensity = [e for e in memory if e['intensity'] >= 7]
+        high_intensity = [e for e in memory if e['intensity'] >= OVERLOAD_INTENSITY]
         unique_emotions = set(e['emotion'] for e in high_intensity)
 
-        if len(high_intensity) >= 5 and len(unique_emotions) >= 3:
+        if len(high_intensity) >= OVERLOAD_MIN_EVENTS and len(unique_emotions) >= OVERLOAD_MIN_EMOTIONS:
             return (
                 "You may be reaching an emotional storage limit. What you're feeling may not be a breakdown, but an overload.\n"
                 "Your system is trying to signal for relief, not punishment.\n"
@@ -234,6 +1231,64 @@ class EmotionalMemoryLayer:
             )
         return None
 
+    def memory_columns(self, user_ids=None):
+        """Columnar NumPy view of user_memory for population-wide scans.
+
+        Returns ``(user_ids, columns)`` where ``columns`` holds one entry per event:
+        ``user`` (index into user_ids), ``emotion`` and ``context`` (integer codes) and
+        ``intensity``. Event order within a user is not preserved. Unknown users are kept
+        in user_ids with no events and are not added to user_memory; spilled users are
+        read from the spill store without being reloaded.
+        """
+        if np is None:
+            raise ImportError("memory_columns requires NumPy")
+        user_ids = self.users() if user_ids is None else list(user_ids)
+        memories = [self._scanned_memory(user_id) or () for user_id in user_ids]
+        lengths = np.fromiter((len(memory) for memory in memories), dtype=np.int64, count=len(memories))
+        columns = {'user': np.repeat(np.arange(len(user_ids)), lengths)}
+        if self.compact:
+            rings = [memory for memory in memories if memory]
+            for name, position, dtype in (('emotion', 0, np.uint32), ('context', 1, np.uint32), ('intensity', 2, np.int16)):
+                columns[name] = np.concatenate(
+                    [np.frombuffer(ring.raw_columns()[position], dtype=dtype) for ring in rings] or [np.empty(0, dtype)]
+                ).astype(np.int64)
+            return user_ids, columns
+
+        codes = {}
+        events = [event for memory in memories for event in memory]
+        columns['emotion'] = np.fromiter((codes.setdefault(e['emotion'], len(codes)) for e in events), np.int64, len(events))
+        columns['context'] = np.fromiter((codes.setdefault(e['context'], len(codes)) for e in events), np.int64, len(events))
+        columns['intensity'] = np.fromiter((e['intensity'] for e in events), np.float64, len(events))
+        return user_ids, columns
+
+    def population_diagnostics(self, user_ids=None):
+        """Evaluate compassionate_load_check and connection_gap_diagnostic for many users in one NumPy pass.
+
+        Scans every user (resident or spilled), or just ``user_ids``, with the same thresholds as the
+        per-user checks. Returns ``{"compassionate_load": ids, "connection_gap": ids}``, each an
+        object array of the flagged user ids.
+        """
+        user_ids, columns = self.memory_columns(user_ids)
+        user_count = len(user_ids)
+        users, emotions, contexts, intensities = columns['user'], columns['emotion'], columns['context'], columns['intensity']
+        code_count = int(max(emotions.max(initial=0), contexts.max(initial=0))) + 1
+        ids = np.empty(user_count, dtype=object)
+        ids[:] = user_ids
+
+        # Compassionate load: high-intensity event count and distinct emotions among them, per user
+        high = intensities >= OVERLOAD_INTENSITY
+        high_events = np.bincount(users[high], minlength=user_count)
+        user_emotions = np.unique(users[high] * code_count + emotions[high])
+        high_emotions = np.bincount(user_emotions // code_count, minlength=user_count)
+        overloaded = (high_events >= OVERLOAD_MIN_EVENTS) & (high_emotions >= OVERLOAD_MIN_EMOTIONS)
+
+        # Connection gap: high-intensity events whose context occurs once for that user
+        _, inverse, context_counts = np.unique(users * code_count + contexts, return_inverse=True, return_counts=True)
+        unmirrored = (intensities >= GAP_INTENSITY) & (context_counts[inverse.ravel()] == 1)
+        gaps = np.bincount(users[unmirrored], minlength=user_count) >= GAP_MIN_EVENTS
+
+        return {"compassionate_load": ids[overloaded], "connection_gap": ids[gaps]}
+
     # --- CONTINUUM SYNC™ ACTIVATION MOCK ---
     @staticmethod
     def continuum_sync_activation():
@@ -0,0 +1,198 @@
+"""
+Latency instrumentation for the Emotional Memory Layer, exported as Prometheus text.
+
+instrument_layer() wraps the public methods of one EmotionalMemoryLayer instance
+(including a ConcurrentEmotionalMemoryLayer) so every call lands in a latency
+histogram labelled by method, and registers gauges for the users and events
+resident in memory. The asyncio and sharded front-ends hold no memory of their
+own and are refused: instrument the layer behind an AsyncEmotionalMemoryLayer
+(its ``layer``) instead. Only the instance is patched: an uninstrumented layer
+runs the plain class methods, so instrumentation that is switched off costs nothing.
+
+    registry = MetricsRegistry()
+    instrument_layer(eml, registry)
+    eml.record_emotional_event("user_001", "shame", "work presentation", 7)
+    print(registry.render())
+"""
+
+import functools
+import threading
+import time
+from bisect import bisect_left
+
+# Seconds; the layer's calls are mostly microseconds, population scans reach seconds
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+INSTRUMENTED_METHODS = (
+    "record_emotional_event",
+    "record_emotional_events_bulk",
+    "detect_repetition",
+    "suggest_reflection",
+    "recurring_loops",
+    "emotional_cycle_completion",
+    "disambiguate_emotion",
+    "connection_gap_diagnostic",
+    "compassionate_load_check",
+    "population_diagnostics",
+)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Histogram:
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(values, list(counts), total) for values, (counts, total) in self._series.items()]
+        for values, counts, total in sorted(series):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.labels + ("le",), values + (le,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, values)
+            lines.append(f"{self.name}_sum{labels} {total!r}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge:
+    type = "gauge"
+
+    def __init__(self, name, documentation, labels=(), function=None):
+        """``function``, when given, is called at render time and returns {label values: value}."""
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.function = function
+        self._values = {}
+
+    def set(self, value, *label_values):
+        self._values[label_values] = value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        values = self.function() if self.function is not None else dict(self._values)
+        for label_values, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value!r}")
+        return lines
+
+
+class Counter(Gauge):
+    """Monotonic total, set or read at render time like a Gauge."""
+
+    type = "counter"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labels != metric.labels:
+                raise ValueError(f"metric {metric.name!r} is already registered with a different type or labels")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def gauge(self, name, documentation, labels=(), function=None):
+        gauge = self._register(Gauge(name, documentation, labels, function))
+        if function is not None:
+            gauge.function = function  # The newest layer wins, e.g. after re-instrumenting
+        return gauge
+
+    def counter(self, name, documentation, labels=(), function=None):
+        counter = self._register(Counter(name, documentation, labels, function))
+        if function is not None:
+            counter.function = function
+        return counter
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def instrument_layer(layer, registry=None, methods=INSTRUMENTED_METHODS, prefix="genesis_eml"):
+    """Time every call to ``methods`` on ``layer`` and expose residency gauges; returns the registry.
+
+    Wrappers from an earlier call are replaced, not stacked.
+    """
+    if not hasattr(layer, "user_memory"):  # Front-ends that keep no memory in this process
+        raise TypeError(
+            f"instrument_layer needs an EmotionalMemoryLayer, not {type(layer).__name__}; "
+            "for AsyncEmotionalMemoryLayer pass its .layer"
+        )
+    registry = MetricsRegistry() if registry is None else registry
+    latency = registry.histogram(f"{prefix}_call_seconds", "Emotional Memory Layer call latency.", ("method",))
+    uninstrument_layer(layer, methods)
+    for name in methods:
+        if hasattr(type(layer), name):
+            setattr(layer, name, _timed(getattr(layer, name), latency, name))
+    registry.gauge(
+        f"{prefix}_resident_users", "Users whose memory is resident.",
+        function=lambda: {(): len(layer.user_memory)},
+    )
+    registry.gauge(
+        f"{prefix}_resident_events", "Events held in resident memory.",
+        function=lambda: {(): _resident_events(layer)},
+    )
+    return registry
+
+
+def _resident_events(layer):
+    if layer.max_resident_events is not None:
+        return layer.residency_info()["resident_events"]  # Kept up to date under a memory budget
+    return sum(len(memory) for memory in list(layer.user_memory.values()))
+
+
+def uninstrument_layer(layer, methods=INSTRUMENTED_METHODS):
+    """Drop the timing wrappers so ``layer`` runs its plain methods again."""
+    for name in methods:
+        layer.__dict__.pop(name, None)
+
+
+def _timed(call, histogram, name):
+    @functools.wraps(call)
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return call(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - start, name)
+    return timed
@@ -0,0 +1,180 @@
+"""
+Sharded, multi-process front-end for the Emotional Memory Layer.
+
+Users are partitioned by a stable hash of ``user_id`` across a pool of worker
+processes. Each worker owns an ``EmotionalMemoryLayer`` holding its shard of
+``user_memory`` / ``aikeep_store``, so applying events and running diagnostics
+spread over as many cores as there are shards. The front-end still stamps,
+routes and pickles every event on its own core, so sharding pays off when that
+per-event work (indexes, observers, summaries, scatter_gather diagnostics) is
+heavy; for plain ingestion the front-end is the ceiling, and on a single core
+the pipes make it slower than an in-process layer (see the ``sharded`` benchmark).
+
+Events are stamped when recorded, then buffered per shard and shipped in batches
+without waiting for a reply; any read from a shard flushes its pending writes
+first, so callers always read their own writes. Events are checked before they
+are buffered, so a bad one raises from record_emotional_event itself; should an
+event still fail in its worker, the rest of its batch is applied and the error is
+raised by the next read of that event's user (or by close). The front-end itself
+is not thread-safe.
+
+    with ShardedEmotionalMemoryLayer(shards=4) as eml:
+        eml.record_emotional_event("user_001", "shame", "work presentation", 7)
+        eml.suggest_reflection("user_001")
+        overloaded = eml.scatter_gather("compassionate_load_check")
+"""
+
+import datetime
+import multiprocessing
+import os
+import zlib
+
+from emotional_memory_layer_Version4 import EmotionalMemoryLayer, _compact_intensity
+
+
+def shard_for(user_id, shards):
+    """Stable shard number for a user id (independent of PYTHONHASHSEED)."""
+    return zlib.crc32(str(user_id).encode("utf-8")) % shards
+
+
+def _shard_worker(connection, layer_kwargs):
+    eml = EmotionalMemoryLayer(**layer_kwargs)
+    failures = {}  # user_id -> first failed write since that user was last read
+    while True:
+        command, payload = connection.recv()
+        if command == "record":
+            try:
+                eml.record_emotional_events_bulk(payload)
+            except Exception:
+                # A failed batch writes nothing; replay it event by event so only the bad ones are lost
+                for event in payload:
+                    try:
+                        eml.record_emotional_events_bulk((event,))
+                    except Exception as exc:
+                        failures.setdefault(event[0], exc)
+            continue
+        if command == "close":
+            failure = next(iter(failures.values()), None)
+            connection.send((failure is None, failure))
+            connection.close()
+            return
+        try:
+            method, args = payload
+            if command == "call":
+                failure = failures.pop(args[0], None)
+                if failure is not None:
+                    raise failure
+                result = getattr(eml, method)(*args)
+            else:  # "gather"
+                if failures:
+                    failure = next(iter(failures.values()))
+                    failures.clear()
+                    raise failure
+                call = getattr(eml, method)
+                result = {user_id: call(user_id, *args) for user_id in eml.users()}
+        except Exception as exc:
+            connection.send((False, exc))
+        else:
+            connection.send((True, result))
+
+
+class ShardedEmotionalMemoryLayer:
+    def __init__(self, shards=None, batch_size=1024, **layer_kwargs):
+        self.shards = shards or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.compact = layer_kwargs.get("compact", False)
+        self._pending = [[] for _ in range(self.shards)]
+        self._connections = []
+        self._processes = []
+        for shard in range(self.shards):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_shard_worker, args=(child, layer_kwargs), name=f"eml-shard-{shard}", daemon=True
+            )
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if not self._processes:
+            return
+        self.flush()
+        error = None
+        for connection in self._connections:
+            connection.send(("close", None))
+        for connection in self._connections:
+            ok, result = connection.recv()
+            if not ok:
+                error = error or result
+            connection.close()
+        for process in self._processes:
+            process.join()
+        self._connections, self._processes = [], []
+        if error is not None:
+            raise error
+
+    def flush(self, shard=None):
+        """Ship buffered writes for one shard, or for all of them."""
+        for index in range(self.shards) if shard is None else (shard,):
+            pending = self._pending[index]
+            if pending:
+                self._connections[index].send(("record", pending))
+                self._pending[index] = []
+
+    def _call(self, user_id, method, *args):
+        shard = shard_for(user_id, self.shards)
+        self.flush(shard)
+        connection = self._connections[shard]
+        connection.send(("call", (method, (user_id,) + args)))
+        ok, result = connection.recv()
+        if not ok:
+            raise result
+        return result
+
+    def record_emotional_event(self, user_id, emotion, context, intensity, aikeep=False):
+        hash(user_id)  # The worker keys memory by it
+        if self.compact:
+            intensity = _compact_intensity(intensity)
+        shard = shard_for(user_id, self.shards)
+        pending = self._pending[shard]
+        pending.append((user_id, emotion, context, intensity, aikeep, datetime.datetime.now()))
+        if len(pending) >= self.batch_size:
+            self.flush(shard)
+
+    def detect_repetition(self, user_id):
+        return self._call(user_id, "detect_repetition")
+
+    def suggest_reflection(self, user_id):
+        return self._call(user_id, "suggest_reflection")
+
+    def emotional_cycle_completion(self, user_id):
+        return self._call(user_id, "emotional_cycle_completion")
+
+    def connection_gap_diagnostic(self, user_id):
+        return self._call(user_id, "connection_gap_diagnostic")
+
+    def compassionate_load_check(self, user_id):
+        return self._call(user_id, "compassionate_load_check")
+
+    def scatter_gather(self, method, *args):
+        """Run a per-user method for every user on every shard in parallel; returns {user_id: result}."""
+        self.flush()
+        for connection in self._connections:
+            connection.send(("gather", (method, args)))
+        results, error = {}, None
+        for connection in self._connections:
+            ok, result = connection.recv()
+            if ok:
+                results.update(result)
+            else:
+                error = result
+        if error is not None:
+            raise error
+        return results
@@ -0,0 +1,275 @@
+"""
+Constant-memory long-term summaries of the events that fall out of user_memory.
+
+Once a user's deque is full, every event it evicts is absorbed into that user's
+LongTermSummary instead of being lost:
+
+* per-emotion weight and intensity, exponentially decayed with ``half_life``
+  (at most ``max_emotions`` emotions; the lightest one makes room)
+* decayed intensity mean and variance, and a QuantileSketch of intensity
+* a CountMinSketch of context frequencies (never decayed, never undercounts),
+  read by context_count()
+* a BloomFilter of the contexts seen, for seen_context(): while at most
+  ``expected_contexts`` distinct contexts have been absorbed, a context never seen
+  is reported as seen with probability at most ``context_false_positive_rate``
+* for each emotion, whether it has been seen in more than one context
+
+Decay uses forward scaling: weights are stored multiplied by
+exp(rate * (t - reference)), so absorbing an event is O(1) and the stored values
+are rescaled only when the exponent grows large.
+
+    eml.enable_long_term_summaries(half_life=datetime.timedelta(days=90))
+    eml.long_term_summary("user_001")
+    eml.detect_repetition("user_001", lifetime=True)
+"""
+
+import math
+import zlib
+from array import array
+
+_MICROSECONDS_PER_SECOND = 1_000_000
+_RESCALE_EXPONENT = 60.0
+
+
+def _context_hash(context):
+    return zlib.crc32(str(context).encode("utf-8"))
+
+
+class CountMinSketch:
+    """Approximate counts in ``width * depth`` counters; estimates may overcount, never undercount."""
+
+    __slots__ = ("width", "depth", "_counts")
+
+    def __init__(self, width=256, depth=4):
+        self.width = width
+        self.depth = depth
+        self._counts = array('I', bytes(4 * width * depth))
+
+    def _slots(self, key):
+        data = str(key).encode("utf-8")
+        return [row * self.width + zlib.crc32(data, row) % self.width for row in range(self.depth)]
+
+    def add(self, key, count=1):
+        counts = self._counts
+        for slot in self._slots(key):
+            counts[slot] = min(counts[slot] + count, 0xFFFFFFFF)
+
+    def estimate(self, key):
+        counts = self._counts
+        return min(counts[slot] for slot in self._slots(key))
+
+
+class BloomFilter:
+    """Set membership in a fixed bit array, with no false negatives.
+
+    Sized for ``capacity`` distinct keys at a false-positive rate of ``false_positive_rate``;
+    past ``capacity`` the rate climbs towards 1, as ``false_positive_rate()`` reports.
+    """
+
+    __slots__ = ("capacity", "bits", "hashes", "added", "_bits")
+
+    def __init__(self, capacity=1024, false_positive_rate=0.01):
+        if capacity < 1 or not 0 < false_positive_rate < 1:
+            raise ValueError("capacity must be positive and false_positive_rate within (0, 1)")
+        self.capacity = capacity
+        self.bits = max(8, math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.added = 0  # Insertions of keys not already reported present
+        self._bits = bytearray((self.bits + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing: two CRCs give every probe position
+        data = str(key).encode("utf-8")
+        first = zlib.crc32(data)
+        second = zlib.crc32(data, 0x9E3779B9) | 1
+        return [(first + i * second) % self.bits for i in range(self.hashes)]
+
+    def add(self, key):
+        positions = self._positions(key)
+        bits = self._bits
+        if all(bits[p >> 3] & (1 << (p & 7)) for p in positions):
+            return
+        for p in positions:
+            bits[p >> 3] |= 1 << (p & 7)
+        self.added += 1
+
+    def __contains__(self, key):
+        bits = self._bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def false_positive_rate(self):
+        """Expected false-positive rate at the current fill."""
+        return (1 - math.exp(-self.hashes * self.added / self.bits)) ** self.hashes
+
+
+class QuantileSketch:
+    """Weighted quantiles with bounded relative error, in the style of DDSketch.
+
+    Positive values land in logarithmic buckets ``gamma ** (i - 1) < value <= gamma ** i``;
+    values <= 0 share one bucket. Past ``max_buckets`` the lowest buckets are merged, so
+    only the smallest quantiles lose accuracy.
+    """
+
+    __slots__ = ("relative_accuracy", "max_buckets", "_gamma", "_log_gamma", "_buckets", "_zero", "total")
+
+    def __init__(self, relative_accuracy=0.02, max_buckets=128):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets = {}  # bucket index -> weight
+        self._zero = 0.0
+        self.total = 0.0
+
+    def add(self, value, weight=1.0):
+        self.total += weight
+        if value <= 0:
+            self._zero += weight
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        buckets = self._buckets
+        buckets[index] = buckets.get(index, 0.0) + weight
+        if len(buckets) > self.max_buckets:
+            lowest, second = sorted(buckets)[:2]
+            buckets[second] += buckets.pop(lowest)
+
+    def scale(self, factor):
+        self.total *= factor
+        self._zero *= factor
+        for index in self._buckets:
+            self._buckets[index] *= factor
+
+    def quantile(self, q):
+        """Value at quantile ``q`` (0..1), or None when empty."""
+        if self.total <= 0:
+            return None
+        rank = q * self.total
+        seen = self._zero
+        if rank < seen or not self._buckets:
+            return 0.0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                break
+        # Midpoint of the bucket in relative terms
+        return 2 * self._gamma ** index / (self._gamma + 1)
+
+
+class LongTermSummary:
+    __slots__ = (
+        "half_life", "max_emotions", "_rate", "_reference", "newest", "events", "_emotions",
+        "_weight", "_intensity", "_intensity_squares", "intensity_sketch", "contexts", "seen_contexts",
+    )
+
+    def __init__(self, half_life=None, max_emotions=32, context_width=256, context_depth=4,
+                 relative_accuracy=0.02, expected_contexts=1024, context_false_positive_rate=0.01):
+        """``half_life`` is a timedelta, or None to weigh every absorbed event equally.
+
+        ``expected_contexts`` and ``context_false_positive_rate`` size the filter behind
+        seen_context() (about 1.2 KB per summary at the defaults).
+        """
+        self.half_life = half_life
+        self.max_emotions = max_emotions
+        self._rate = None if half_life is None else math.log(2) / (half_life.total_seconds() * _MICROSECONDS_PER_SECOND)
+        self._reference = None
+        self.newest = None  # epoch micros of the newest absorbed event
+        self.events = 0
+        self._emotions = {}  # emotion -> [weight, weighted intensity, first context hash, seen in several contexts]
+        self._weight = 0.0
+        self._intensity = 0.0
+        self._intensity_squares = 0.0
+        self.intensity_sketch = QuantileSketch(relative_accuracy)
+        self.contexts = CountMinSketch(context_width, context_depth)
+        self.seen_contexts = BloomFilter(expected_contexts, context_false_positive_rate)
+
+    def absorb(self, emotion, context, intensity, micros):
+        weight = self._forward_weight(micros)
+        context_hash = _context_hash(context)
+        stats = self._emotions.get(emotion)
+        if stats is None:
+            if len(self._emotions) >= self.max_emotions:
+                lightest = min(self._emotions, key=lambda label: self._emotions[label][0])
+                del self._emotions[lightest]
+            stats = self._emotions[emotion] = [0.0, 0.0, context_hash, False]
+        elif stats[2] != context_hash:
+            stats[3] = True
+        stats[0] += weight
+        stats[1] += weight * intensity
+        self._weight += weight
+        self._intensity += weight * intensity
+        self._intensity_squares += weight * intensity * intensity
+        self.intensity_sketch.add(intensity, weight)
+        self.contexts.add(context)
+        self.seen_contexts.add(context)
+        self.events += 1
+
+    def _forward_weight(self, micros):
+        if self.newest is None or micros > self.newest:
+            self.newest = micros
+        if self._rate is None:
+            return 1.0
+        if self._reference is None:
+            self._reference = micros
+        exponent = self._rate * (micros - self._reference)
+        if exponent > _RESCALE_EXPONENT:
+            factor = math.exp(-exponent)
+            for stats in self._emotions.values():
+                stats[0] *= factor
+                stats[1] *= factor
+            self._weight *= factor
+            self._intensity *= factor
+            self._intensity_squares *= factor
+            self.intensity_sketch.scale(factor)
+            self._reference, exponent = micros, 0.0
+        return math.exp(exponent)
+
+    def _scale(self):
+        """Factor turning stored weights into weights relative to the newest absorbed event."""
+        if self._rate is None or self._reference is None:
+            return 1.0
+        return math.exp(-self._rate * (self.newest - self._reference))
+
+    def context_count(self, context):
+        """Absorbed events logged in ``context``; may overcount through sketch collisions, never undercounts."""
+        return self.contexts.estimate(context)
+
+    def seen_context(self, context):
+        """Whether ``context`` was absorbed; never False for one that was, and wrongly True at the filter's rate."""
+        return context in self.seen_contexts
+
+    def repeating_emotions(self, contexts_by_emotion=None):
+        """Emotions seen in more than one context, heaviest first.
+
+        ``contexts_by_emotion`` ({emotion: set of contexts}) adds recent events, so an emotion
+        seen once here and once, elsewhere, in the recent memory also counts.
+        """
+        repeating = []
+        for emotion, (weight, _, context_hash, several) in self._emotions.items():
+            if not several and contexts_by_emotion:
+                recent = contexts_by_emotion.get(emotion, ())
+                several = any(_context_hash(context) != context_hash for context in recent)
+            if several:
+                repeating.append((weight, emotion))
+        repeating.sort(key=lambda item: -item[0])
+        return [emotion for _, emotion in repeating]
+
+    def as_dict(self):
+        scale = self._scale()
+        weight = self._weight * scale
+        mean = self._intensity / self._weight if self._weight else None
+        variance = self._intensity_squares / self._weight - mean * mean if self._weight else None
+        return {
+            "events": self.events,
+            "weight": weight,
+            "emotions": {
+                emotion: {"weight": stats[0] * scale, "mean_intensity": stats[1] / stats[0] if stats[0] else None}
+                for emotion, stats in sorted(self._emotions.items(), key=lambda item: -item[1][0])
+            },
+            "intensity": {
+                "mean": mean,
+                "std": math.sqrt(max(variance, 0.0)) if variance is not None else None,
+                "p50": self.intensity_sketch.quantile(0.5),
+                "p90": self.intensity_sketch.quantile(0.9),
+                "p99": self.intensity_sketch.quantile(0.99),
+            },
+        }
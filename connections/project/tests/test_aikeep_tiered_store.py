@@ -0,0 +1,45 @@
+import pytest
+
+from aikeep_tiered_store import TieredAiKeepStore
+
+
+def event(index):
+    return {'timestamp': f"2024-01-01T00:00:{index % 60:02d}", 'emotion': "joy", 'context': "work", 'intensity': index}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TieredAiKeepStore(str(tmp_path), hot_events_per_user=1, segment_bytes=100)
+    yield store
+    store.close()
+
+
+def test_history_reads_across_hot_active_and_sealed_segments(store):
+    for index in range(30):
+        store.append("a" if index % 3 else "b", event(index))
+    assert [record['intensity'] for record in store.iter_events("a")] == [index for index in range(30) if index % 3]
+    assert store.count("b") == 10
+
+
+def test_reader_survives_the_active_segment_being_sealed(store):
+    for index in range(12):
+        store.append("a", event(index))
+    reader = store.iter_events("a")
+    first = next(reader)
+    for index in range(12, 40):
+        store.append("b", event(index))  # Seals the segment the reader was started on
+    assert [first['intensity']] + [record['intensity'] for record in reader] == list(range(12))
+
+
+def test_history_survives_compaction_and_reopening(tmp_path):
+    store = TieredAiKeepStore(str(tmp_path), hot_events_per_user=2, segment_bytes=200)
+    for index in range(50):
+        store.append(index % 4, event(index))
+    store.compact()
+    store.close()
+    reopened = TieredAiKeepStore(str(tmp_path), hot_events_per_user=2, segment_bytes=200)
+    try:
+        for user_id in range(4):
+            assert [record['intensity'] for record in reopened.iter_events(user_id)] == list(range(user_id, 50, 4))
+    finally:
+        reopened.close()
@@ -0,0 +1,66 @@
+import random
+
+from continuum_sync import ContinuumSyncReplica, LocalTransport
+from emotional_memory_layer_Version4 import EmotionalMemoryLayer
+
+EMOTIONS = ["joy", "grief", "shame", "anger"]
+
+
+def replica(device_id):
+    return ContinuumSyncReplica(EmotionalMemoryLayer(max_memory_per_user=5), device_id)
+
+
+def record_random(rng, device, count):
+    for _ in range(count):
+        device.record_emotional_event(
+            rng.choice(["a", "b"]), rng.choice(EMOTIONS), f"context {rng.randint(0, 5)}", rng.randint(0, 10),
+            aikeep=rng.random() < 0.3,
+        )
+
+
+def assert_converged(*replicas):
+    first = replicas[0]
+    for other in replicas[1:]:
+        assert dict(other.logs) == dict(first.logs)
+        assert other.status()["root_digest"] == first.status()["root_digest"]
+        for user_id in ("a", "b"):
+            assert list(other.layer.user_memory[user_id]) == list(first.layer.user_memory[user_id])
+            assert other.layer.detect_repetition(user_id) == first.layer.detect_repetition(user_id)
+            assert sorted(map(repr, other.layer.aikeep_store[user_id])) == sorted(map(repr, first.layer.aikeep_store[user_id]))
+
+
+def test_replicas_converge_whatever_order_they_sync_in():
+    rng = random.Random(11)
+    phone, laptop, tablet = replica("phone"), replica("laptop"), replica("tablet")
+    for device in (phone, laptop, tablet):
+        record_random(rng, device, 30)
+    phone.sync(LocalTransport(laptop))
+    tablet.sync(LocalTransport(laptop))
+    phone.sync(LocalTransport(tablet))
+    laptop.sync(LocalTransport(phone))
+    assert_converged(phone, laptop, tablet)
+    assert len(phone) == 90
+
+
+def test_concurrent_edits_after_a_sync_converge():
+    rng = random.Random(2)
+    phone, laptop = replica("phone"), replica("laptop")
+    record_random(rng, phone, 20)
+    laptop.sync(LocalTransport(phone))
+    record_random(rng, phone, 3)
+    record_random(rng, laptop, 4)
+    stats = laptop.sync(LocalTransport(phone))
+    assert (stats["pulled"], stats["pushed"]) == (3, 4)
+    assert_converged(phone, laptop)
+
+
+def test_sync_of_equal_replicas_takes_one_comparison_and_merge_is_idempotent():
+    rng = random.Random(4)
+    phone, laptop = replica("phone"), replica("laptop")
+    record_random(rng, phone, 10)
+    laptop.sync(LocalTransport(phone))
+    stats = laptop.sync(LocalTransport(phone))
+    assert stats == {"round_trips": 2, "differing_leaves": 0, "pulled": 0, "pushed": 0}
+    records = phone.fetch([("phone", sequence) for sequence in range(1, 11)])
+    assert laptop.merge(records) == 0
+    assert_converged(phone, laptop)
@@ -0,0 +1,40 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from emotion_cooccurrence import EmotionCooccurrence
+from emotional_memory_layer_Version4 import EmotionalMemoryLayer
+
+
+@pytest.mark.parametrize("half_life", [None, datetime.timedelta(days=1)])
+def test_matrices_are_empty_before_any_event(half_life):
+    analytics = EmotionCooccurrence(half_life=half_life)
+    assert analytics.transition_matrix()[1].shape == (0, 0)
+    assert analytics.cooccurrence_matrix()[1].shape == (0, 0)
+    emotions, matrix = analytics.emotion_context_matrix()
+    assert emotions == [] and matrix.shape == (0, analytics.context_buckets)
+
+
+def test_transitions_match_a_recount_of_each_users_sequence():
+    eml = EmotionalMemoryLayer()
+    analytics = eml.enable_population_analytics()
+    sequences = {"a": ["joy", "grief", "joy", "shame"], "b": ["grief", "joy", "grief"]}
+    for user_id, emotions in sequences.items():
+        for index, emotion in enumerate(emotions):
+            eml.record_emotional_event(user_id, emotion, f"context {index}", 5)
+    emotions, matrix = analytics.transition_matrix()
+    expected = np.zeros_like(matrix)
+    for sequence in sequences.values():
+        for before, after in zip(sequence, sequence[1:]):
+            expected[emotions.index(before), emotions.index(after)] += 1
+    assert np.array_equal(matrix, expected)
+
+
+def test_decay_halves_the_weight_of_older_events():
+    analytics = EmotionCooccurrence(half_life=datetime.timedelta(days=1))
+    day = 86_400_000_000
+    analytics.observe("a", "joy", "work", 5, 0)
+    analytics.observe("b", "joy", "work", 5, day)
+    emotions, matrix = analytics.emotion_context_matrix()
+    assert matrix[0, analytics.context_bucket("work")] == pytest.approx(1.5)
@@ -0,0 +1,43 @@
+import pytest
+
+from emotion_taxonomy import EmotionTaxonomy
+from emotional_memory_layer_Version4 import EmotionalMemoryLayer
+
+TREE = {"anger": {"frustration": ["impatience"], "rage": []}, "fear": ["anxiety", "dread"]}
+
+
+def test_reverse_index_holds_every_chain():
+    taxonomy = EmotionTaxonomy(TREE, aliases={"frustración": "frustration"})
+    assert len(taxonomy) == 7
+    assert taxonomy.resolve("impatience") == ("impatience", ("anger", "frustration", "impatience"), 1.0)
+    assert taxonomy.resolve("Frustración") == ("frustration", ("anger", "frustration"), 1.0)
+    assert taxonomy.children["anger"] == ["frustration", "rage"]
+    with pytest.raises(KeyError):
+        EmotionTaxonomy(TREE, aliases={"colère": "fury"})
+
+
+def test_free_text_and_misspellings_resolve_to_the_closest_label():
+    taxonomy = EmotionTaxonomy(TREE)
+    assert taxonomy.resolve("i feel kinda anxious")[0] == "anxiety"
+    assert taxonomy.resolve("so much rage")[:2] == ("rage", ("anger", "rage"))
+    label, chain, score = taxonomy.resolve("frustated")
+    assert (label, chain) == ("frustration", ("anger", "frustration"))
+    assert taxonomy.cutoff <= score < 1.0
+    assert taxonomy.resolve("xyzzy") is None
+
+
+def test_every_one_edit_typo_of_the_default_map_resolves_back():
+    taxonomy = EmotionalMemoryLayer().emotion_taxonomy
+    for label in taxonomy.chains:
+        for index in range(len(label)):
+            for typo in (label[:index] + label[index + 1:], label[:index] + "x" + label[index + 1:]):
+                assert taxonomy.resolve(typo)[0] == label, typo
+
+
+def test_layer_disambiguates_through_the_loaded_taxonomy():
+    eml = EmotionalMemoryLayer()
+    assert eml.disambiguate_emotion("lonely").startswith("Did you mean 'loneliness'?")
+    assert "may be too general" in eml.disambiguate_emotion("sadness")
+    eml.load_emotion_taxonomy(TREE, aliases={"wut": "rage"})
+    assert eml.disambiguate_emotion("wut") == "Did you mean 'rage'? 'rage' is a more nuanced form of 'anger'. Great emotional clarity."
+    assert "not in the disambiguation map" in eml.disambiguate_emotion("loneliness")
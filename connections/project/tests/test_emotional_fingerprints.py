@@ -0,0 +1,63 @@
+import random
+
+import numpy as np
+import pytest
+
+from emotional_memory_layer_Version4 import EmotionalMemoryLayer
+
+PATTERNS = [
+    ["joy", "calm", "joy", "excitement"],
+    ["grief", "shame", "grief", "loneliness"],
+    ["anger", "frustration", "rage", "anger"],
+    ["anxiety", "dread", "worry", "anxiety"],
+]
+
+
+def populate(eml, users_per_pattern, rng):
+    for index in range(users_per_pattern * len(PATTERNS)):
+        pattern = PATTERNS[index % len(PATTERNS)]
+        for step in range(rng.randint(8, 16)):
+            eml.record_emotional_event(f"user_{index}", pattern[step % len(pattern)], "work", rng.randint(5, 8))
+
+
+def test_similar_users_needs_fingerprints():
+    with pytest.raises(RuntimeError):
+        EmotionalMemoryLayer().similar_users("user_0")
+
+
+def test_fingerprints_seeded_from_memory_match_ones_kept_from_the_start():
+    first, later = EmotionalMemoryLayer(max_memory_per_user=None), EmotionalMemoryLayer(max_memory_per_user=None)
+    first.enable_fingerprints()
+    populate(first, 3, random.Random(1))
+    populate(later, 3, random.Random(1))
+    later.enable_fingerprints()
+    for user_id in first.users():
+        assert np.allclose(first.fingerprints.fingerprint(user_id), later.fingerprints.fingerprint(user_id))
+    assert later.fingerprints.fingerprint("nobody") is None
+
+
+def test_similar_users_rank_by_cosine_of_the_fingerprints():
+    eml = EmotionalMemoryLayer(max_memory_per_user=None)
+    fingerprints = eml.enable_fingerprints()
+    populate(eml, 5, random.Random(2))
+    vectors = {user_id: fingerprints.fingerprint(user_id) for user_id in eml.users()}
+    expected = sorted(
+        ((user_id, float(vectors["user_0"] @ vector)) for user_id, vector in vectors.items() if user_id != "user_0"),
+        key=lambda pair: -pair[1],
+    )
+    similar = eml.similar_users("user_0", k=6)
+    assert [user_id for user_id, _ in similar][:4] == [user_id for user_id, _ in expected][:4]
+    assert np.allclose([score for _, score in similar], [score for _, score in expected[:6]], atol=1e-5)
+    assert {int(user_id.split("_")[1]) % len(PATTERNS) for user_id, _ in similar[:4]} == {0}
+    assert eml.similar_users("nobody") == []
+
+
+def test_lsh_index_finds_the_same_pattern_and_follows_new_events():
+    eml = EmotionalMemoryLayer(max_memory_per_user=None)
+    fingerprints = eml.enable_fingerprints(brute_force_limit=0)
+    populate(eml, 20, random.Random(3))
+    fingerprints.build_index()
+    assert all(int(user_id.split("_")[1]) % len(PATTERNS) == 1 for user_id, _ in eml.similar_users("user_1", k=5))
+    for step in range(200):  # user_1 now lives the anxious pattern
+        eml.record_emotional_event("user_1", PATTERNS[3][step % 4], "home", 7)
+    assert all(int(user_id.split("_")[1]) % len(PATTERNS) == 3 for user_id, _ in eml.similar_users("user_1", k=5))
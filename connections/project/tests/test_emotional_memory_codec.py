@@ -0,0 +1,78 @@
+import datetime
+import io
+
+import pytest
+
+from emotional_memory_codec import EmotionalMemoryImage, encode, export_user, import_user, read_stream
+from emotional_memory_layer_Version4 import EmotionalMemoryLayer
+
+
+def layer_with_history(compact=False):
+    eml = EmotionalMemoryLayer(max_memory_per_user=10, compact=compact)
+    start = datetime.datetime(2024, 5, 1, 9, 30)
+    eml.record_emotional_events_bulk([
+        ("user_001", ["joy", "grief", "ça va", "😶"][index % 4], f"context {index % 7}", index % 9 - 2,
+         index % 3 == 0, start + datetime.timedelta(seconds=index * 37, microseconds=index % 2 * 250))
+        for index in range(40)
+    ])
+    return eml
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_export_import_round_trip(compact):
+    source = layer_with_history(compact)
+    data = export_user(source, "user_001", block_events=4)
+    target = EmotionalMemoryLayer(max_memory_per_user=10, compact=compact)
+    assert import_user(target, data) == "user_001"
+    assert list(target.user_memory["user_001"]) == list(source.user_memory["user_001"])
+    assert target.aikeep_store["user_001"] == source.aikeep_store["user_001"]
+    assert target.detect_repetition("user_001") == source.detect_repetition("user_001")
+
+
+def test_image_and_stream_decode_the_same_events():
+    source = layer_with_history()
+    data = export_user(source, "user_001", block_events=8)
+    image = EmotionalMemoryImage(data)
+    try:
+        assert image.user_id == "user_001"
+        assert list(image.memory_events()) == list(source.user_memory["user_001"])
+        assert list(image.aikeep_events()) == source.aikeep_store["user_001"]
+    finally:
+        image.release()
+    user_id, blocks = read_stream(io.BytesIO(data))
+    events = [event for block in blocks for event in block]
+    assert user_id == "user_001"
+    assert events == list(source.user_memory["user_001"]) + source.aikeep_store["user_001"]
+
+
+def test_float_intensities_and_whole_second_timestamps():
+    micros = int(datetime.datetime(2024, 1, 1).timestamp()) * 1_000_000
+    events = [(micros, "joy", "work", 1.5), (micros + 1, "joy", "home", -2.25), (micros + 1_000_000, "calm", "work", 0.0)]
+    image = EmotionalMemoryImage(encode(7, events))
+    try:
+        decoded = list(image.memory_events())
+    finally:
+        image.release()
+    assert [event['intensity'] for event in decoded] == [1.5, -2.25, 0.0]
+    expected = [(datetime.datetime(1970, 1, 1) + datetime.timedelta(microseconds=m)).isoformat() for m, *_ in events]
+    assert [event['timestamp'] for event in decoded] == expected
+
+
+@pytest.mark.parametrize("cut", [3, 20, -1])
+def test_truncated_streams_are_rejected(cut):
+    data = export_user(layer_with_history(), "user_001")
+    with pytest.raises(ValueError):
+        EmotionalMemoryImage(data[:cut])
+
+
+def test_compact_import_rejects_float_intensities_before_writing():
+    micros = int(datetime.datetime(2024, 1, 1).timestamp()) * 1_000_000
+    data = encode("user_001", [(micros, "joy", "work", 3), (micros + 1, "grief", "home", 2.5)],
+                  [(micros + 2, "grief", "home", 9)])
+    eml = EmotionalMemoryLayer(compact=True)
+    with pytest.raises(TypeError):
+        import_user(eml, data)
+    assert "user_001" not in eml.user_memory
+    assert not eml.aikeep_store.get("user_001")
+    eml.record_emotional_event("user_001", "grief", "home", 4)
+    assert eml.detect_repetition("user_001") == []
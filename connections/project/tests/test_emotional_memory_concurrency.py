@@ -0,0 +1,138 @@
+import asyncio
+import threading
+
+import numpy as np
+
+from emotional_memory_concurrency import AsyncEmotionalMemoryLayer, ConcurrentEmotionalMemoryLayer
+from emotional_memory_layer_Version4 import EmotionalMemoryLayer
+
+EMOTIONS = ["joy", "grief", "shame", "anger"]
+
+
+def write_until(eml, stop, user_ids):
+    index = 0
+    while not stop.is_set():
+        eml.record_emotional_event(user_ids[index % len(user_ids)], EMOTIONS[index % 4], f"context {index % 5}", index % 10)
+        index += 1
+
+
+def test_observers_seeded_under_concurrent_writes_count_every_event_once():
+    eml = ConcurrentEmotionalMemoryLayer(max_memory_per_user=None, stripes=8)
+    user_ids = [f"user_{index}" for index in range(16)]
+    for index in range(2000):
+        eml.record_emotional_event(user_ids[index % 16], EMOTIONS[index % 4], "seed", 5)
+    stop = threading.Event()
+    writers = [threading.Thread(target=write_until, args=(eml, stop, user_ids[offset::4])) for offset in range(4)]
+    for writer in writers:
+        writer.start()
+    try:
+        analytics = eml.enable_population_analytics()
+        eml.enable_fingerprints()
+        eml.enable_long_term_summaries()
+    finally:
+        stop.set()
+        for writer in writers:
+            writer.join()
+    # Unbounded memory: the context matrix holds exactly the events held in memory
+    _, matrix = analytics.emotion_context_matrix()
+    assert np.sum(matrix) == sum(len(memory) for memory in eml.user_memory.values())
+
+
+def stream(user_id, count):
+    return [(EMOTIONS[(index + len(user_id)) % 4], f"context {index % 7}", index % 10, index % 5 == 0) for index in range(count)]
+
+
+def fields(memory):
+    return [(event['emotion'], event['context'], event['intensity']) for event in memory]
+
+
+def test_threaded_writes_match_the_same_writes_made_in_one_thread():
+    user_ids = [f"user_{index}" for index in range(12)]
+    concurrent = ConcurrentEmotionalMemoryLayer(max_memory_per_user=20, max_resident_events=100, stripes=4)
+    sequential = EmotionalMemoryLayer(max_memory_per_user=20)
+
+    def write(user_ids):
+        for user_id in user_ids:
+            for emotion, context, intensity, aikeep in stream(user_id, 300):
+                concurrent.record_emotional_event(user_id, emotion, context, intensity, aikeep)
+                if intensity == 9:
+                    concurrent.suggest_reflection(user_id)
+
+    writers = [threading.Thread(target=write, args=(user_ids[offset::3],)) for offset in range(3)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    for user_id in user_ids:
+        for emotion, context, intensity, aikeep in stream(user_id, 300):
+            sequential.record_emotional_event(user_id, emotion, context, intensity, aikeep)
+    # Writers skip users whose stripe is busy, so the budget may be overshot until the next write
+    residency = concurrent.residency_info()
+    assert residency["evictions"] > 0
+    assert residency["resident_events"] == sum(len(memory) for memory in concurrent.user_memory.values())
+    for user_id in user_ids:
+        assert concurrent.detect_repetition(user_id) == sequential.detect_repetition(user_id)
+        assert fields(concurrent.user_memory[user_id]) == fields(sequential.user_memory[user_id])
+        assert len(concurrent.aikeep_store[user_id]) == len(sequential.aikeep_store[user_id]) == 60
+
+
+def test_holding_lock_for_makes_calls_for_that_user_atomic():
+    eml = ConcurrentEmotionalMemoryLayer(stripes=8)
+    assert eml.lock_for("a") is eml.lock_for("a")
+    with eml.lock_for("a"):
+        writer = threading.Thread(target=eml.record_emotional_event, args=("a", "joy", "work", 3))
+        writer.start()
+        writer.join(timeout=0.2)
+        assert writer.is_alive() and "a" not in eml.user_memory
+        eml.record_emotional_event("a", "grief", "home", 5)  # Re-entrant
+    writer.join()
+    assert [event['emotion'] for event in eml.user_memory["a"]] == ["grief", "joy"]
+
+
+def test_async_layer_offloads_calls_whose_stripe_is_busy():
+    eml = ConcurrentEmotionalMemoryLayer(stripes=8)
+    other = next(user_id for user_id in map(str, range(100)) if eml.lock_for(user_id) is not eml.lock_for("a"))
+    aeml = AsyncEmotionalMemoryLayer(eml)
+    held, release = threading.Event(), threading.Event()
+
+    def hold():
+        with eml.lock_for("a"):
+            held.set()
+            release.wait()
+
+    async def main():
+        holder = threading.Thread(target=hold)
+        holder.start()
+        held.wait()
+        blocked = asyncio.ensure_future(aeml.record_emotional_event("a", "joy", "work", 3))
+        await aeml.record_emotional_event(other, "calm", "home", 1)  # Its stripe is free: runs inline
+        await asyncio.sleep(0.05)
+        assert not blocked.done() and list(eml.user_memory[other])
+        release.set()
+        await blocked
+        holder.join()
+        assert await aeml.record_emotional_events_bulk([("a", "grief", "home", 4)]) == 1
+        return await aeml.detect_repetition("a")
+
+    assert asyncio.run(main()) == eml.detect_repetition("a")
+    assert len(eml.user_memory["a"]) == 2
+
+
+def test_async_listener_runs_on_the_loop_for_offloaded_writes():
+    fired = []
+
+    async def listener(user_id, diagnostic, active):
+        fired.append((user_id, asyncio.get_running_loop()))
+
+    async def main():
+        aeml = AsyncEmotionalMemoryLayer(max_memory_per_user=10)
+        aeml.add_threshold_listener(listener)
+        await aeml.record_emotional_events_bulk([("u", EMOTIONS[index % 3], f"context {index}", 9) for index in range(6)])
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert fired and all(loop is asyncio.get_running_loop() for _, loop in fired)
+        assert not aeml._listener_tasks
+        aeml.remove_threshold_listener(listener)
+        assert not aeml._listeners
+
+    asyncio.run(main())
@@ -0,0 +1,237 @@
+import asyncio
+import datetime
+import random
+import warnings
+
+import pytest
+
+from emotional_memory_layer_Version4 import EmotionalMemoryLayer, _repeating_emotions, _to_epoch_micros
+
+START = datetime.datetime(2024, 1, 1, 8, 0)
+EMOTIONS = ["joy", "grief", "shame", "anger", "calm"]
+CONTEXTS = ["work", "home", "family", "gym", "commute", "night"]
+
+
+def random_events(rng, users, count, start=START):
+    """``count`` bulk rows for ``users``, with timestamps in order, minutes apart."""
+    moment = start
+    events = []
+    for _ in range(count):
+        moment += datetime.timedelta(minutes=rng.randint(0, 90))
+        events.append((
+            rng.choice(users), rng.choice(EMOTIONS), rng.choice(CONTEXTS), rng.randint(0, 10),
+            rng.random() < 0.2, moment,
+        ))
+    return events
+
+
+def record(eml, events, bulk):
+    if bulk:
+        eml.record_emotional_events_bulk(events)
+        return
+    for user_id, emotion, context, intensity, aikeep, timestamp in events:
+        eml.record_emotional_events_bulk([(user_id, emotion, context, intensity, aikeep, timestamp)])
+
+
+def assert_indexes_match_memory(eml):
+    """Every incremental index against one recomputed from the events held in memory."""
+    for user_id in eml.users():
+        eml.detect_repetition(user_id)  # Reloads a spilled user
+        memory = list(eml.user_memory[user_id])
+        assert eml.detect_repetition(user_id) == _repeating_emotions(memory)
+
+        contexts = {}
+        for event in memory:
+            counts = contexts.setdefault(event['emotion'], {})
+            counts[event['context']] = counts.get(event['context'], 0) + 1
+        assert eml._emotion_contexts[user_id] == contexts
+        assert {emotion: len(sequences) for emotion, sequences in eml._emotion_sequences[user_id].items()} == {
+            emotion: sum(counts.values()) for emotion, counts in contexts.items()
+        }
+
+        times = [_to_epoch_micros(datetime.datetime.fromisoformat(event['timestamp'])) for event in memory]
+        assert list(eml._timestamps(user_id, eml.user_memory[user_id])) == times
+        since, until = START + datetime.timedelta(hours=6), START + datetime.timedelta(hours=30)
+        window = [
+            event for event in memory
+            if since <= datetime.datetime.fromisoformat(event['timestamp']) < until
+        ]
+        assert eml.detect_repetition(user_id, since=since, until=until) == _repeating_emotions(window)
+    if eml.max_resident_events is not None:
+        assert eml.residency_info()["resident_events"] == sum(len(memory) for memory in eml.user_memory.values())
+        assert eml.residency_info()["resident_events"] <= eml.max_resident_events
+
+
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("bulk", [False, True])
+@pytest.mark.parametrize("max_resident_events", [None, 12])
+def test_indexes_match_recompute_after_appends_evictions_and_spills(compact, bulk, max_resident_events):
+    rng = random.Random(7)
+    eml = EmotionalMemoryLayer(max_memory_per_user=5, compact=compact, max_resident_events=max_resident_events)
+    users = [f"user_{index}" for index in range(6)]
+    for batch in range(4):
+        record(eml, random_events(rng, users, 40, START + datetime.timedelta(days=batch)), bulk)
+        assert_indexes_match_memory(eml)
+    if max_resident_events is not None:
+        assert eml.residency_info()["evictions"] > 0
+        assert eml.residency_info()["reloads"] > 0
+
+
+@pytest.mark.parametrize("intensity", [2.5, 40000, -40000, "7"])
+def test_compact_rejects_bad_intensity_without_writing(intensity):
+    eml = EmotionalMemoryLayer(max_memory_per_user=3, compact=True)
+    eml.record_emotional_event("u", "joy", "work", 5)
+    before = list(eml.user_memory["u"]), eml.write_version("u")
+    with pytest.raises((TypeError, ValueError)):
+        eml.record_emotional_event("u", "joy", "home", intensity)
+    with pytest.raises((TypeError, ValueError)):
+        eml.record_emotional_events_bulk([("v", "joy", "work", 1), ("u", "joy", "home", intensity)])
+    assert (list(eml.user_memory["u"]), eml.write_version("u")) == before
+    assert "v" not in eml.user_memory
+    # The columns stayed aligned, so the ring keeps working
+    for index in range(4):
+        eml.record_emotional_event("u", "grief", f"context {index}", index)
+    assert [event['intensity'] for event in eml.user_memory["u"]] == [1, 2, 3]
+
+
+def test_bulk_matches_one_event_at_a_time():
+    rng = random.Random(3)
+    events = random_events(rng, ["a", "b", "c"], 200)
+    one_by_one, bulk = EmotionalMemoryLayer(max_memory_per_user=7), EmotionalMemoryLayer(max_memory_per_user=7)
+    record(one_by_one, events, bulk=False)
+    record(bulk, events, bulk=True)
+    for user_id in ("a", "b", "c"):
+        assert list(bulk.user_memory[user_id]) == list(one_by_one.user_memory[user_id])
+        assert bulk.aikeep_store[user_id] == one_by_one.aikeep_store[user_id]
+        assert bulk.detect_repetition(user_id) == one_by_one.detect_repetition(user_id)
+
+
+def test_bulk_columns_match_bulk_rows():
+    rng = random.Random(9)
+    events = random_events(rng, ["a", "b"], 50)
+    rows, columns = EmotionalMemoryLayer(max_memory_per_user=4), EmotionalMemoryLayer(max_memory_per_user=4)
+    assert rows.record_emotional_events_bulk(events) == 50
+    user_ids, emotions, contexts, intensities, aikeep, timestamps = map(list, zip(*events))
+    assert columns.record_emotional_events_bulk(
+        user_ids=user_ids, emotions=emotions, contexts=contexts, intensities=intensities,
+        aikeep=aikeep, timestamps=timestamps,
+    ) == 50
+    for user_id in ("a", "b"):
+        assert list(columns.user_memory[user_id]) == list(rows.user_memory[user_id])
+        assert columns.aikeep_store[user_id] == rows.aikeep_store[user_id]
+    with pytest.raises(ValueError):
+        columns.record_emotional_events_bulk(user_ids=["a"], emotions=["joy", "calm"], contexts=["x"], intensities=[1])
+
+
+def test_recurring_loops_match_a_recount_of_the_aikeep_history():
+    rng = random.Random(13)
+    eml = EmotionalMemoryLayer()
+    for index in range(300):
+        eml.record_emotional_event("u", rng.choice(EMOTIONS[:3]), "work", 5, aikeep=rng.random() < 0.7)
+    emotions = [event['emotion'] for event in eml.aikeep_store["u"]]
+    expected = {}
+    for length in range(2, 5):
+        for start in range(len(emotions) - length + 1):
+            loop = tuple(emotions[start:start + length])
+            if len(set(loop)) > 1:
+                expected[loop] = expected.get(loop, 0) + 1
+    loops = eml.recurring_loops("u", top=1000)
+    assert {tuple(loop["loop"]): loop["occurrences"] for loop in loops} == {
+        loop: occurrences for loop, occurrences in expected.items() if occurrences >= 2
+    }
+    ranks = [(loop["occurrences"], len(loop["loop"])) for loop in loops]
+    assert ranks == sorted(ranks, reverse=True)
+    assert eml.recurring_loops("u", top=3) == loops[:3]
+
+
+def test_recurring_loops_track_first_and_last_sighting():
+    eml = EmotionalMemoryLayer()
+    start = datetime.datetime(2024, 1, 1)
+    eml.record_emotional_events_bulk([
+        ("u", emotion, "home", 6, True, start + datetime.timedelta(days=index))
+        for index, emotion in enumerate(["shame", "anger", "grief", "calm", "shame", "anger", "grief"])
+    ])
+    assert eml.recurring_loops("u", top=1)[0] == {
+        "loop": ["shame", "anger", "grief"], "occurrences": 2,
+        "first_seen": start.isoformat(), "last_seen": (start + datetime.timedelta(days=6)).isoformat(),
+    }
+    assert eml.recurring_loops("nobody") == []
+
+
+def test_cached_diagnostics_follow_writes():
+    rng = random.Random(5)
+    cached, uncached = EmotionalMemoryLayer(max_memory_per_user=6), EmotionalMemoryLayer(
+        max_memory_per_user=6, diagnostics_cache_size=0
+    )
+    for _ in range(10):
+        events = random_events(rng, ["a", "b"], 8)
+        record(cached, events, bulk=True)
+        record(uncached, events, bulk=True)
+        for user_id in ("a", "b"):
+            for diagnostic in ("suggest_reflection", "connection_gap_diagnostic", "emotional_cycle_completion"):
+                assert getattr(cached, diagnostic)(user_id) == getattr(uncached, diagnostic)(user_id)
+    assert cached.diagnostics_cache_info()["hits"] == 0  # Every read followed a write
+    assert cached.suggest_reflection("a") == uncached.suggest_reflection("a")
+    assert cached.diagnostics_cache_info()["hits"] == 1
+
+
+def overload(eml, user_id="u"):
+    for index in range(6):
+        eml.record_emotional_event(user_id, EMOTIONS[index % 3], f"context {index}", 9)
+
+
+def test_coroutine_listener_needs_a_running_loop():
+    async def listener(user_id, detector, active):
+        pass
+
+    with pytest.raises(RuntimeError):
+        EmotionalMemoryLayer().add_threshold_listener(listener)
+
+
+def test_coroutine_listener_runs_on_its_loop_when_fired_from_another_thread():
+    fired = []
+
+    async def listener(user_id, detector, active):
+        fired.append((user_id, asyncio.get_running_loop()))
+
+    async def main():
+        eml = EmotionalMemoryLayer()
+        eml.add_threshold_listener(listener)
+        await asyncio.to_thread(overload, eml)
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert fired and all(loop is asyncio.get_running_loop() for _, loop in fired)
+        assert not eml._listener_tasks  # Finished tasks are dropped
+
+    asyncio.run(main())
+
+
+def test_listener_on_a_closed_loop_warns_instead_of_failing_the_write():
+    eml = EmotionalMemoryLayer()
+
+    async def listener(user_id, detector, active):
+        pass
+
+    async def register():
+        eml.add_threshold_listener(listener)
+
+    asyncio.run(register())
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        overload(eml)
+    assert any(issubclass(warning.category, RuntimeWarning) for warning in caught)
+    assert len(eml.user_memory["u"]) == 6
+
+
+def test_reads_of_unknown_users_allocate_nothing():
+    eml = EmotionalMemoryLayer(max_resident_events=10)
+    eml.record_emotional_event("known", "joy", "work", 5)
+    for diagnostic in (
+        eml.detect_repetition, eml.suggest_reflection, eml.connection_gap_diagnostic,
+        eml.compassionate_load_check, eml.emotional_cycle_completion,
+    ):
+        diagnostic("ghost")
+    assert "ghost" not in eml.user_memory
+    assert "ghost" not in eml._versions
+    assert eml.diagnostics_cache_info()["users"] == 0
+    assert eml.users() == ["known"]
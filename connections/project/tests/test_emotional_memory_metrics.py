@@ -0,0 +1,59 @@
+import pytest
+
+from emotional_memory_concurrency import AsyncEmotionalMemoryLayer, ConcurrentEmotionalMemoryLayer
+from emotional_memory_layer_Version4 import EmotionalMemoryLayer
+from emotional_memory_metrics import MetricsRegistry, instrument_layer, uninstrument_layer
+from emotional_memory_shards import ShardedEmotionalMemoryLayer
+
+
+def sample(text, name):
+    """The value of the unlabelled sample ``name`` in a Prometheus text exposition."""
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.split()[1])
+    raise KeyError(name)
+
+
+@pytest.mark.parametrize("layer_type", [EmotionalMemoryLayer, ConcurrentEmotionalMemoryLayer])
+def test_calls_and_residency_are_exported(layer_type):
+    eml = layer_type(max_memory_per_user=3)
+    registry = instrument_layer(eml)
+    for index in range(5):
+        eml.record_emotional_event(f"user_{index % 2}", "joy", f"context {index}", 5)
+    eml.detect_repetition("user_0")
+    text = registry.render()
+    assert 'genesis_eml_call_seconds_count{method="record_emotional_event"} 5' in text
+    assert 'genesis_eml_call_seconds_count{method="detect_repetition"} 1' in text
+    assert sample(text, "genesis_eml_resident_users") == 2
+    assert sample(text, "genesis_eml_resident_events") == 5
+
+
+def test_reinstrumenting_replaces_the_wrappers_and_uninstrumenting_removes_them():
+    eml = EmotionalMemoryLayer()
+    registry = MetricsRegistry()
+    instrument_layer(eml, registry)
+    instrument_layer(eml, registry)
+    eml.record_emotional_event("u", "joy", "work", 5)
+    assert 'genesis_eml_call_seconds_count{method="record_emotional_event"} 1' in registry.render()
+    uninstrument_layer(eml)
+    assert "record_emotional_event" not in vars(eml)
+
+
+def test_front_ends_without_memory_are_refused():
+    with pytest.raises(TypeError):
+        instrument_layer(AsyncEmotionalMemoryLayer())
+    with ShardedEmotionalMemoryLayer(shards=1) as sharded:
+        with pytest.raises(TypeError):
+            instrument_layer(sharded)
+
+
+def test_registry_renders_counters_and_rejects_conflicting_registrations():
+    registry = MetricsRegistry()
+    registry.counter("frames_total", "Frames.", ("channel",), lambda: {("emotions",): 3})
+    registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0)).observe(0.5)
+    text = registry.render()
+    assert "# TYPE frames_total counter" in text
+    assert 'frames_total{channel="emotions"} 3' in text
+    assert 'latency_seconds_bucket{le="0.1"} 0' in text and 'latency_seconds_bucket{le="1.0"} 1' in text
+    with pytest.raises(ValueError):
+        registry.gauge("frames_total", "Frames.", ("channel",))
@@ -0,0 +1,59 @@
+import datetime
+
+import pytest
+
+from emotional_memory_layer_Version4 import EmotionalMemoryLayer
+from emotional_memory_shards import ShardedEmotionalMemoryLayer, shard_for
+
+EVENTS = [
+    (f"user_{index % 7}", ["joy", "grief", "shame"][index % 3], f"context {index % 4}", index % 10)
+    for index in range(60)
+]
+
+
+@pytest.fixture
+def sharded():
+    eml = ShardedEmotionalMemoryLayer(shards=3, batch_size=8, compact=True, max_memory_per_user=5)
+    yield eml
+    eml.close()
+
+
+def test_shard_for_is_stable_and_in_range():
+    assert [shard_for(f"user_{index}", 4) for index in range(20)] == [shard_for(f"user_{index}", 4) for index in range(20)]
+    assert {shard_for(index, 3) for index in range(100)} == {0, 1, 2}
+
+
+def test_reads_match_an_in_process_layer(sharded):
+    local = EmotionalMemoryLayer(compact=True, max_memory_per_user=5)
+    for event in EVENTS:
+        sharded.record_emotional_event(*event)
+        local.record_emotional_event(*event)
+    for user_id in {event[0] for event in EVENTS}:
+        assert sharded.detect_repetition(user_id) == local.detect_repetition(user_id)
+        assert sharded.suggest_reflection(user_id) == local.suggest_reflection(user_id)
+    gathered = sharded.scatter_gather("detect_repetition")
+    assert gathered == {user_id: local.detect_repetition(user_id) for user_id in local.users()}
+
+
+def test_bad_event_raises_to_its_caller_and_loses_nothing_else(sharded):
+    sharded.record_emotional_event("u", "joy", "work", 3)
+    with pytest.raises(TypeError):
+        sharded.record_emotional_event("v", "joy", "home", 2.5)
+    with pytest.raises(ValueError):
+        sharded.record_emotional_event("v", "joy", "home", 40000)
+    sharded.record_emotional_event("u", "joy", "home", 4)
+    assert sharded.detect_repetition("u") == ["joy"]
+    assert sharded.emotional_cycle_completion("v") == "No recent emotional memory available."
+
+
+def test_failure_in_a_worker_is_raised_only_to_its_user(sharded):
+    now = datetime.datetime.now()
+    shard = shard_for("u", sharded.shards)
+    other = next(f"user_{index}" for index in range(100) if shard_for(f"user_{index}", sharded.shards) == shard)
+    sharded.record_emotional_event("u", "joy", "work", 3)
+    sharded._pending[shard].append((other, "joy", "work", 2.5, False, now))  # Past the front-end check
+    sharded.record_emotional_event("u", "joy", "home", 4)
+    assert sharded.detect_repetition("u") == ["joy"]
+    with pytest.raises(TypeError):
+        sharded.detect_repetition(other)
+    assert sharded.detect_repetition(other) == []
@@ -0,0 +1,58 @@
+import datetime
+
+import pytest
+
+from emotional_memory_layer_Version4 import EmotionalMemoryLayer
+from emotional_summary import BloomFilter, CountMinSketch, LongTermSummary, QuantileSketch
+
+DAY = 86_400_000_000
+
+
+def test_count_min_never_undercounts():
+    sketch = CountMinSketch(width=16, depth=3)
+    for index in range(200):
+        sketch.add(f"context {index % 40}")
+    assert all(sketch.estimate(f"context {index}") >= 5 for index in range(40))
+
+
+def test_bloom_filter_has_no_false_negatives_and_its_rate_within_capacity():
+    seen = BloomFilter(capacity=500, false_positive_rate=0.01)
+    for index in range(500):
+        seen.add(f"seen {index}")
+    assert all(f"seen {index}" in seen for index in range(500))
+    false_positives = sum(f"other {index}" in seen for index in range(20000)) / 20000
+    assert false_positives < 0.02
+    assert seen.false_positive_rate() == pytest.approx(0.01, rel=0.2)
+
+
+def test_quantiles_within_relative_accuracy():
+    sketch = QuantileSketch(relative_accuracy=0.02)
+    for value in range(1, 1001):
+        sketch.add(value)
+    assert sketch.quantile(0.5) == pytest.approx(500, rel=0.03)
+    assert sketch.quantile(0.99) == pytest.approx(990, rel=0.03)
+    assert QuantileSketch().quantile(0.5) is None
+
+
+def test_decay_halves_the_weight_of_events_one_half_life_older():
+    summary = LongTermSummary(half_life=datetime.timedelta(days=1))
+    summary.absorb("grief", "home", 8, 0)
+    summary.absorb("joy", "work", 2, DAY)
+    emotions = summary.as_dict()["emotions"]
+    assert emotions["grief"]["weight"] == pytest.approx(0.5)
+    assert emotions["joy"]["weight"] == pytest.approx(1.0)
+    assert list(emotions) == ["joy", "grief"]
+
+
+def test_evicted_events_feed_lifetime_diagnostics():
+    eml = EmotionalMemoryLayer(max_memory_per_user=2)
+    eml.enable_long_term_summaries()
+    for context in ("work", "home", "gym", "gym"):
+        eml.record_emotional_event("u", "shame" if context != "gym" else "calm", context, 5)
+    assert eml.long_term_summary("u")["events"] == 2
+    assert eml.detect_repetition("u") == []
+    assert eml.detect_repetition("u", lifetime=True) == ["shame"]
+    assert eml.context_frequency("u", "gym") == 2
+    assert eml.context_frequency("u", "work") == 1
+    assert eml.context_frequency("u", "nowhere") == 0
+    assert eml.context_frequency("ghost", "work") == 0